@@ -0,0 +1,12 @@
+"""Cache helpers shared by the apps"""
+
+
+def incr(cache, key):
+    """Atomically increment a counter that never expires, creating it at 0"""
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+        return 1
@@ -0,0 +1,73 @@
+"""Database profiles selectable with the SELFLOG_DB_PROFILE environment variable"""
+import os
+
+from django.db.backends.signals import connection_created
+
+
+PROFILES = ['sqlite', 'sqlite-tuned', 'postgres']
+
+# Applied to every new SQLite connection of the sqlite-tuned profile
+TUNED_SQLITE_PRAGMAS = {
+    # Readers no longer block on writers (and vice versa); persists in the file
+    'journal_mode': 'WAL',
+    # Safe with WAL: only the last transactions can be lost on power failure
+    'synchronous': 'NORMAL',
+    # Wait up to 5s for a lock instead of failing with "database is locked"
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative values are KiB: a 64 MiB page cache per connection
+    'cache_size': -64000,
+    'temp_store': 'MEMORY',
+}
+
+
+def database_settings(profile, base_dir):
+    """DATABASES['default'] for ``profile``"""
+    if profile == 'sqlite':
+        return {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': base_dir / 'db.sqlite3',
+        }
+
+    if profile == 'sqlite-tuned':
+        return {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': base_dir / 'db.sqlite3',
+            'CONN_MAX_AGE': int(os.environ.get('SELFLOG_DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Take the write lock up front; a deferred transaction that
+                # later writes fails immediately instead of waiting for it
+                'transaction_mode': 'IMMEDIATE',
+            },
+            'PRAGMAS': TUNED_SQLITE_PRAGMAS,
+        }
+
+    if profile == 'postgres':
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('SELFLOG_DB_NAME', 'selflog'),
+            'USER': os.environ.get('SELFLOG_DB_USER', 'selflog'),
+            'PASSWORD': os.environ.get('SELFLOG_DB_PASSWORD', ''),
+            'HOST': os.environ.get('SELFLOG_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('SELFLOG_DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('SELFLOG_DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+
+    raise ValueError(f"Unknown database profile '{profile}', expected one of {', '.join(PROFILES)}")
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Run the PRAGMAS of a connection's settings when it is opened"""
+    pragmas = connection.settings_dict.get('PRAGMAS')
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+# This module is imported by the settings, so the hook is connected before
+# the first connection is opened
+connection_created.connect(apply_sqlite_pragmas, dispatch_uid='selflog_sqlite_pragmas')
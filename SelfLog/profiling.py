@@ -0,0 +1,141 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+_log_lock = threading.Lock()
+
+# Counters of the request being profiled, see count()
+_counters = ContextVar('selflog_profiling_counters', default=None)
+
+
+def count(name, amount=1):
+    """Add to a named counter of the request being profiled; a no-op otherwise
+
+    Counters are written with the request's profiling record, so
+    ``manage.py profiling_report`` adds them up across every worker process.
+    """
+    counters = _counters.get()
+    if counters is not None:
+        counters[name] += amount
+
+
+@contextmanager
+def collect_counters():
+    """Collect the count() calls made inside the block into a Counter"""
+    counters = Counter()
+    token = _counters.set(counters)
+    try:
+        yield counters
+    finally:
+        _counters.reset(token)
+
+
+class QueryProfiler:
+    """Database execute wrapper counting queries, their time and repeated SQL"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        """SQL executed more than once, most repeated first"""
+        return [(sql, count) for sql, count in self.statements.most_common() if count > 1]
+
+
+def read_profile_log(path):
+    """Yield the request records appended to ``path``"""
+    with open(path, encoding='utf-8') as log:
+        for line in log:
+            if line.strip():
+                yield json.loads(line)
+
+
+class ProfilingMiddleware:
+    """Record wall time, query count and DB time of every request
+
+    Enabled with ``PROFILING_ENABLED``. Each request is appended to
+    ``PROFILING_LOG`` as one JSON object per line and reported back in a
+    ``Server-Timing`` header, together with the counters the request bumped
+    through count(); ``manage.py profiling_report`` summarises the log per
+    URL name.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.log_path = settings.PROFILING_LOG
+        self.duplicate_threshold = settings.PROFILING_DUPLICATE_THRESHOLD
+
+    def __call__(self, request):
+        profiler = QueryProfiler()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profiler))
+            counters = stack.enter_context(collect_counters())
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        url_name = self.url_name(request)
+        duplicates = profiler.duplicates
+        repeated = sum(count - 1 for sql, count in duplicates)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={profiler.duration * 1000:.2f};desc="{profiler.count} queries"',
+            f'app;dur={(elapsed - profiler.duration) * 1000:.2f}',
+            f'total;dur={elapsed * 1000:.2f}',
+        ])
+
+        if duplicates and duplicates[0][1] >= self.duplicate_threshold:
+            sql, count = duplicates[0]
+            logger.warning(
+                'Possible N+1 in %s: query executed %d times: %s', url_name, count, sql
+            )
+
+        self.write({
+            'url_name': url_name,
+            'method': request.method,
+            'status': response.status_code,
+            'time': round(elapsed * 1000, 3),
+            'db_time': round(profiler.duration * 1000, 3),
+            'queries': profiler.count,
+            'duplicates': repeated,
+            'counters': dict(counters),
+        })
+        return response
+
+    def url_name(self, request):
+        # Only resolved names are recorded so the log cannot grow a key per path
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return '<unresolved>'
+        return match.view_name or match._func_path
+
+    def write(self, record):
+        line = json.dumps(record) + '\n'
+        with _log_lock:
+            with open(self.log_path, 'a', encoding='utf-8') as log:
+                log.write(line)
@@ -0,0 +1,25 @@
+"""Session storage profiles selectable with the SELFLOG_SESSION_PROFILE environment variable"""
+import os
+
+
+PROFILES = ['db', 'cached_db', 'signed_cookies', 'file']
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'file': 'django.contrib.sessions.backends.file',
+}
+
+
+def session_engine(profile, file_path):
+    """SESSION_ENGINE for ``profile``
+
+    The file engine refuses to start without its directory, so it is
+    created here for the file profile.
+    """
+    if profile not in ENGINES:
+        raise ValueError(f"Unknown session profile '{profile}', expected one of {', '.join(PROFILES)}")
+    if profile == 'file':
+        os.makedirs(file_path, exist_ok=True)
+    return ENGINES[profile]
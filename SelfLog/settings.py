@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from SelfLog.database import database_settings
+from SelfLog.sessions import session_engine
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,12 +52,43 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'auth_app.CustomUser'
 
 # Custom authentication backends
+# EmailOrPhoneBackend extends ModelBackend and already matches emails, so a
+# ModelBackend fallback would only hash the password a second time on every
+# failed login.
 AUTHENTICATION_BACKENDS = [
     'auth_app.backends.EmailOrPhoneBackend',  # Our custom backend
-    'django.contrib.auth.backends.ModelBackend',  # Default backend as fallback
 ]
 
+# Signed-in users are cached so requests skip the user SELECT. Entries are
+# versioned per user and dropped whenever the user is saved or updated. Only
+# used when AUTH_USER_CACHE_ALIAS is a cache shared by every worker (Redis,
+# Memcached, ...): on a LocMemCache, or with the alias set to None, the user
+# is loaded from the database on each request. With profiling on,
+# `manage.py profiling_report` shows the hit rate.
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Country code of phone numbers entered without + or 00 (01712345678,
+# 1712345678 or 8801712345678), when they are normalized to E.164
+PHONE_DEFAULT_COUNTRY_CODE = '880'
+
+# Login throttling
+# Token buckets checked before any password is hashed: every login attempt
+# takes a token from the bucket of the email/phone tried and one from the
+# bucket of the client IP. Rates are (capacity, seconds to refill an empty
+# bucket); a successful login refills the identifier's bucket. Buckets are
+# per process unless LOGIN_THROTTLE_CACHE_ALIAS is a cache shared by all
+# workers. With profiling on, `manage.py profiling_report` shows how many
+# attempts were checked and rejected.
+LOGIN_THROTTLE_ENABLED = True
+LOGIN_THROTTLE_CACHE_ALIAS = 'default'
+LOGIN_THROTTLE_RATES = {
+    'identifier': (5, 300),
+    'ip': (30, 60),
+}
+
 MIDDLEWARE = [
+    'SelfLog.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -86,13 +121,103 @@ WSGI_APPLICATION = 'SelfLog.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Profile chosen with the SELFLOG_DB_PROFILE environment variable:
+#   sqlite        plain SQLite file, a new connection per request (default)
+#   sqlite-tuned  WAL journal, synchronous=NORMAL, busy timeout, mmap and a
+#                 larger page cache, connections kept for CONN_MAX_AGE
+#   postgres      PostgreSQL from SELFLOG_DB_NAME, SELFLOG_DB_USER,
+#                 SELFLOG_DB_PASSWORD, SELFLOG_DB_HOST and SELFLOG_DB_PORT
+# `manage.py benchmark_db_profiles` compares them under concurrent load.
+
+DATABASE_PROFILE = os.environ.get('SELFLOG_DB_PROFILE', 'sqlite')
+
 DATABASES = {
+    'default': database_settings(DATABASE_PROFILE, BASE_DIR),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Swap in 'django.core.cache.backends.filebased.FileBasedCache' (with a
+# LOCATION directory) to share cached analytics between worker processes.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'selflog',
     }
 }
 
+# Cache alias and lifetime (seconds) for per-user analytics results
+TASK_ANALYTICS_CACHE_ALIAS = 'default'
+TASK_ANALYTICS_CACHE_TIMEOUT = 300
+
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+# Profile chosen with the SELFLOG_SESSION_PROFILE environment variable:
+#   db              a django_session read per request, a write when the
+#                   session changes (default)
+#   cached_db       reads served from SESSION_CACHE_ALIAS, writes go to both;
+#                   needs a cache shared by all worker processes, or a worker
+#                   can keep serving a session another one ended
+#   signed_cookies  the session lives in a signed cookie, no server storage;
+#                   signing out only clears the cookie in that browser
+#   file            one file per session under SESSION_FILE_PATH
+# Expired rows and files are removed by `manage.py clear_expired_sessions`,
+# and `manage.py benchmark_sessions` compares the database cost of each.
+
+SESSION_PROFILE = os.environ.get('SELFLOG_SESSION_PROFILE', 'db')
+SESSION_FILE_PATH = os.environ.get('SELFLOG_SESSION_FILE_PATH', str(BASE_DIR / 'sessions'))
+SESSION_ENGINE = session_engine(SESSION_PROFILE, SESSION_FILE_PATH)
+SESSION_CACHE_ALIAS = 'default'
+
+
+# Task deadlines
+# Set to False when `manage.py run_deadline_scheduler` is running so page views
+# stop applying deadline status transitions themselves.
+TASK_SWEEP_ON_REQUEST = True
+
+# Task list pagination
+# Default number of tasks per page and the largest page a client may request.
+TASK_PAGE_SIZE = 50
+TASK_MAX_PAGE_SIZE = 200
+
+# Days of upcoming recurring task occurrences shown above the task list
+TASK_RECURRENCE_LIST_DAYS = 7
+
+# Rows fetched from the database per round-trip when streaming task exports
+TASK_EXPORT_CHUNK_SIZE = 2000
+
+# Most tasks a single /api/tasks/bulk/ request may change
+TASK_BULK_MAX_ITEMS = 500
+
+# Tasks inserted per bulk_create when importing CSV/iCalendar files, and how
+# many invalid rows the upload page lists
+TASK_IMPORT_BATCH_SIZE = 1000
+TASK_IMPORT_MAX_REPORTED_ERRORS = 100
+
+# Reminder worker (`manage.py run_reminder_worker`): threads sending reminder
+# emails at once, and how far ahead (minutes) due reminders are queued
+TASK_REMINDER_WORKERS = 4
+TASK_REMINDER_LOOKAHEAD_MINUTES = 60
+
+# Reminders go through Django's email backend; the console backend prints
+# them, point EMAIL_BACKEND at SMTP in production
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'SelfLog <reminders@selflog.local>'
+
+
+# Request profiling
+# Set PROFILING_ENABLED to True to record wall time, query count and DB time of
+# every request (plus a Server-Timing header). Records are appended to
+# PROFILING_LOG, one JSON object per line; summarise them with
+# `manage.py profiling_report`. A warning is logged when a single SQL statement
+# runs PROFILING_DUPLICATE_THRESHOLD times or more in one request.
+PROFILING_ENABLED = False
+PROFILING_LOG = BASE_DIR / 'profiling.jsonl'
+PROFILING_DUPLICATE_THRESHOLD = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
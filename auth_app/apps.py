@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class AuthAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auth_app'
+
+    def ready(self):
+        from django.contrib.auth.signals import user_logged_in
+
+        from auth_app.signals import record_login
+
+        # Replace the stock receiver so a login writes the user row once
+        user_logged_in.disconnect(dispatch_uid='update_last_login')
+        user_logged_in.connect(record_login, dispatch_uid='update_last_login')
@@ -1,6 +1,10 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.core.exceptions import PermissionDenied
+
+from auth_app.cache import acache_user, acached_user, cache_user, cached_user, user_cache_enabled
+from auth_app.identifiers import IDENTIFIER_FIELDS, classify_identifier
+from auth_app.throttling import check_login, reset_identifier
 
 class EmailOrPhoneBackend(ModelBackend):
     """Custom authentication backend allowing email or phone number login"""
@@ -10,28 +14,60 @@ class EmailOrPhoneBackend(ModelBackend):
         
         if username is None:
             username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        
+        # Normalized first, so every spelling of a number shares one bucket
+        kind, identifier = classify_identifier(username)
+        
+        # Throttle before any password is hashed
+        retry_after = check_login(request, identifier)
+        if retry_after:
+            if request is not None:
+                request.login_retry_after = retry_after
+            # Stops authenticate() from trying further backends
+            raise PermissionDenied
         
         try:
-            # Try to find user by email or phone number
-            user = UserModel.objects.get(
-                Q(email=username) | 
-                Q(phone_number=username)
-            )
+            # One indexed lookup on the email or the phone number column
+            if kind is None:
+                raise UserModel.DoesNotExist
+            user = UserModel.objects.get(**{IDENTIFIER_FIELDS[kind]: identifier})
         except UserModel.DoesNotExist:
             # Run the default password hasher once to reduce timing difference
             UserModel().set_password(password)
             return None
-        except UserModel.MultipleObjectsReturned:
-            # This should not happen if email and phone are unique
-            return None
         
         if user.check_password(password) and self.user_can_authenticate(user):
-            # Track login method
-            if '@' in username:
-                user.last_login_method = 'email'
-            else:
-                user.last_login_method = 'phone'
-            user.save(update_fields=['last_login_method'])
+            # Track login method; saved together with last_login on login()
+            user.last_login_method = kind
+            reset_identifier(identifier)
             return user
         
-        return None
\ No newline at end of file
+        return None
+    
+    def get_user(self, user_id):
+        """The signed-in user, from the user cache when possible
+        
+        django.contrib.auth still checks the session auth hash against the
+        returned user, so a password change (which saves the user and so
+        invalidates the cache) signs out other sessions as before.
+        """
+        if not user_cache_enabled():
+            return super().get_user(user_id)
+        key, user = cached_user(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache_user(key, user)
+        return user
+    
+    async def aget_user(self, user_id):
+        if not user_cache_enabled():
+            return await super().aget_user(user_id)
+        key, user = await acached_user(user_id)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await acache_user(key, user)
+        return user
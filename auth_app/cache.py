@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from SelfLog.cache import incr
+from SelfLog.profiling import count
+
+
+KEY_PREFIX = 'auth-user'
+
+
+def get_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def user_cache_enabled():
+    """Whether signed-in users are cached
+
+    Off when AUTH_USER_CACHE_ALIAS is None or a LocMemCache: a save only
+    invalidates the copy in its own process, and other workers would keep
+    accepting a changed password or a deactivated user until the entry
+    timed out.
+    """
+    alias = settings.AUTH_USER_CACHE_ALIAS
+    return alias is not None and not isinstance(caches[alias], LocMemCache)
+
+
+def version_key(user_id):
+    return f'{KEY_PREFIX}:version:{user_id}'
+
+
+def user_key(user_id, version):
+    return f'{KEY_PREFIX}:{user_id}:{version}'
+
+
+def cached_user(user_id):
+    """(cache key, cached user or None) for a signed-in user's id
+
+    The key includes the user's version, so a row loaded before the user
+    was saved is stored under a key that is never read again.
+    """
+    cache = get_cache()
+    key = user_key(user_id, cache.get(version_key(user_id), 0))
+    user = cache.get(key)
+    count('user_cache.hits' if user is not None else 'user_cache.misses')
+    return key, user
+
+
+async def acached_user(user_id):
+    """Async version of cached_user()"""
+    cache = get_cache()
+    key = user_key(user_id, await cache.aget(version_key(user_id), 0))
+    user = await cache.aget(key)
+    count('user_cache.hits' if user is not None else 'user_cache.misses')
+    return key, user
+
+
+def cache_user(key, user):
+    get_cache().set(key, user, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+
+
+async def acache_user(key, user):
+    await get_cache().aset(key, user, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+
+
+def invalidate_user(user_id):
+    """Stop serving the cached copy of a user"""
+    if user_cache_enabled():
+        incr(get_cache(), version_key(user_id))
+
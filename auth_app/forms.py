@@ -1,9 +1,23 @@
+import math
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm, AuthenticationForm
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import ValidationError
+from .identifiers import normalize_phone_number
 from .models import CustomUser
 
+def clean_phone_number_value(value):
+    """Stored (E.164) form of a phone number entered in a form"""
+    if not value:
+        # NULL rather than '', as the column is unique
+        return None
+    phone_number = normalize_phone_number(value)
+    if phone_number is None:
+        raise ValidationError(CustomUser.phone_regex.message)
+    return phone_number
+
+
 class CustomUserCreationForm(UserCreationForm):
     """Form for creating new users with email or phone"""
     
@@ -20,6 +34,9 @@ class CustomUserCreationForm(UserCreationForm):
             raise ValidationError('Either email or phone number must be provided.')
         
         return cleaned_data
+    
+    def clean_phone_number(self):
+        return clean_phone_number_value(self.cleaned_data.get('phone_number'))
 
 
 class CustomUserChangeForm(UserChangeForm):
@@ -29,11 +46,19 @@ class CustomUserChangeForm(UserChangeForm):
         model = CustomUser
         fields = ('email', 'phone_number', 'first_name', 'last_name', 
                  'timezone', 'email_notifications', 'push_notifications')
+    
+    def clean_phone_number(self):
+        return clean_phone_number_value(self.cleaned_data.get('phone_number'))
 
 
 class EmailOrPhoneAuthenticationForm(AuthenticationForm):
     """Custom authentication form using email or phone number"""
     
+    error_messages = {
+        **AuthenticationForm.error_messages,
+        'throttled': _('Too many login attempts. Please try again in %(seconds)s seconds.'),
+    }
+    
     username = forms.CharField(
         label=_('Email or Phone Number'),
         widget=forms.TextInput(attrs={
@@ -58,6 +83,17 @@ class EmailOrPhoneAuthenticationForm(AuthenticationForm):
             raise ValidationError('Please enter your email or phone number.')
         
         return username
+    
+    def get_invalid_login_error(self):
+        # Set by EmailOrPhoneBackend when the login throttle rejected the attempt
+        retry_after = getattr(self.request, 'login_retry_after', None)
+        if retry_after:
+            return ValidationError(
+                self.error_messages['throttled'],
+                code='throttled',
+                params={'seconds': math.ceil(retry_after)},
+            )
+        return super().get_invalid_login_error()
 
 
 class CustomUserRegistrationForm(forms.ModelForm):
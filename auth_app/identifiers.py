@@ -0,0 +1,62 @@
+import re
+
+from django.conf import settings
+from django.contrib.auth.base_user import BaseUserManager
+
+
+# Dropped from phone numbers before they are stored or looked up
+PHONE_SEPARATORS = re.compile(r'[\s\-().]')
+E164 = re.compile(r'^\+[1-9]\d{7,14}$')
+
+# User field holding each kind of identifier
+IDENTIFIER_FIELDS = {
+    'email': 'email',
+    'phone': 'phone_number',
+}
+
+
+def normalize_phone_number(value):
+    """E.164 form of a phone number (``+8801712345678``), or None
+
+    Separators are dropped and a leading 00 becomes +. Numbers without +
+    or 00 are in the PHONE_DEFAULT_COUNTRY_CODE country: its code replaces
+    the 0 trunk prefix of a national number (``01712345678``), is added to
+    one written without it (``1712345678``), and is kept when the number
+    already starts with it (``8801712345678``). Numbers from other countries
+    need their + or 00 prefix.
+    """
+    number = PHONE_SEPARATORS.sub('', value.strip())
+    country_code = settings.PHONE_DEFAULT_COUNTRY_CODE
+    if number.startswith('00'):
+        number = '+' + number[2:]
+    elif number.startswith('0'):
+        number = '+' + country_code + number[1:]
+    elif number.isdigit() and not number.startswith(country_code):
+        number = '+' + country_code + number
+    elif not number.startswith('+'):
+        number = '+' + number
+    return number if E164.match(number) else None
+
+
+def classify_identifier(value):
+    """('email' or 'phone', normalized value) for a login identifier
+
+    Anything with an @ is an email; anything else is a phone number if it
+    normalizes to E.164. Returns (None, value) when it can be neither, so
+    no user can match.
+    """
+    value = value.strip()
+    if '@' in value:
+        return 'email', BaseUserManager.normalize_email(value)
+    phone_number = normalize_phone_number(value)
+    if phone_number:
+        return 'phone', phone_number
+    return None, value
+
+
+def identifier_lookup(value):
+    """Single-column filter kwargs for a login identifier, or None"""
+    kind, value = classify_identifier(value)
+    if kind is None:
+        return None
+    return {IDENTIFIER_FIELDS[kind]: value}
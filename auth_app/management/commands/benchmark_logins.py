@@ -0,0 +1,96 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from auth_app.throttling import check_login
+
+
+BENCHMARK_EMAIL = 'login-benchmark@example.invalid'
+BENCHMARK_PHONE = '+15550000000'
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    """Measure full login requests per second on one core
+
+    Every login posts the login form through the test client, so it covers
+    form validation, the password hash, login() and the session write. The
+    configured PASSWORD_HASHERS are used, so the hash dominates as it does
+    in production. Throttling is off for these logins; the ``throttled``
+    case times attempts the login throttle rejects before hashing.
+    """
+
+    help = 'Benchmark logins per second through the login view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50, help='Timed logins per identifier type')
+        parser.add_argument(
+            '--failed',
+            action='store_true',
+            help='Also time logins with a wrong password',
+        )
+
+    def handle(self, *args, **options):
+        logins = max(options['logins'], 1)
+        UserModel = get_user_model()
+        if UserModel.objects.filter(email=BENCHMARK_EMAIL).exists():
+            raise CommandError(f'{BENCHMARK_EMAIL} already exists; remove it before benchmarking')
+
+        user = UserModel.objects.create_user(
+            email=BENCHMARK_EMAIL, phone_number=BENCHMARK_PHONE, password=BENCHMARK_PASSWORD
+        )
+        try:
+            cases = [
+                ('email', BENCHMARK_EMAIL, BENCHMARK_PASSWORD, 302),
+                ('phone', BENCHMARK_PHONE, BENCHMARK_PASSWORD, 302),
+            ]
+            if options['failed']:
+                cases.append(('wrong password', BENCHMARK_EMAIL, 'not-the-password', 200))
+            with override_settings(LOGIN_THROTTLE_ENABLED=False):
+                for name, identifier, password, expected_status in cases:
+                    self.report(name, self.measure(identifier, password, expected_status, logins))
+
+            # Empty the identifier's bucket, then time the rejected attempts
+            with override_settings(LOGIN_THROTTLE_ENABLED=True):
+                while not check_login(None, BENCHMARK_EMAIL):
+                    pass
+                self.report('throttled', self.measure(BENCHMARK_EMAIL, 'not-the-password', 429, logins))
+        finally:
+            user.delete()
+
+    def measure(self, identifier, password, expected_status, logins):
+        url = reverse('login')
+        timings = []
+        updates = []
+        for _ in range(logins):
+            # A fresh client per login, as the login view redirects signed-in users
+            client = Client()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.post(url, {'username': identifier, 'password': password})
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != expected_status:
+                raise CommandError(f'Login as {identifier} returned {response.status_code}')
+            updates.append(sum(
+                1 for query in queries
+                if query['sql'].startswith('UPDATE') and get_user_model()._meta.db_table in query['sql']
+            ))
+
+        return {
+            'logins_per_second': 1000 * len(timings) / sum(timings),
+            'p50_ms': statistics.median(timings),
+            'p90_ms': statistics.quantiles(timings, n=10)[-1] if len(timings) > 1 else timings[0],
+            'user_updates': max(updates),
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<15} {result['logins_per_second']:>7.1f} logins/s  p50 {result['p50_ms']:>7.1f} ms  "
+            f"p90 {result['p90_ms']:>7.1f} ms  {result['user_updates']} user UPDATE(s) per login"
+        )
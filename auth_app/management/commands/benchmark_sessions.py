@@ -0,0 +1,101 @@
+import statistics
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from SelfLog.sessions import ENGINES, PROFILES
+
+
+BENCHMARK_EMAIL = 'session-benchmark@example.invalid'
+BENCHMARK_PASSWORD = 'benchmark-password'
+# login and logout change the session; page views only read it
+KINDS = ['login', 'page view', 'logout']
+
+
+class Command(BaseCommand):
+    """Compare the database cost of each session profile per request
+
+    Every cycle signs in through the login view, loads the profile page
+    ``--page-views`` times and signs out, all through the test client.
+    Queries are counted per request, in total (including the savepoints
+    around session writes) and on django_session alone. A fast password hasher is used and login throttling is off,
+    so the hash does not drown out the session cost.
+    """
+
+    help = 'Benchmark per-request database cost of the db, cached_db, signed_cookies and file session profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cycles', type=int, default=50, help='Login, page views, logout cycles per profile')
+        parser.add_argument('--page-views', type=int, default=5, help='Signed-in page views per cycle')
+        parser.add_argument(
+            '--profiles',
+            default=','.join(PROFILES),
+            help='Comma separated session profiles to compare',
+        )
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'].split(',')
+        for profile in profiles:
+            if profile not in ENGINES:
+                raise CommandError(f"Unknown session profile '{profile}', expected one of {', '.join(PROFILES)}")
+        UserModel = get_user_model()
+        if UserModel.objects.filter(email=BENCHMARK_EMAIL).exists():
+            raise CommandError(f'{BENCHMARK_EMAIL} already exists; remove it before benchmarking')
+
+        with override_settings(
+            LOGIN_THROTTLE_ENABLED=False,
+            PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+        ), tempfile.TemporaryDirectory() as directory:
+            user = UserModel.objects.create_user(email=BENCHMARK_EMAIL, password=BENCHMARK_PASSWORD)
+            try:
+                for profile in profiles:
+                    self.stdout.write(self.style.MIGRATE_HEADING(f'{profile} sessions'))
+                    with override_settings(SESSION_ENGINE=ENGINES[profile], SESSION_FILE_PATH=directory):
+                        results = self.measure(max(options['cycles'], 1), options['page_views'])
+                    for kind in KINDS:
+                        self.report(kind, results[kind])
+            finally:
+                user.delete()
+
+    def measure(self, cycles, page_views):
+        # A new client per profile; its middleware picks up SESSION_ENGINE
+        client = Client()
+        samples = {kind: [] for kind in KINDS}
+
+        def request(kind, method, url, expected_status, **data):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code != expected_status:
+                raise CommandError(f'{kind} returned {response.status_code}')
+            session = sum(1 for query in queries if 'django_session' in query['sql'])
+            samples[kind].append((elapsed, session, len(queries)))
+
+        for _ in range(cycles):
+            request('login', 'post', reverse('login'), 302, username=BENCHMARK_EMAIL, password=BENCHMARK_PASSWORD)
+            for _ in range(page_views):
+                request('page view', 'get', reverse('profile'), 200)
+            request('logout', 'post', reverse('logout'), 200)
+
+        return {
+            kind: {
+                'p50_ms': statistics.median(elapsed for elapsed, _, _ in rows),
+                'session_queries': sum(session for _, session, _ in rows) / len(rows),
+                'queries': sum(total for _, _, total in rows) / len(rows),
+            }
+            for kind, rows in samples.items()
+        }
+
+    def report(self, kind, result):
+        self.stdout.write(
+            f"  {kind:<10} p50 {result['p50_ms']:>7.2f} ms  "
+            f"{result['queries']:>4.1f} queries per request, "
+            f"{result['session_queries']:.1f} on django_session"
+        )
@@ -0,0 +1,117 @@
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.db.utils import load_backend
+
+from SelfLog.database import database_settings
+from auth_app.identifiers import identifier_lookup
+
+
+BENCHMARK_ALIAS = 'lookup_benchmark'
+EMAIL_PATTERN = 'lookup-benchmark-{}@example.invalid'
+PHONE_PATTERN = '+1999{:07d}'
+
+
+class Command(BaseCommand):
+    """Compare the OR lookup on email/phone with single-column lookups
+
+    Seeds ``--users`` users (1M by default, inserted in batches without
+    hashing passwords) into a scratch SQLite database in a temporary
+    directory, then times random lookups by email and by phone number
+    both ways and prints each query plan.
+    """
+
+    help = 'Benchmark user lookup latency by email or phone number at scale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000, help='Users to seed')
+        parser.add_argument('--lookups', type=int, default=2000, help='Timed lookups per strategy and identifier type')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Users inserted per bulk_create')
+
+    def handle(self, *args, **options):
+        count = options['users']
+        with tempfile.TemporaryDirectory() as directory:
+            self.connection = self.setup(Path(directory))
+            try:
+                self.seed(count, options['batch_size'])
+                rng = random.Random(0)
+                numbers = [rng.randrange(count) for _ in range(options['lookups'])]
+                for kind, pattern in (('email', EMAIL_PATTERN), ('phone', PHONE_PATTERN)):
+                    identifiers = [pattern.format(number) for number in numbers]
+                    self.stdout.write(self.style.MIGRATE_HEADING(f'Lookup by {kind} among {count} users'))
+                    self.report('OR of both columns', identifiers, or_lookup)
+                    self.report('single column', identifiers, single_column_lookup)
+            finally:
+                self.teardown()
+
+    def setup(self, directory):
+        """Register a scratch SQLite database with the user table"""
+        settings_dict = database_settings('sqlite', directory)
+        # configure_settings() fills in the defaults but insists on a default alias
+        settings_dict = connections.configure_settings(
+            {DEFAULT_DB_ALIAS: dict(settings_dict), BENCHMARK_ALIAS: settings_dict}
+        )[BENCHMARK_ALIAS]
+        # Only this thread's handler knows the alias; it is not in DATABASES
+        connection = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, BENCHMARK_ALIAS)
+        connections[BENCHMARK_ALIAS] = connection
+
+        # Created with the email and phone number indexes declared on the model
+        with connection.schema_editor() as editor:
+            editor.create_model(get_user_model())
+        return connection
+
+    def teardown(self):
+        self.connection.close()
+        del connections[BENCHMARK_ALIAS]
+
+    def seed(self, count, batch_size):
+        UserModel = get_user_model()
+        self.stdout.write(f'Seeding {count} users...')
+        password = make_password(None)
+        started = time.perf_counter()
+        for start in range(0, count, batch_size):
+            UserModel.objects.using(BENCHMARK_ALIAS).bulk_create([
+                UserModel(
+                    email=EMAIL_PATTERN.format(number),
+                    phone_number=PHONE_PATTERN.format(number),
+                    password=password,
+                )
+                for number in range(start, min(start + batch_size, count))
+            ])
+        self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s.')
+
+    def report(self, name, identifiers, lookup):
+        users = get_user_model().objects.using(BENCHMARK_ALIAS)
+        # Warm up the connection and the page cache
+        for identifier in identifiers[:50]:
+            users.get(lookup(identifier))
+
+        timings = []
+        for identifier in identifiers:
+            started = time.perf_counter()
+            users.get(lookup(identifier))
+            timings.append((time.perf_counter() - started) * 1_000_000)
+
+        plan = users.filter(lookup(identifiers[0])).explain()
+        self.stdout.write(
+            f'  {name:<20} p50 {statistics.median(timings):>8.1f} us  '
+            f'p90 {statistics.quantiles(timings, n=10)[-1]:>8.1f} us'
+        )
+        self.stdout.write(f"    plan: {' | '.join(line.strip() for line in plan.splitlines())}")
+
+
+def or_lookup(identifier):
+    """The lookup the backend used before identifiers were classified"""
+    return Q(email=identifier) | Q(phone_number=identifier)
+
+
+def single_column_lookup(identifier):
+    return Q(**identifier_lookup(identifier))
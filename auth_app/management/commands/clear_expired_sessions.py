@@ -0,0 +1,52 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """Delete expired sessions a batch at a time
+
+    Unlike ``clearsessions``, which removes every expired row in a single
+    DELETE, each batch commits on its own, so requests waiting on the
+    SQLite write lock only wait for one batch. Rows are cleared for every
+    profile (the table may still hold sessions from before a switch to
+    another engine); the file engine also has its expired files removed.
+    Signed cookie sessions expire in the browser and need no cleanup.
+    """
+
+    help = 'Remove expired sessions in batches (run from cron, e.g. hourly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Session rows deleted per statement')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now).order_by()
+
+        deleted = batches = 0
+        started = time.perf_counter()
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+            batches += 1
+            if len(keys) < batch_size:
+                break
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired session rows in {batches} batches '
+            f'({time.perf_counter() - started:.2f}s).'
+        ))
+
+        if settings.SESSION_ENGINE == 'django.contrib.sessions.backends.file':
+            import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+            self.stdout.write(f'Removed expired session files from {settings.SESSION_FILE_PATH}.')
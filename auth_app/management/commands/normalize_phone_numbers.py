@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from auth_app.identifiers import normalize_phone_number
+
+
+class Command(BaseCommand):
+    """Rewrite stored phone numbers in E.164 form
+
+    Logins look phone numbers up in normalized form only, so existing rows
+    must be normalized once. Numbers that cannot be normalized, or that
+    would collide with another user's number, are reported and left alone.
+    """
+
+    help = 'Normalize every stored phone number to E.164 (run once after upgrading)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users updated per bulk_update')
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without saving them')
+
+    def handle(self, *args, **options):
+        UserModel = get_user_model()
+        batch_size = options['batch_size']
+        users = UserModel.objects.filter(phone_number__isnull=False).exclude(phone_number='').only('pk', 'phone_number')
+
+        changed = []
+        claimed = set()
+        updated = skipped = 0
+        for user in users.order_by('pk').iterator(chunk_size=batch_size):
+            normalized = normalize_phone_number(user.phone_number)
+            if normalized is None:
+                self.stderr.write(f'User {user.pk}: cannot normalize {user.phone_number!r}')
+                skipped += 1
+                continue
+            if normalized == user.phone_number:
+                continue
+            if normalized in claimed:
+                self.stderr.write(f'User {user.pk}: {normalized} is taken by another user')
+                skipped += 1
+                continue
+            claimed.add(normalized)
+            user.phone_number = normalized
+            changed.append(user)
+            if len(changed) >= batch_size:
+                updated, skipped = self.save(changed, updated, skipped, options['dry_run'])
+                changed = []
+        if changed:
+            updated, skipped = self.save(changed, updated, skipped, options['dry_run'])
+
+        verb = 'Would normalize' if options['dry_run'] else 'Normalized'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {updated} phone numbers, skipped {skipped}.'))
+
+    def save(self, changed, updated, skipped, dry_run):
+        """Save one batch, skipping numbers another user already has"""
+        UserModel = get_user_model()
+        taken = set(UserModel.objects.filter(
+            phone_number__in=[user.phone_number for user in changed]
+        ).values_list('phone_number', flat=True))
+        batch = []
+        for user in changed:
+            if user.phone_number in taken:
+                self.stderr.write(f'User {user.pk}: {user.phone_number} is taken by another user')
+                skipped += 1
+            else:
+                batch.append(user)
+        if not dry_run:
+            with transaction.atomic():
+                UserModel.objects.bulk_update(batch, ['phone_number'])
+        return updated + len(batch), skipped
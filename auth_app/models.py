@@ -3,7 +3,27 @@ from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import RegexValidator
 
-class CustomUserManager(BaseUserManager):
+from auth_app.cache import invalidate_user, user_cache_enabled
+from auth_app.identifiers import identifier_lookup, normalize_phone_number
+
+
+class CustomUserQuerySet(models.QuerySet):
+    
+    def update(self, **kwargs):
+        """Update the users and drop them from the user cache
+        
+        update() sends no post_save, which otherwise invalidates them.
+        """
+        if not user_cache_enabled():
+            return super().update(**kwargs)
+        user_ids = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+        for user_id in user_ids:
+            invalidate_user(user_id)
+        return updated
+
+
+class CustomUserManager(BaseUserManager.from_queryset(CustomUserQuerySet)):
     """Custom user manager for email or phone number authentication"""
     
     def create_user(self, email=None, phone_number=None, password=None, **extra_fields):
@@ -13,6 +33,8 @@ class CustomUserManager(BaseUserManager):
         
         if email:
             email = self.normalize_email(email)
+        if phone_number:
+            phone_number = normalize_phone_number(phone_number) or phone_number
         
         user = self.model(email=email, phone_number=phone_number, **extra_fields)
         user.set_password(password)
@@ -34,10 +56,11 @@ class CustomUserManager(BaseUserManager):
 
     def get_by_natural_key(self, username):
         """Allow login with either email or phone number"""
-        return self.get(
-            models.Q(email=username) | 
-            models.Q(phone_number=username)
-        )
+        # Look in the one column the identifier can be in
+        lookup = identifier_lookup(username)
+        if lookup is None:
+            raise self.model.DoesNotExist
+        return self.get(**lookup)
 
 
 class CustomUser(AbstractUser):
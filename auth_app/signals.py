@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from auth_app.cache import invalidate_user
+
+
+def record_login(sender, user, **kwargs):
+    """Save last_login and last_login_method with a single UPDATE
+
+    Stands in for django.contrib.auth's update_last_login receiver, which
+    would save last_login on its own. EmailOrPhoneBackend sets
+    last_login_method on the user without saving it.
+    """
+    user.last_login = timezone.now()
+    user.save(update_fields=['last_login', 'last_login_method'])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Requests load the user from the database again after any change"""
+    invalidate_user(instance.pk)
@@ -1,3 +1,366 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+import tempfile
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from SelfLog.profiling import collect_counters
+from SelfLog.sessions import session_engine
+
+from auth_app.identifiers import classify_identifier, normalize_phone_number
+from auth_app.throttling import check_login, get_cache
+
+
+class CountingHasher(MD5PasswordHasher):
+    """Fast hasher that counts password verifications"""
+
+    algorithm = 'counting_md5'
+    verifications = 0
+
+    def verify(self, password, encoded):
+        CountingHasher.verifications += 1
+        return super().verify(password, encoded)
+
+
+@override_settings(PASSWORD_HASHERS=['auth_app.tests.CountingHasher'])
+class LoginTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='owner@example.com', phone_number='+8801712345678', password='pass1234'
+        )
+
+    def setUp(self):
+        CountingHasher.verifications = 0
+        get_cache().clear()
+
+    def login(self, username, password='pass1234'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('login'), {'username': username, 'password': password})
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "auth_app_customuser"')]
+        return response, updates
+
+    def test_one_hash_and_one_update_per_login(self):
+        for username, method in [('owner@example.com', 'email'), ('+8801712345678', 'phone')]:
+            with self.subTest(method=method):
+                self.client.logout()
+                CountingHasher.verifications = 0
+
+                response, updates = self.login(username)
+
+                self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+                self.assertEqual(CountingHasher.verifications, 1)
+                self.assertEqual(len(updates), 1)
+                self.user.refresh_from_db()
+                self.assertEqual(self.user.last_login_method, method)
+                self.assertIsNotNone(self.user.last_login)
+
+    def test_failed_login_hashes_once_and_writes_nothing(self):
+        response, updates = self.login('owner@example.com', 'wrong')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(CountingHasher.verifications, 1)
+        self.assertEqual(updates, [])
+
+    def test_registration_keeps_the_user_signed_in(self):
+        response = self.client.post(reverse('register'), {
+            'email': 'new@example.com',
+            'first_name': 'New',
+            'password1': 'pass1234',
+            'password2': 'pass1234',
+        })
+
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+
+    def test_benchmark_logins(self):
+        out = StringIO()
+        call_command('benchmark_logins', logins=2, failed=True, stdout=out)
+
+        self.assertIn('1 user UPDATE(s) per login', out.getvalue())
+        self.assertIn('wrong password', out.getvalue())
+        self.assertIn('throttled', out.getvalue())
+        self.assertFalse(get_user_model().objects.filter(email='login-benchmark@example.invalid').exists())
+
+
+@override_settings(
+    PASSWORD_HASHERS=['auth_app.tests.CountingHasher'],
+    LOGIN_THROTTLE_RATES={'identifier': (3, 60), 'ip': (5, 60)},
+)
+class LoginThrottleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='owner@example.com', password='pass1234')
+
+    def setUp(self):
+        CountingHasher.verifications = 0
+        get_cache().clear()
+
+    def attempt(self, username='owner@example.com', password='wrong', ip='10.0.0.1'):
+        return self.client.post(
+            reverse('login'), {'username': username, 'password': password}, REMOTE_ADDR=ip
+        )
+
+    def test_rejects_over_limit_attempts_without_hashing(self):
+        with collect_counters() as counters:
+            for _ in range(3):
+                self.assertEqual(self.attempt().status_code, 200)
+            self.assertEqual(CountingHasher.verifications, 3)
+
+            # Identifiers are matched case-insensitively, and the right password does not help
+            response = self.attempt('Owner@Example.com', 'pass1234', ip='10.0.0.2')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertContains(response, 'Too many login attempts', status_code=429)
+        self.assertEqual(CountingHasher.verifications, 3)
+        self.assertEqual(counters, {'login_throttle.attempts': 4, 'login_throttle.rejected': 1})
+
+    def test_ip_bucket_covers_many_identifiers(self):
+        for number in range(5):
+            self.assertEqual(self.attempt(f'user{number}@example.com').status_code, 200)
+
+        self.assertEqual(self.attempt('user9@example.com').status_code, 429)
+        self.assertEqual(self.attempt('user9@example.com', ip='10.0.0.2').status_code, 200)
+
+    def test_buckets_refill_and_reset_on_success(self):
+        for _ in range(2):
+            self.attempt()
+        self.assertEqual(self.attempt(password='pass1234').status_code, 302)
+        self.client.logout()
+        # The successful login refilled the identifier's bucket
+        for _ in range(3):
+            self.assertEqual(self.attempt(ip='10.0.0.2').status_code, 200)
+        self.assertEqual(self.attempt(ip='10.0.0.3').status_code, 429)
+
+        now = 1_000_000.0
+        for _ in range(3):
+            self.assertEqual(check_login(None, 'other@example.com', now=now), 0)
+        self.assertAlmostEqual(check_login(None, 'other@example.com', now=now), 20)
+        # One token comes back every 20 seconds
+        self.assertEqual(check_login(None, 'other@example.com', now=now + 20), 0)
+
+
+class IdentifierTests(TestCase):
+
+    def test_classification_and_normalization(self):
+        self.assertEqual(classify_identifier(' Owner@Example.COM '), ('email', 'Owner@example.com'))
+        for raw in [
+            '+880 1712-345678', '01712345678', '0171 234 5678', '1712345678', '008801712345678',
+            '8801712345678', '(+880) 1712.345.678',
+        ]:
+            with self.subTest(raw=raw):
+                self.assertEqual(classify_identifier(raw), ('phone', '+8801712345678'))
+        self.assertEqual(classify_identifier('owner'), (None, 'owner'))
+        self.assertIsNone(normalize_phone_number('+12'))
+        self.assertIsNone(normalize_phone_number('+01712345678'))
+
+        # Local numbers belong to the configured country
+        with override_settings(PHONE_DEFAULT_COUNTRY_CODE='1'):
+            for raw in ['(415) 555-0100', '14155550100', '+1 415 555 0100']:
+                with self.subTest(raw=raw):
+                    self.assertEqual(normalize_phone_number(raw), '+14155550100')
+
+    def test_login_with_local_phone_number(self):
+        get_user_model().objects.create_user(phone_number='+8801712345678', password='pass1234')
+
+        for raw in ['01712345678', '1712345678']:
+            with self.subTest(raw=raw):
+                response = self.client.post(reverse('login'), {'username': raw, 'password': 'pass1234'})
+                self.assertEqual(response.status_code, 302)
+                self.client.logout()
+
+    def test_single_column_lookups(self):
+        UserModel = get_user_model()
+        user = UserModel.objects.create_user(email='owner@example.com', phone_number='01712 345678', password='pass1234')
+        self.assertEqual(user.phone_number, '+8801712345678')
+
+        for identifier in ['owner@example.com', '+8801712345678', '017-1234-5678']:
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(UserModel.objects.get_by_natural_key(identifier), user)
+            self.assertNotIn(' OR ', queries[0]['sql'])
+        with self.assertNumQueries(0), self.assertRaises(UserModel.DoesNotExist):
+            UserModel.objects.get_by_natural_key('owner')
+
+        response = self.client.post(reverse('login'), {'username': '01712345678', 'password': 'pass1234'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_profile_form_and_backfill_command(self):
+        UserModel = get_user_model()
+        user = UserModel.objects.create_user(email='owner@example.com', password='pass1234')
+        self.client.force_login(user)
+        self.client.post(reverse('profile'), {
+            'email': 'owner@example.com', 'phone_number': '0171 234 5678', 'first_name': 'Owner',
+            'last_name': '', 'timezone': 'Asia/Dhaka',
+        })
+        user.refresh_from_db()
+        self.assertEqual(user.phone_number, '+8801712345678')
+
+        # Rows saved before numbers were normalized
+        legacy = UserModel.objects.create_user(email='legacy@example.com', password='pass1234')
+        duplicate = UserModel.objects.create_user(email='duplicate@example.com', password='pass1234')
+        UserModel.objects.filter(pk=legacy.pk).update(phone_number='01812345678')
+        UserModel.objects.filter(pk=duplicate.pk).update(phone_number='01712345678')
+        out, err = StringIO(), StringIO()
+
+        call_command('normalize_phone_numbers', stdout=out, stderr=err)
+
+        legacy.refresh_from_db()
+        duplicate.refresh_from_db()
+        self.assertEqual(legacy.phone_number, '+8801812345678')
+        self.assertEqual(duplicate.phone_number, '01712345678')
+        self.assertIn('taken by another user', err.getvalue())
+        self.assertIn('Normalized 1 phone numbers, skipped 1', out.getvalue())
+
+    def test_benchmark_user_lookup(self):
+        out = StringIO()
+        call_command('benchmark_user_lookup', users=30, lookups=10, batch_size=7, stdout=out)
+
+        self.assertIn('single column', out.getvalue())
+        self.assertFalse(get_user_model().objects.filter(email__startswith='lookup-benchmark-').exists())
+        self.assertNotIn('lookup_benchmark', connections.settings)
+
+
+class UserCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='owner@example.com', password='pass1234')
+
+    def setUp(self):
+        get_cache().clear()
+        # The user cache is only used on a cache every process shares
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        shared = override_settings(
+            CACHES={
+                **settings.CACHES,
+                'users': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name},
+            },
+            AUTH_USER_CACHE_ALIAS='users',
+        )
+        shared.enable()
+        self.addCleanup(shared.disable)
+        self.client.force_login(self.user)
+
+    def user_queries(self, url=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url or reverse('profile'))
+        self.assertEqual(response.status_code, 200)
+        table = get_user_model()._meta.db_table
+        return [query['sql'] for query in queries if f'FROM "{table}"' in query['sql']]
+
+    def test_user_is_loaded_once(self):
+        with collect_counters() as counters:
+            self.assertEqual(len(self.user_queries()), 1)
+            self.assertEqual(self.user_queries(), [])
+
+        self.assertEqual(counters, {'user_cache.misses': 1, 'user_cache.hits': 1})
+
+    def test_process_local_cache_is_not_used(self):
+        with override_settings(AUTH_USER_CACHE_ALIAS='default'):
+            for _ in range(2):
+                self.assertEqual(len(self.user_queries()), 1)
+
+    def test_saving_the_user_invalidates_the_cached_copy(self):
+        self.user_queries()
+        self.client.post(reverse('profile'), {
+            'email': 'owner@example.com', 'phone_number': '', 'first_name': 'Renamed',
+            'last_name': '', 'timezone': 'Asia/Dhaka',
+        })
+
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertContains(self.client.get(reverse('profile')), 'Renamed')
+
+    def test_password_change_still_ends_other_sessions(self):
+        self.user_queries()
+        self.user.set_password('changed5678')
+        self.user.save()
+
+        response = self.client.get(reverse('profile'))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response['Location'])
+
+    def test_queryset_update_invalidates_the_cached_copy(self):
+        self.user_queries()
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 302)
+
+    def test_deleted_user_is_signed_out(self):
+        self.user_queries()
+        get_user_model().objects.filter(pk=self.user.pk).delete()
+
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 302)
+
+    async def test_async_views_use_the_cache(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        with collect_counters() as counters:
+            for _ in range(2):
+                response = await client.get(reverse('get_tasks_json'))
+                self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(counters['user_cache.hits'], 1)
+
+
+class SessionProfileTests(TestCase):
+
+    def test_profiles(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'sessions'
+
+        self.assertEqual(session_engine('cached_db', path), 'django.contrib.sessions.backends.cached_db')
+        self.assertFalse(path.exists())
+        self.assertEqual(session_engine('file', path), 'django.contrib.sessions.backends.file')
+        self.assertTrue(path.is_dir())
+        with self.assertRaises(ValueError):
+            session_engine('redis', path)
+
+    def test_clear_expired_sessions_in_batches(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'expired{number}', session_data='', expire_date=now - timedelta(days=1)) for number in range(5)]
+            + [Session(session_key='current', session_data='', expire_date=now + timedelta(days=1))]
+        )
+        out = StringIO()
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('clear_expired_sessions', batch_size=2, stdout=out)
+
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['current'])
+        self.assertIn('Deleted 5 expired session rows in 3 batches', out.getvalue())
+        self.assertEqual(sum(1 for query in queries if query['sql'].startswith('DELETE')), 3)
+
+    def test_cached_db_page_views_skip_the_session_table(self):
+        user = get_user_model().objects.create_user(email='owner@example.com', password='pass1234')
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db'):
+            client = self.client_class()
+            client.force_login(user)
+            client.get(reverse('profile'))
+
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(client.get(reverse('profile')).status_code, 200)
+
+        self.assertFalse([query for query in queries if 'django_session' in query['sql']])
+
+    def test_benchmark_sessions(self):
+        out = StringIO()
+        call_command('benchmark_sessions', cycles=2, page_views=2, stdout=out)
+
+        signed_cookies = out.getvalue().split('signed_cookies sessions\n')[1].split('file sessions')[0]
+        self.assertEqual(signed_cookies.count('0.0 on django_session'), 3)
+        self.assertFalse(get_user_model().objects.filter(email='session-benchmark@example.invalid').exists())
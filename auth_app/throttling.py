@@ -0,0 +1,80 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from SelfLog.profiling import count
+
+
+KEY_PREFIX = 'login-throttle'
+
+
+def get_cache():
+    return caches[settings.LOGIN_THROTTLE_CACHE_ALIAS]
+
+
+def bucket_key(scope, value):
+    # Hashed so any identifier makes a valid cache key
+    digest = hashlib.sha256(value.strip().lower().encode()).hexdigest()
+    return f'{KEY_PREFIX}:{scope}:{digest}'
+
+
+def client_ip(request):
+    """The address the login came from
+
+    Behind a proxy, REMOTE_ADDR must be set to the real client address
+    by the proxy setup, or every login shares one bucket.
+    """
+    return request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+def check_login(request, identifier, now=None):
+    """Take a token for this login attempt; returns seconds to wait, or 0
+
+    Each attempt takes one token from the bucket of the identifier tried
+    and one from the bucket of the client IP (see LOGIN_THROTTLE_RATES).
+    Nothing is taken when a bucket is empty, so rejected attempts do not
+    push the wait further out. Costs one cache read, plus a write per
+    bucket when the attempt is allowed.
+    """
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return 0
+    if now is None:
+        now = time.time()
+
+    buckets = {}
+    if identifier:
+        buckets[bucket_key('identifier', identifier)] = settings.LOGIN_THROTTLE_RATES['identifier']
+    if request is not None:
+        buckets[bucket_key('ip', client_ip(request))] = settings.LOGIN_THROTTLE_RATES['ip']
+
+    cache = get_cache()
+    stored = cache.get_many(list(buckets))
+    count('login_throttle.attempts')
+
+    levels = {}
+    wait = 0
+    for key, (capacity, period) in buckets.items():
+        tokens, updated = stored.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * capacity / period)
+        if tokens < 1:
+            wait = max(wait, (1 - tokens) * period / capacity)
+        levels[key] = tokens
+
+    if wait:
+        # Each rejected attempt is one password hash avoided
+        count('login_throttle.rejected')
+        return wait
+
+    # A bucket left alone for its whole period is full again, so it can expire
+    for key, (capacity, period) in buckets.items():
+        cache.set(key, (levels[key] - 1, now), timeout=period)
+    return 0
+
+
+def reset_identifier(identifier):
+    """Refill the identifier's bucket after a successful login"""
+    if settings.LOGIN_THROTTLE_ENABLED:
+        get_cache().delete(bucket_key('identifier', identifier))
+
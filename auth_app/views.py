@@ -1,7 +1,8 @@
 from django.shortcuts import render, redirect
-from django.contrib.auth import login, authenticate
+from django.contrib.auth import login
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import NON_FIELD_ERRORS
 from .forms import CustomUserRegistrationForm, CustomUserChangeForm, EmailOrPhoneAuthenticationForm
 from .models import CustomUser
 
@@ -13,7 +14,7 @@ def register(request):
             user = form.save()
             
             # Set the backend attribute on the user object
-            user.backend = 'users.backends.EmailOrPhoneBackend'
+            user.backend = 'auth_app.backends.EmailOrPhoneBackend'
             
             # Auto-login after registration
             login(request, user)
@@ -68,30 +69,22 @@ def custom_login(request):
     if request.method == 'POST':
         form = EmailOrPhoneAuthenticationForm(request, data=request.POST)
         if form.is_valid():
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            user = authenticate(request, username=username, password=password)
+            # The form already authenticated the user; checking the password
+            # again would run the hasher twice
+            user = form.get_user()
+            login(request, user)
             
-            if user is not None:
-                login(request, user)
-                
-                # Determine login method for message
-                if '@' in username:
-                    login_method = 'email'
-                    identifier = username
-                else:
-                    login_method = 'phone'
-                    identifier = f"phone number ending in {username[-4:]}"
-                
-                messages.success(request, f'Welcome back! Signed in with {login_method}.')
-                
-                # Redirect to next page or dashboard
-                next_page = request.GET.get('next', 'dashboard')
-                return redirect(next_page)
+            messages.success(request, f'Welcome back! Signed in with {user.last_login_method}.')
+            
+            # Redirect to next page or dashboard
+            next_page = request.GET.get('next', 'dashboard')
+            return redirect(next_page)
     else:
         form = EmailOrPhoneAuthenticationForm()
     
-    return render(request, 'registration/login.html', {'form': form})
+    # Tell clients and proxies that the attempt was throttled
+    status = 429 if form.has_error(NON_FIELD_ERRORS, 'throttled') else 200
+    return render(request, 'registration/login.html', {'form': form}, status=status)
 
 
 @login_required(login_url='login')
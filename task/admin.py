@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Task, MissedTaskReason
+from .models import DailyTaskStats, RecurringTask, SkippedOccurrence, Task, TaskReminder, MissedTaskReason
 
 @admin.register(MissedTaskReason)
 class MissedTaskReasonAdmin(admin.ModelAdmin):
@@ -42,4 +42,42 @@ class TaskAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+
+class SkippedOccurrenceInline(admin.TabularInline):
+    model = SkippedOccurrence
+    extra = 0
+    readonly_fields = ('created_at',)
+
+
+@admin.register(RecurringTask)
+class RecurringTaskAdmin(admin.ModelAdmin):
+    list_display = ('title', 'user', 'frequency', 'interval', 'start_time', 'until', 'count')
+    list_filter = ('frequency', 'created_at')
+    search_fields = ('title', 'description')
+    readonly_fields = ('created_at', 'updated_at')
+    inlines = [SkippedOccurrenceInline]
+
+
+@admin.register(TaskReminder)
+class TaskReminderAdmin(admin.ModelAdmin):
+    list_display = ('task', 'channel', 'due_at', 'sent_at')
+    list_filter = ('channel', 'sent_at')
+    search_fields = ('task__title', 'task__user__email')
+    raw_id_fields = ('task',)
+
+
+@admin.register(DailyTaskStats)
+class DailyTaskStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'total', 'completed', 'not_done', 'completed_duration')
+    list_filter = ('date',)
+    search_fields = ('user__email', 'user__phone_number')
+    date_hierarchy = 'date'
+    
+    def has_add_permission(self, request):
+        # Rollups are maintained from Task; use rebuild_task_rollups to fix them
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
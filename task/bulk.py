@@ -0,0 +1,157 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from task.cache import invalidate_user
+from task.forms import MarkAsNotDoneForm
+from task.models import DEADLINE_TRANSITIONS, DailyTaskStats, Task
+from task.signals import deferred_rollups
+
+
+# Largest reschedule offset accepted, in minutes
+MAX_OFFSET_MINUTES = 366 * 24 * 60
+
+
+class BulkOperationError(ValueError):
+    """The bulk request itself is invalid, so no task was touched"""
+
+
+def parse_ids(ids):
+    """Validate the requested task ids, dropping duplicates but keeping order"""
+    if not isinstance(ids, list) or not ids:
+        raise BulkOperationError('ids must be a non-empty list of task ids')
+    if len(ids) > settings.TASK_BULK_MAX_ITEMS:
+        raise BulkOperationError(f'At most {settings.TASK_BULK_MAX_ITEMS} tasks can be changed at once')
+    if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        raise BulkOperationError('ids must be integers')
+    return list(dict.fromkeys(ids))
+
+
+def clean_params(operation, params):
+    """Validate the operation's parameters once for the whole batch"""
+    if operation == 'set_status':
+        status = params.get('status')
+        if status not in dict(Task.STATUS_CHOICES):
+            raise BulkOperationError('Invalid status')
+        return {'status': status}
+
+    if operation == 'mark_not_done':
+        form = MarkAsNotDoneForm({
+            'missed_reason': params.get('missed_reason') or '',
+            'custom_missed_reason': params.get('custom_missed_reason') or '',
+        })
+        if not form.is_valid():
+            raise BulkOperationError(' '.join(
+                error['message'] for errors in form.errors.get_json_data().values() for error in errors
+            ))
+        return form.cleaned_data
+
+    if operation == 'reschedule':
+        offset = params.get('offset_minutes')
+        if not isinstance(offset, int) or isinstance(offset, bool) or not offset:
+            raise BulkOperationError('offset_minutes must be a non-zero integer')
+        if abs(offset) > MAX_OFFSET_MINUTES:
+            raise BulkOperationError('offset_minutes must be at most one year')
+        return {'offset': timedelta(minutes=offset)}
+
+    if operation == 'delete':
+        return {}
+
+    raise BulkOperationError(f"Unknown operation, expected one of {', '.join(OPERATION_HANDLERS)}")
+
+
+def bulk_task_operation(user, ids, operation, params, now=None):
+    """Apply ``operation`` to the user's tasks among ``ids`` in one transaction
+
+    Ownership is checked with a single query and every change is one UPDATE
+    (or DELETE) over all owned tasks. Returns one result per requested id, in
+    order; ids that are not the user's tasks are reported as not found.
+    """
+    ids = parse_ids(ids)
+    params = clean_params(operation, params)
+    if now is None:
+        now = timezone.now()
+
+    details = {}
+    with transaction.atomic():
+        owned = {
+            pk: (start_time, end_time)
+            for pk, start_time, end_time in Task.objects.select_for_update().filter(
+                user=user, pk__in=ids
+            ).values_list('pk', 'start_time', 'end_time')
+        }
+        if owned:
+            tasks = Task.objects.filter(pk__in=owned)
+            affected = [(user.pk, start_time) for start_time, end_time in owned.values()]
+            details = OPERATION_HANDLERS[operation](tasks, owned, params, now)
+
+            if operation == 'reschedule':
+                affected += [(user.pk, start_time + params['offset']) for start_time, end_time in owned.values()]
+            if operation != 'delete':
+                # update() sends no signals
+                DailyTaskStats.objects.refresh_for_tasks(affected)
+                invalidate_user(user.pk)
+
+    results = []
+    for pk in ids:
+        if pk in owned:
+            results.append({'id': pk, 'ok': True, **details.get(pk, {})})
+        else:
+            results.append({'id': pk, 'ok': False, 'error': 'Task not found'})
+    return results
+
+
+def set_status(tasks, owned, params, now):
+    status = params['status']
+    transitioned = DEADLINE_TRANSITIONS.get(status)
+    if transitioned is None:
+        tasks.update(status=status, updated_at=now)
+        return {pk: {'status': status} for pk in owned}
+
+    # As in Task.save(), an expired task cannot be pending or in progress
+    extra = {'missed_at': now} if transitioned == 'not_done' else {}
+    tasks.filter(end_time__lt=now).update(status=transitioned, updated_at=now, **extra)
+    tasks.filter(end_time__gte=now).update(status=status, updated_at=now)
+    return {
+        pk: {'status': transitioned if end_time < now else status}
+        for pk, (start_time, end_time) in owned.items()
+    }
+
+
+def delete(tasks, owned, params, now):
+    # Deleting sends post_delete per task; refresh their rollup days together
+    with deferred_rollups():
+        tasks.skip_occurrences()
+        tasks.delete()
+    return {}
+
+
+def mark_not_done(tasks, owned, params, now):
+    fields = {'status': 'not_done', 'missed_at': now, 'updated_at': now}
+    # Like Task.mark_as_not_done(), only the reasons given are replaced
+    if params.get('missed_reason'):
+        fields['missed_reason'] = params['missed_reason']
+    if params.get('custom_missed_reason'):
+        fields['custom_missed_reason'] = params['custom_missed_reason']
+    tasks.update(**fields)
+    return {pk: {'status': 'not_done'} for pk in owned}
+
+
+def reschedule(tasks, owned, params, now):
+    offset = params['offset']
+    tasks.update(start_time=F('start_time') + offset, end_time=F('end_time') + offset, updated_at=now)
+    return {
+        pk: {'start_time': (start_time + offset).isoformat(), 'end_time': (end_time + offset).isoformat()}
+        for pk, (start_time, end_time) in owned.items()
+    }
+
+
+OPERATION_HANDLERS = {
+    'set_status': set_status,
+    'delete': delete,
+    'mark_not_done': mark_not_done,
+    'reschedule': reschedule,
+}
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from SelfLog.cache import incr
+from SelfLog.profiling import count
+
+
+KEY_PREFIX = 'task-analytics'
+GLOBAL_VERSION = 'global'
+
+
+def get_cache():
+    return caches[settings.TASK_ANALYTICS_CACHE_ALIAS]
+
+
+def version_key(owner):
+    return f'{KEY_PREFIX}:version:{owner}'
+
+
+def invalidate_user(user_id):
+    """Drop every cached analytics result for one user"""
+    incr(get_cache(), version_key(user_id))
+
+
+def invalidate_all():
+    """Drop every cached analytics result for every user"""
+    incr(get_cache(), version_key(GLOBAL_VERSION))
+
+
+def cache_key(user_id, view_name, *parts, versions=None):
+    """Versioned key for a (user, view, range) analytics result
+
+    ``versions`` are the version counters when the caller already has them.
+    """
+    if versions is None:
+        versions = get_cache().get_many([version_key(user_id), version_key(GLOBAL_VERSION)])
+    user_version = versions.get(version_key(user_id), 0)
+    global_version = versions.get(version_key(GLOBAL_VERSION), 0)
+    suffix = ':'.join(str(part) for part in parts)
+    return f'{KEY_PREFIX}:{user_id}:{global_version}.{user_version}:{view_name}:{suffix}'
+
+
+def get_or_compute(user, view_name, parts, compute):
+    """Return the cached result for ``user``/``view_name``/``parts`` or compute it
+
+    Results are invalidated by bumping the user's (or the global) version,
+    so stale entries are simply never read again and expire on their own.
+    """
+    cache = get_cache()
+    key = cache_key(user.pk, view_name, *parts)
+
+    result = cache.get(key)
+    count('analytics_cache.hits' if result is not None else 'analytics_cache.misses')
+    if result is not None:
+        return result
+
+    result = compute()
+    cache.set(key, result, timeout=settings.TASK_ANALYTICS_CACHE_TIMEOUT)
+    return result
+
+
+async def aget_or_compute(user, view_name, parts, compute):
+    """Async version of get_or_compute(); ``compute`` is a coroutine function"""
+    cache = get_cache()
+    versions = await cache.aget_many([version_key(user.pk), version_key(GLOBAL_VERSION)])
+    key = cache_key(user.pk, view_name, *parts, versions=versions)
+
+    result = await cache.aget(key)
+    count('analytics_cache.hits' if result is not None else 'analytics_cache.misses')
+    if result is not None:
+        return result
+
+    result = await compute()
+    await cache.aset(key, result, timeout=settings.TASK_ANALYTICS_CACHE_TIMEOUT)
+    return result
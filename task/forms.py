@@ -1,6 +1,6 @@
 from django import forms
 from django.utils import timezone
-from .models import Task, MissedTaskReason
+from .models import Task, MissedTaskReason, RecurringTask
 
 class TaskForm(forms.ModelForm):
     class Meta:
@@ -37,15 +37,20 @@ class TaskForm(forms.ModelForm):
         end_time = cleaned_data.get('end_time')
         
         if start_time and end_time:
-            if start_time >= end_time:
-                raise forms.ValidationError("End time must be after start time")
-            
-            if start_time < timezone.now():
-                raise forms.ValidationError("Start time cannot be in the past")
+            check_task_times(start_time, end_time)
         
         return cleaned_data
 
 
+def check_task_times(start_time, end_time, now=None, allow_past=False):
+    """Validate a task's start and end time, as TaskForm does"""
+    if start_time >= end_time:
+        raise forms.ValidationError("End time must be after start time")
+    
+    if not allow_past and start_time < (now or timezone.now()):
+        raise forms.ValidationError("Start time cannot be in the past")
+
+
 class MissedTaskReasonForm(forms.ModelForm):
     """Form for adding custom missed task reasons"""
     
@@ -94,4 +99,92 @@ class MarkAsNotDoneForm(forms.Form):
                 "Please either select a reason or write your own reason for missing this task."
             )
         
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+
+class TaskImportForm(forms.Form):
+    """Form for uploading a CSV or iCalendar file of tasks"""
+    
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv,.ics,text/csv,text/calendar'
+        }),
+        help_text="A CSV file with title, start_time and end_time columns, or an .ics calendar export."
+    )
+
+
+class RecurringTaskForm(forms.ModelForm):
+    """Form for creating a repeating task"""
+    
+    weekdays = forms.MultipleChoiceField(
+        choices=RecurringTask.WEEKDAY_CHOICES,
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+        help_text="Weekly only; defaults to the weekday of the first occurrence."
+    )
+    
+    class Meta:
+        model = RecurringTask
+        fields = [
+            'title', 'description', 'start_time', 'end_time',
+            'frequency', 'interval', 'weekdays', 'until', 'count', 'reminder_minutes',
+        ]
+        widgets = {
+            'title': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'Enter task title'
+            }),
+            'description': forms.Textarea(attrs={
+                'class': 'form-control',
+                'rows': 3,
+                'placeholder': 'Enter task description (optional)'
+            }),
+            'start_time': forms.DateTimeInput(attrs={
+                'class': 'form-control',
+                'type': 'datetime-local'
+            }),
+            'end_time': forms.DateTimeInput(attrs={
+                'class': 'form-control',
+                'type': 'datetime-local'
+            }),
+            'frequency': forms.Select(attrs={'class': 'form-select'}),
+            'interval': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
+            'until': forms.DateTimeInput(attrs={
+                'class': 'form-control',
+                'type': 'datetime-local'
+            }),
+            'count': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
+            'reminder_minutes': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'min': 0,
+                'max': 1440
+            }),
+        }
+        labels = {
+            'start_time': 'First occurrence starts',
+            'end_time': 'First occurrence ends',
+        }
+    
+    def clean_weekdays(self):
+        return ','.join(self.cleaned_data['weekdays'])
+    
+    def clean_interval(self):
+        interval = self.cleaned_data['interval']
+        if not interval:
+            raise forms.ValidationError("Interval must be at least 1")
+        return interval
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_time = cleaned_data.get('start_time')
+        end_time = cleaned_data.get('end_time')
+        until = cleaned_data.get('until')
+        
+        if start_time and end_time:
+            # A routine may have started earlier today
+            check_task_times(start_time, end_time, allow_past=True)
+        if start_time and until and until < start_time:
+            raise forms.ValidationError("The repeat end must be after the first occurrence")
+        
+        return cleaned_data
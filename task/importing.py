@@ -0,0 +1,259 @@
+import csv
+import io
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from task.cache import invalidate_user
+from task.forms import check_task_times
+from task.models import DEADLINE_TRANSITIONS, DailyTaskStats, Task
+from task.timezones import user_tzinfo
+
+
+FORMATS = ['csv', 'ics']
+CSV_COLUMNS = ['title', 'description', 'start_time', 'end_time', 'status', 'reminder_minutes']
+
+# iCalendar STATUS values (VEVENT and VTODO) mapped to task statuses
+ICS_STATUSES = {
+    'NEEDS-ACTION': 'pending',
+    'TENTATIVE': 'pending',
+    'CONFIRMED': 'pending',
+    'IN-PROCESS': 'in_progress',
+    'COMPLETED': 'completed',
+    'CANCELLED': 'not_done',
+}
+
+TITLE_MAX_LENGTH = Task._meta.get_field('title').max_length
+STATUSES = dict(Task.STATUS_CHOICES)
+
+
+@dataclass
+class ImportResult:
+    """Outcome of an import: counts, timing and per-row errors"""
+    rows: int = 0
+    created: int = 0
+    elapsed: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0
+
+    def add_error(self, row, message):
+        self.errors.append({'row': row, 'error': message})
+
+
+def detect_format(filename):
+    """Import format from a file name, defaulting to CSV"""
+    return 'ics' if filename.lower().endswith(('.ics', '.ical', '.ifb')) else 'csv'
+
+
+def text_lines(file):
+    """Decoded lines of an uploaded (binary) or opened (text) file"""
+    if isinstance(file, io.TextIOBase):
+        return file
+    return io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+
+
+def read_csv(file):
+    """Yield (row number, raw values) for each CSV data row"""
+    reader = csv.DictReader(text_lines(file))
+    missing = {'title', 'start_time', 'end_time'} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"CSV is missing the column(s): {', '.join(sorted(missing))}")
+    for number, row in enumerate(reader, start=2):
+        yield number, row
+
+
+def unfold(lines):
+    """Join iCalendar continuation lines, yielding (line number, content line)"""
+    current = None
+    start = 0
+    for number, line in enumerate(lines, start=1):
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield start, current
+        current, start = line, number
+    if current is not None:
+        yield start, current
+
+
+def unescape(value):
+    return value.replace('\\n', '\n').replace('\\N', '\n').replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\')
+
+
+def parse_ics_datetime(params, value, tzinfo):
+    """Datetime of a DTSTART/DTEND value; floating times use ``tzinfo``"""
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        day = datetime.strptime(value, '%Y%m%d')
+        return day.replace(tzinfo=tzinfo)
+    if value.endswith('Z'):
+        return datetime.strptime(value, '%Y%m%dT%H%M%SZ').replace(tzinfo=ZoneInfo('UTC'))
+    if 'TZID' in params:
+        try:
+            tzinfo = ZoneInfo(params['TZID'])
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone '{params['TZID']}'")
+    return datetime.strptime(value, '%Y%m%dT%H%M%S').replace(tzinfo=tzinfo)
+
+
+def read_ics(file, tzinfo):
+    """Yield (line number, raw values) for each VEVENT or VTODO"""
+    event = None
+    for number, line in unfold(text_lines(file)):
+        if line in ('BEGIN:VEVENT', 'BEGIN:VTODO'):
+            event = {'_row': number}
+            continue
+        if line in ('END:VEVENT', 'END:VTODO') and event is not None:
+            # An all-day event without an end lasts the whole day
+            if event.pop('_all_day', False) and 'end_time' not in event:
+                event['end_time'] = event['start_time'] + timedelta(days=1)
+            yield event.pop('_row'), event
+            event = None
+            continue
+        if event is None or ':' not in line:
+            continue
+
+        name, value = line.split(':', 1)
+        name, *raw_params = name.split(';')
+        params = dict(param.split('=', 1) for param in raw_params if '=' in param)
+        name = name.upper()
+        try:
+            if name == 'SUMMARY':
+                event['title'] = unescape(value)
+            elif name == 'DESCRIPTION':
+                event['description'] = unescape(value)
+            elif name in ('DTSTART', 'DTEND', 'DUE'):
+                key = 'start_time' if name == 'DTSTART' else 'end_time'
+                event[key] = parse_ics_datetime(params, value, tzinfo)
+                if name == 'DTSTART':
+                    event['_all_day'] = params.get('VALUE') == 'DATE' or len(value) == 8
+            elif name == 'STATUS':
+                event['status'] = ICS_STATUSES.get(value.upper(), '')
+        except ValueError as e:
+            event.setdefault('_error', f'{name}: {e}')
+
+
+def parse_time(value, tzinfo, label):
+    if isinstance(value, datetime):
+        return value
+    if not value or not value.strip():
+        raise ValueError(f'A {label} is required')
+    try:
+        parsed = parse_datetime(value.strip())
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f"Invalid {label} '{value}'")
+    if timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=tzinfo)
+    return parsed
+
+
+def build_task(user, values, tzinfo, now):
+    """An unsaved Task from one row's raw values; raises ValueError if invalid"""
+    if values.get('_error'):
+        raise ValueError(values['_error'])
+
+    title = (values.get('title') or '').strip()
+    if not title:
+        raise ValueError('Title is required')
+    if len(title) > TITLE_MAX_LENGTH:
+        raise ValueError(f'Title is longer than {TITLE_MAX_LENGTH} characters')
+
+    start_time = parse_time(values.get('start_time'), tzinfo, 'start time')
+    end_time = parse_time(values.get('end_time'), tzinfo, 'end time')
+    try:
+        # Imports are mostly history, so past start times are accepted
+        check_task_times(start_time, end_time, now=now, allow_past=True)
+    except ValidationError as e:
+        raise ValueError(' '.join(e.messages))
+
+    status = (values.get('status') or 'pending').strip()
+    if status not in STATUSES:
+        raise ValueError(f"Unknown status '{status}'")
+
+    reminder = (values.get('reminder_minutes') or '').strip()
+    if not reminder:
+        reminder = Task._meta.get_field('reminder_minutes').default
+    else:
+        try:
+            reminder = int(reminder)
+        except ValueError:
+            raise ValueError(f"Reminder minutes '{reminder}' is not a whole number")
+
+    task = Task(
+        user=user,
+        title=title,
+        description=(values.get('description') or '').strip(),
+        start_time=start_time,
+        end_time=end_time,
+        status=status,
+        reminder_minutes=reminder,
+    )
+    # bulk_create skips Task.save(), so apply its deadline transition here
+    if end_time < now and status in DEADLINE_TRANSITIONS:
+        task.status = DEADLINE_TRANSITIONS[status]
+        if task.status == 'not_done':
+            task.missed_at = now
+    return task
+
+
+def import_tasks(user, file, file_format='csv', batch_size=None, dry_run=False):
+    """Stream tasks from a CSV or iCalendar file into ``user``'s task list
+
+    Every row is validated on its own; invalid rows are reported and
+    skipped. Valid tasks are inserted with bulk_create in batches of
+    ``batch_size`` inside one transaction, and the touched rollup days are
+    refreshed once at the end.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown format '{file_format}', expected one of {', '.join(FORMATS)}")
+    batch_size = batch_size or settings.TASK_IMPORT_BATCH_SIZE
+    tzinfo = user_tzinfo(user)
+    now = timezone.now()
+    result = ImportResult()
+    started = time.perf_counter()
+
+    rows = read_csv(file) if file_format == 'csv' else read_ics(file, tzinfo)
+    start_times = []
+    batch = []
+    with transaction.atomic():
+        for number, values in rows:
+            result.rows += 1
+            try:
+                task = build_task(user, values, tzinfo, now)
+            except ValueError as e:
+                result.add_error(number, str(e))
+                continue
+
+            batch.append(task)
+            if len(batch) >= batch_size:
+                result.created += insert(batch, start_times, dry_run)
+                batch = []
+        if batch:
+            result.created += insert(batch, start_times, dry_run)
+
+        if start_times:
+            DailyTaskStats.objects.refresh_for_tasks(start_times)
+            invalidate_user(user.pk)
+
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def insert(batch, start_times, dry_run):
+    if not dry_run:
+        Task.objects.bulk_create(batch)
+        start_times.extend((task.user_id, task.start_time) for task in batch)
+    return len(batch)
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from task.cache import invalidate_user
+from task.seeding import remove_seeded, seed_reasons, seed_tasks, seed_users
+from task.stats import percentile
+
+
+BENCHMARK_EMAIL = 'async-benchmark-{}@example.invalid'
+# The requests the analytics page sends at the same time
+VIEWS = ['get_tasks_json', 'productivity_metrics']
+
+
+class Command(BaseCommand):
+    """Compare JSON API throughput through the ASGI and WSGI request paths
+
+    Both paths run in this process: the ASGI one issues concurrent requests
+    from one event loop through AsyncClient, the way a single uvicorn worker
+    would interleave them; the WSGI one sends the same load from a pool of
+    threads through Client, one thread per in-flight request.
+    """
+
+    help = 'Benchmark the async JSON API views under concurrent load, ASGI vs WSGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=2000, help='Tasks seeded for the benchmark user')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per path and concurrency level')
+        parser.add_argument(
+            '--concurrency',
+            default='1,4,16',
+            help='Comma separated numbers of requests in flight at once',
+        )
+        parser.add_argument(
+            '--warm-cache',
+            action='store_true',
+            help='Keep cached productivity metrics between requests',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError(f"Invalid --concurrency '{options['concurrency']}', expected e.g. 1,4,16")
+        self.total = max(options['requests'], 1)
+        self.warm_cache = options['warm_cache']
+        self.urls = [reverse(name) for name in VIEWS]
+
+        reasons, created_reasons = seed_reasons()
+        users = seed_users(1, BENCHMARK_EMAIL)
+        try:
+            seed_tasks(users, options['tasks'], reasons=reasons)
+            self.user = users[0]
+            for level in levels:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{level} concurrent requests'))
+                self.print_result('ASGI', asyncio.run(self.run_asgi(level)))
+                self.print_result('WSGI', self.run_wsgi(level))
+        finally:
+            remove_seeded(users, created_reasons)
+
+    def url(self, number):
+        if not self.warm_cache:
+            invalidate_user(self.user.pk)
+        return self.urls[number % len(self.urls)]
+
+    async def run_asgi(self, level):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        semaphore = asyncio.Semaphore(level)
+
+        async def fetch(number):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(self.url(number))
+                return self.timing(response, started)
+
+        started = time.perf_counter()
+        timings = await asyncio.gather(*(fetch(number) for number in range(self.total)))
+        return self.summary(timings, time.perf_counter() - started)
+
+    def run_wsgi(self, level):
+        local = threading.local()
+
+        def fetch(number):
+            # One client (and session cookie) per thread
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.force_login(self.user)
+            started = time.perf_counter()
+            response = local.client.get(self.url(number))
+            return self.timing(response, started)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            timings = list(pool.map(fetch, range(self.total)))
+        return self.summary(timings, time.perf_counter() - started)
+
+    def timing(self, response, started):
+        if response.status_code != 200:
+            raise CommandError(f'{response.request["PATH_INFO"]} returned {response.status_code}')
+        return (time.perf_counter() - started) * 1000
+
+    def summary(self, timings, elapsed):
+        timings = sorted(timings)
+        return {
+            'requests_per_second': len(timings) / elapsed if elapsed > 0 else 0,
+            'p50_ms': percentile(timings, 0.5),
+            'p90_ms': percentile(timings, 0.9),
+        }
+
+    def print_result(self, name, result):
+        self.stdout.write(
+            f"  {name:<5} {result['requests_per_second']:>8.1f} req/s  "
+            f"p50 {result['p50_ms']:>8.1f} ms  p90 {result['p90_ms']:>8.1f} ms"
+        )
@@ -0,0 +1,145 @@
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.utils import timezone
+
+from SelfLog.database import database_settings
+from task.models import MissedTaskReason, Task
+from task.seeding import generate_tasks
+
+
+BENCHMARK_ALIAS = 'profile_benchmark'
+SQLITE_PROFILES = ['sqlite', 'sqlite-tuned']
+
+
+class Command(BaseCommand):
+    """Compare concurrent read/write throughput of the SQLite database profiles"""
+
+    help = 'Run concurrent readers and writers against each database profile and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles',
+            default=','.join(SQLITE_PROFILES),
+            help='Comma separated profiles to compare',
+        )
+        parser.add_argument('--tasks', type=int, default=20000, help='Tasks seeded per profile')
+        parser.add_argument('--readers', type=int, default=8, help='Concurrent reader threads')
+        parser.add_argument('--writers', type=int, default=2, help='Concurrent writer threads')
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds to run each profile')
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'].split(',')
+        for profile in profiles:
+            if profile not in SQLITE_PROFILES:
+                # Benchmarking PostgreSQL would create and drop tables in the
+                # configured database, which may be a real one
+                raise CommandError(f"Unsupported profile '{profile}', expected one of {', '.join(SQLITE_PROFILES)}")
+
+        results = {}
+        for profile in profiles:
+            with tempfile.TemporaryDirectory() as directory:
+                self.stdout.write(f'Benchmarking {profile}...')
+                self.setup(profile, Path(directory), options['tasks'])
+                try:
+                    results[profile] = self.run(options['readers'], options['writers'], options['duration'])
+                finally:
+                    self.teardown()
+
+        for profile, result in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(profile))
+            self.stdout.write(
+                f"  reads/s {result['reads_per_second']:>9.1f}  writes/s {result['writes_per_second']:>9.1f}  "
+                f"lock errors {result['lock_errors']}"
+            )
+
+    def setup(self, profile, directory, task_count):
+        """Register a scratch database for ``profile`` and seed it"""
+        settings_dict = database_settings(profile, directory)
+        # configure_settings() fills in the defaults but insists on a default alias
+        connections.settings[BENCHMARK_ALIAS] = connections.configure_settings(
+            {DEFAULT_DB_ALIAS: dict(settings_dict), BENCHMARK_ALIAS: settings_dict}
+        )[BENCHMARK_ALIAS]
+
+        UserModel = get_user_model()
+        with connections[BENCHMARK_ALIAS].schema_editor() as editor:
+            for model in (MissedTaskReason, UserModel, Task):
+                editor.create_model(model)
+
+        users = [UserModel(email=f'profile-benchmark-{number}@example.invalid') for number in range(20)]
+        for user in users:
+            user.set_unusable_password()
+        UserModel.objects.using(BENCHMARK_ALIAS).bulk_create(users)
+        users = list(UserModel.objects.using(BENCHMARK_ALIAS).all())
+        Task.objects.using(BENCHMARK_ALIAS).bulk_create(generate_tasks(users, task_count), batch_size=5000)
+
+        self.user_ids = [user.pk for user in users]
+        self.max_task_id = task_count
+
+    def teardown(self):
+        connections[BENCHMARK_ALIAS].close()
+        del connections[BENCHMARK_ALIAS]
+        del connections.settings[BENCHMARK_ALIAS]
+
+    def run(self, reader_count, writer_count, duration):
+        counts = {'reads': 0, 'writes': 0, 'lock_errors': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def worker(operation, counter, seed):
+            rng = random.Random(seed)
+            done = errors = 0
+            connection = connections[BENCHMARK_ALIAS]
+            try:
+                while time.perf_counter() < deadline:
+                    try:
+                        operation(rng)
+                        done += 1
+                    except OperationalError:
+                        errors += 1
+                    # What the end of a request does: close unless persistent
+                    connection.close_if_unusable_or_obsolete()
+            finally:
+                connection.close()
+                with lock:
+                    counts[counter] += done
+                    counts['lock_errors'] += errors
+
+        threads = [
+            threading.Thread(target=worker, args=(self.read, 'reads', number))
+            for number in range(reader_count)
+        ] + [
+            threading.Thread(target=worker, args=(self.write, 'writes', -number - 1))
+            for number in range(writer_count)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return {
+            'reads_per_second': counts['reads'] / elapsed,
+            'writes_per_second': counts['writes'] / elapsed,
+            'lock_errors': counts['lock_errors'],
+        }
+
+    def read(self, rng):
+        """A task_list page for a random user"""
+        tasks = Task.objects.using(BENCHMARK_ALIAS).filter(user_id=rng.choice(self.user_ids))
+        list(tasks.order_by('start_time', 'pk').values('id', 'title', 'start_time', 'end_time', 'status')[:50])
+
+    def write(self, rng):
+        """A status change, as update_task_status does"""
+        with transaction.atomic(using=BENCHMARK_ALIAS):
+            Task.objects.using(BENCHMARK_ALIAS).filter(pk=rng.randint(1, self.max_task_id)).update(
+                status=rng.choice(['pending', 'in_progress', 'completed']),
+                updated_at=timezone.now(),
+            )
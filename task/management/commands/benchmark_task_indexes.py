@@ -0,0 +1,167 @@
+import json
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+from django.utils import timezone
+
+from SelfLog.database import database_settings
+from task.models import MissedTaskReason, RecurringTask, Task
+from task.seeding import generate_tasks
+
+
+BENCHMARK_ALIAS = 'index_benchmark'
+BENCHMARK_EMAIL = 'index-benchmark-{}@example.invalid'
+
+
+class Command(BaseCommand):
+    """Measure the Task indexes against a large synthetic data set
+
+    Everything happens in a scratch SQLite database in a temporary
+    directory: dropping the indexes of the configured database would lock
+    its task table and leave it unindexed if the run were interrupted.
+    """
+
+    help = 'Seed synthetic tasks and record EXPLAIN plans and timings with and without the Task indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1_000_000, help='Total number of tasks to seed')
+        parser.add_argument('--users', type=int, default=100, help='Number of users to spread tasks over')
+        parser.add_argument('--batch-size', type=int, default=5000, help='bulk_create batch size')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.connection = self.setup(Path(directory))
+            try:
+                users = self.seed(options['users'], options['tasks'], options['batch_size'])
+                with self.connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+                results = self.compare(users[0])
+            finally:
+                self.teardown()
+
+        self.print_results(results)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def setup(self, directory):
+        """Register a scratch SQLite database with the tables the tasks need"""
+        settings_dict = database_settings('sqlite', directory)
+        # configure_settings() fills in the defaults but insists on a default alias
+        settings_dict = connections.configure_settings(
+            {DEFAULT_DB_ALIAS: dict(settings_dict), BENCHMARK_ALIAS: settings_dict}
+        )[BENCHMARK_ALIAS]
+        # Only this thread's handler knows the alias; it is not in DATABASES
+        connection = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, BENCHMARK_ALIAS)
+        connections[BENCHMARK_ALIAS] = connection
+
+        # Created with the indexes declared on each model
+        with connection.schema_editor() as editor:
+            for model in (MissedTaskReason, get_user_model(), RecurringTask, Task):
+                editor.create_model(model)
+        return connection
+
+    def teardown(self):
+        self.connection.close()
+        del connections[BENCHMARK_ALIAS]
+
+    def seed(self, user_count, task_count, batch_size):
+        """Create benchmark users and a realistic task history for them"""
+        UserModel = get_user_model()
+        users = [UserModel(email=BENCHMARK_EMAIL.format(number)) for number in range(user_count)]
+        for user in users:
+            user.set_unusable_password()
+        UserModel.objects.using(BENCHMARK_ALIAS).bulk_create(users)
+        users = list(UserModel.objects.using(BENCHMARK_ALIAS).order_by('pk'))
+
+        self.stdout.write(f'Seeding {task_count} tasks for {user_count} users...')
+        started = time.perf_counter()
+        # Only the Task table is measured, so no rollups or reasons
+        tasks = generate_tasks(users, task_count)
+        while batch := list(islice(tasks, batch_size)):
+            Task.objects.using(BENCHMARK_ALIAS).bulk_create(batch)
+        self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+        return users
+
+    def view_queries(self, user):
+        """The hot queries issued by each view, keyed by a descriptive name"""
+        now = timezone.now()
+        today = now.date()
+        tasks = Task.objects.using(BENCHMARK_ALIAS).filter(user=user)
+        return {
+            'dashboard.sweep_expired': tasks.filter(end_time__lt=now, status='pending'),
+            'dashboard.today_tasks': tasks.filter(start_time__date=today).order_by('start_time'),
+            'dashboard.upcoming_tasks': tasks.filter(
+                start_time__gte=now, start_time__lt=now + timedelta(days=7)
+            ).exclude(status__in=['completed', 'not_done']).order_by('start_time')[:5],
+            'task_list.status_filter': tasks.filter(status='completed').order_by('start_time'),
+            'analytics.date_range': tasks.filter(
+                start_time__gte=now - timedelta(days=90), start_time__lt=now
+            ),
+            'scheduler.upcoming_deadlines': Task.objects.using(BENCHMARK_ALIAS).filter(
+                status__in=['pending', 'in_progress']
+            ).order_by('end_time', 'pk')[:1000],
+        }
+
+    def measure(self, user):
+        results = {}
+        for name, queryset in self.view_queries(user).items():
+            timings = []
+            for _ in range(self.repeat):
+                started = time.perf_counter()
+                list(queryset.values_list('pk', flat=True))
+                timings.append((time.perf_counter() - started) * 1000)
+
+            results[name] = {
+                'plan': queryset.explain(),
+                'median_ms': round(statistics.median(timings), 3),
+                'max_ms': round(max(timings), 3),
+            }
+        return results
+
+    def compare(self, user):
+        """Run every query without and then with the indexes declared on Task"""
+        indexes = Task._meta.indexes
+
+        with self.connection.schema_editor() as editor:
+            for index in indexes:
+                editor.remove_index(Task, index)
+        before = self.measure(user)
+
+        with self.connection.schema_editor() as editor:
+            for index in indexes:
+                editor.add_index(Task, index)
+        after = self.measure(user)
+
+        return {
+            name: {'without_indexes': before[name], 'with_indexes': after[name]}
+            for name in before
+        }
+
+    def print_results(self, results):
+        for name, result in results.items():
+            before = result['without_indexes']
+            after = result['with_indexes']
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f"  without indexes: {before['median_ms']:.3f} ms (max {before['max_ms']:.3f} ms)")
+            self.write_plan(before['plan'])
+            self.stdout.write(f"  with indexes:    {after['median_ms']:.3f} ms (max {after['max_ms']:.3f} ms)")
+            self.write_plan(after['plan'])
+
+    def write_plan(self, plan):
+        for line in plan.splitlines():
+            self.stdout.write(f'    {line}')
@@ -0,0 +1,176 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from task.cache import invalidate_user
+from task.seeding import remove_seeded, seed_reasons, seed_tasks, seed_users
+from task.stats import percentile
+
+
+BENCHMARK_EMAIL = 'view-benchmark-{size}-{{}}@example.invalid'
+VIEWS = [
+    'dashboard',
+    'task_list',
+    'analytics',
+    'get_tasks_json',
+    'productivity_metrics',
+    'missed_tasks_analysis',
+]
+
+
+class Command(BaseCommand):
+    """Benchmark the task views through the test client at several data sizes"""
+
+    help = 'Measure latency percentiles and query counts of the task views and compare them to a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='100,1000,10000',
+            help='Comma separated numbers of tasks for the benchmark user',
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per view and size')
+        parser.add_argument(
+            '--baseline',
+            default=os.path.join(settings.BASE_DIR, 'benchmarks', 'task_views.json'),
+            help='Baseline file to compare against (and to write with --save-baseline)',
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Store these results as the new baseline instead of comparing',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.5,
+            help='Allowed relative p50 latency increase over the baseline (0.5 = 50%%)',
+        )
+        parser.add_argument(
+            '--warm-cache',
+            action='store_true',
+            help='Keep cached analytics between requests instead of measuring cold requests',
+        )
+        parser.add_argument('--output', help='Also write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError(f"Invalid --sizes '{options['sizes']}', expected e.g. 100,1000")
+        self.repeat = max(options['repeat'], 1)
+        self.warm_cache = options['warm_cache']
+
+        results = {}
+        for size in sizes:
+            results[str(size)] = self.benchmark_size(size)
+        self.print_results(results)
+
+        if options['output']:
+            self.write_json(options['output'], results)
+
+        baseline_path = options['baseline']
+        if options['save_baseline']:
+            self.write_json(baseline_path, results)
+            return
+        if not os.path.exists(baseline_path):
+            self.stdout.write(f'No baseline at {baseline_path}; run with --save-baseline to create one.')
+            return
+
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = self.compare(baseline, results, options['tolerance'])
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(regression)
+            raise CommandError(f'{len(regressions)} regression(s) against {baseline_path}')
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def benchmark_size(self, size):
+        """Seed one user with ``size`` tasks and time every view for them"""
+        reasons, created_reasons = seed_reasons()
+        users = seed_users(1, BENCHMARK_EMAIL.format(size=size))
+        try:
+            seed_tasks(users, size, reasons=reasons)
+            client = Client()
+            client.force_login(users[0])
+            try:
+                return {name: self.measure(client, users[0], name) for name in VIEWS}
+            finally:
+                client.logout()
+        finally:
+            remove_seeded(users, created_reasons)
+
+    def measure(self, client, user, name):
+        url = reverse(name)
+        # The first request also applies any pending deadline transitions
+        self.get(client, url)
+
+        timings = []
+        query_counts = []
+        for _ in range(self.repeat):
+            if not self.warm_cache:
+                invalidate_user(user.pk)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                self.get(client, url)
+                timings.append((time.perf_counter() - started) * 1000)
+            query_counts.append(len(queries))
+
+        timings.sort()
+        return {
+            'p50_ms': round(percentile(timings, 0.5), 3),
+            'p90_ms': round(percentile(timings, 0.9), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'queries': max(query_counts),
+        }
+
+    def get(self, client, url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url} returned {response.status_code}')
+        return response
+
+    def compare(self, baseline, results, tolerance):
+        """Describe every view that got slower or issues more queries"""
+        regressions = []
+        for size, views in results.items():
+            for name, result in views.items():
+                expected = baseline.get(size, {}).get(name)
+                if expected is None:
+                    continue
+                if result['queries'] > expected['queries']:
+                    regressions.append(
+                        f"{name} @ {size} tasks: {result['queries']} queries (baseline {expected['queries']})"
+                    )
+                # Ignore sub-millisecond noise on very fast views
+                allowed = max(expected['p50_ms'] * (1 + tolerance), expected['p50_ms'] + 1)
+                if result['p50_ms'] > allowed:
+                    regressions.append(
+                        f"{name} @ {size} tasks: p50 {result['p50_ms']:.1f} ms (baseline {expected['p50_ms']:.1f} ms)"
+                    )
+        return regressions
+
+    def print_results(self, results):
+        for size, views in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{size} tasks'))
+            for name, result in views.items():
+                self.stdout.write(
+                    f"  {name:<24} p50 {result['p50_ms']:>8.1f} ms  p90 {result['p90_ms']:>8.1f} ms  "
+                    f"p99 {result['p99_ms']:>8.1f} ms  {result['queries']:>3} queries"
+                )
+
+    def write_json(self, path, results):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as output:
+            json.dump(results, output, indent=2)
+        self.stdout.write(f'Results written to {path}')
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from task.importing import FORMATS, detect_format, import_tasks
+
+
+class Command(BaseCommand):
+    """Import a user's tasks from a CSV or iCalendar file"""
+
+    help = 'Bulk import tasks for a user from a CSV or .ics file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or iCalendar file to import')
+        parser.add_argument('--user', required=True, help='Owner of the imported tasks (id or email)')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format (default: guessed from the file extension)',
+        )
+        parser.add_argument('--batch-size', type=int, help='Tasks per bulk_create (default: TASK_IMPORT_BATCH_SIZE)')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate every row without saving anything',
+        )
+
+    def handle(self, *args, **options):
+        UserModel = get_user_model()
+        identifier = options['user']
+        lookup = {'pk': identifier} if identifier.isdigit() else {'email': identifier}
+        try:
+            user = UserModel.objects.get(**lookup)
+        except UserModel.DoesNotExist:
+            raise CommandError(f"User '{identifier}' does not exist")
+
+        file_format = options['format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as file:
+                result = import_tasks(
+                    user, file, file_format,
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            raise CommandError(f"Could not import '{options['path']}': {e}")
+
+        for error in result.errors:
+            self.stderr.write(f"Row {error['row']}: {error['error']}")
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.created} of {result.rows} rows in {result.elapsed:.2f}s '
+            f'({result.rows_per_second:.0f} rows/s), {len(result.errors)} errors.'
+        ))
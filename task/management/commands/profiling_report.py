@@ -0,0 +1,102 @@
+import json
+import os
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from SelfLog.profiling import read_profile_log
+from task.stats import percentile
+
+
+METRICS = ['time', 'db_time', 'queries']
+PERCENTILES = [50, 90, 99]
+
+
+def summarise(records):
+    """Per URL name request counts and metric percentiles"""
+    samples = defaultdict(lambda: defaultdict(list))
+    duplicates = defaultdict(int)
+    counters = defaultdict(Counter)
+    for record in records:
+        for metric in METRICS:
+            samples[record['url_name']][metric].append(record[metric])
+        duplicates[record['url_name']] += record['duplicates']
+        # Records written before counters were added have none
+        counters[record['url_name']].update(record.get('counters', {}))
+
+    summary = {}
+    for url_name, metrics in sorted(samples.items()):
+        entry = {
+            'requests': len(metrics['time']),
+            'duplicate_queries': duplicates[url_name],
+            'counters': dict(sorted(counters[url_name].items())),
+        }
+        for metric, values in metrics.items():
+            values.sort()
+            for value in PERCENTILES:
+                entry[f'{metric}_p{value}'] = round(percentile(values, value / 100), 3)
+        summary[url_name] = entry
+    return summary
+
+
+class Command(BaseCommand):
+    """Summarise the request profiling log written by ProfilingMiddleware
+
+    Also totals the counters requests recorded (user cache hits, throttled
+    logins, ...) across every URL and worker process.
+    """
+
+    help = 'Print per-URL latency and query percentiles from the profiling log'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log',
+            default=settings.PROFILING_LOG,
+            help='Profiling log to read (default: PROFILING_LOG)',
+        )
+        parser.add_argument(
+            '--json',
+            dest='json_output',
+            help='Also write the summary to this JSON file',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Empty the log after reporting',
+        )
+
+    def handle(self, *args, **options):
+        log_path = options['log']
+        if not os.path.exists(log_path):
+            raise CommandError(f"No profiling log at '{log_path}'; is PROFILING_ENABLED set?")
+
+        summary = summarise(read_profile_log(log_path))
+
+        header = f"{'URL name':<32} {'reqs':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} " \
+                 f"{'db p50':>9} {'q p50':>6} {'q p99':>6} {'dups':>6}"
+        self.stdout.write(header)
+        for url_name, entry in summary.items():
+            self.stdout.write(
+                f"{url_name:<32} {entry['requests']:>6} {entry['time_p50']:>9.1f} "
+                f"{entry['time_p90']:>9.1f} {entry['time_p99']:>9.1f} {entry['db_time_p50']:>9.1f} "
+                f"{entry['queries_p50']:>6.0f} {entry['queries_p99']:>6.0f} {entry['duplicate_queries']:>6}"
+            )
+
+        totals = Counter()
+        for entry in summary.values():
+            totals.update(entry['counters'])
+        if totals:
+            self.stdout.write('')
+            self.stdout.write(f"{'Counter':<32} {'total':>8}")
+            for name, total in sorted(totals.items()):
+                self.stdout.write(f'{name:<32} {total:>8}')
+
+        if options['json_output']:
+            with open(options['json_output'], 'w', encoding='utf-8') as output:
+                json.dump(summary, output, indent=2)
+            self.stdout.write(f"Summary written to {options['json_output']}")
+
+        if options['reset']:
+            open(log_path, 'w').close()
+            self.stdout.write('Profiling log cleared.')
@@ -0,0 +1,68 @@
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from task.cache import invalidate_all
+from task.models import DailyTaskStats, Task
+
+
+class Command(BaseCommand):
+    """Recompute the DailyTaskStats rollups from the Task table"""
+
+    help = 'Rebuild the per-day task statistics rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='users',
+            help='Only rebuild this user (id or email); may be given more than once',
+        )
+        parser.add_argument(
+            '--since',
+            help='Only rebuild days from this date (YYYY-MM-DD) onwards',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError(f"Invalid --since date '{options['since']}', expected YYYY-MM-DD")
+
+        users = self.get_users(options['users'])
+
+        started = time.monotonic()
+        user_count = row_count = 0
+        for user in users.iterator():
+            with transaction.atomic():
+                row_count += DailyTaskStats.objects.rebuild(user, since=since)
+            user_count += 1
+
+        invalidate_all()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {row_count} daily rollups for {user_count} users in {elapsed:.2f}s.'
+        ))
+
+    def get_users(self, identifiers):
+        UserModel = get_user_model()
+        if not identifiers:
+            # Users without tasks only need stale rows removed
+            with_rollups = DailyTaskStats.objects.values('user')
+            with_tasks = Task.objects.values('user')
+            return UserModel.objects.filter(pk__in=with_tasks) | UserModel.objects.filter(pk__in=with_rollups)
+
+        pks = []
+        for identifier in identifiers:
+            lookup = {'pk': identifier} if identifier.isdigit() else {'email': identifier}
+            try:
+                pks.append(UserModel.objects.get(**lookup).pk)
+            except UserModel.DoesNotExist:
+                raise CommandError(f"User '{identifier}' does not exist")
+        return UserModel.objects.filter(pk__in=pks)
@@ -0,0 +1,151 @@
+import heapq
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from task.models import Task
+
+
+OPEN_STATUSES = ['pending', 'in_progress']
+
+
+class Command(BaseCommand):
+    """Apply deadline status transitions in the background instead of per request"""
+
+    help = 'Run the deadline scheduler that marks expired tasks as not done / completed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Sweep every expired task once and exit (for cron)',
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=1000,
+            help='Number of upcoming deadlines loaded into memory per page',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Maximum number of tasks transitioned per UPDATE',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=30.0,
+            help='Seconds between checks of the change feed for new or edited tasks',
+        )
+
+    def handle(self, *args, **options):
+        self.page_size = options['page_size']
+        self.batch_size = options['batch_size']
+        self.poll_interval = options['poll_interval']
+
+        self.transitions = 0
+        started = time.monotonic()
+
+        try:
+            self.sweep_backlog()
+            if not options['once']:
+                self.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping deadline scheduler...')
+        finally:
+            self.report(time.monotonic() - started)
+
+    def apply(self, task_ids, now):
+        """Transition a batch of task ids and keep the running total"""
+        counts = Task.objects.filter(pk__in=task_ids).sweep_expired(now=now)
+        self.transitions += sum(counts.values())
+        return counts
+
+    def sweep_backlog(self):
+        """Transition all tasks that are already past their deadline, in batches"""
+        now = timezone.now()
+        while True:
+            task_ids = list(
+                Task.objects.filter(end_time__lt=now, status__in=OPEN_STATUSES)
+                .order_by()
+                .values_list('pk', flat=True)[:self.batch_size]
+            )
+            if not task_ids:
+                break
+            self.apply(task_ids, now)
+
+    def load_page(self, heap, after):
+        """Push the next page of upcoming deadlines onto the heap
+
+        Pages are keyed on (end_time, pk). Returns the last entry loaded,
+        which becomes the new horizon, or None when there are no further
+        open tasks.
+        """
+        upcoming = Task.objects.filter(status__in=OPEN_STATUSES).order_by('end_time', 'pk')
+        if after is not None:
+            end_time, pk = after
+            upcoming = upcoming.filter(Q(end_time__gt=end_time) | Q(end_time=end_time, pk__gt=pk))
+
+        page = list(upcoming.values_list('end_time', 'pk')[:self.page_size])
+        for entry in page:
+            heapq.heappush(heap, entry)
+
+        return page[-1] if page else None
+
+    def poll_changes(self, heap, since, horizon):
+        """Pick up tasks created or edited since the last poll"""
+        changed = Task.objects.filter(updated_at__gte=since, status__in=OPEN_STATUSES)
+        if horizon is not None:
+            # Later deadlines are picked up when paging reaches them
+            changed = changed.filter(end_time__lte=horizon[0])
+
+        for entry in changed.order_by().values_list('end_time', 'pk'):
+            heapq.heappush(heap, entry)
+
+    def run_forever(self):
+        heap = []
+        # Taken before the first page loads, so edits made while it loads are polled later
+        last_poll = timezone.now()
+        horizon = self.load_page(heap, None)
+
+        self.stdout.write(f'Deadline scheduler started with {len(heap)} upcoming deadlines.')
+
+        while True:
+            now = timezone.now()
+
+            # Apply every deadline that has passed
+            due = []
+            while heap and heap[0][0] < now:
+                due.append(heapq.heappop(heap)[1])
+                if len(due) >= self.batch_size:
+                    self.apply(due, now)
+                    due = []
+            if due:
+                self.apply(due, now)
+
+            if (now - last_poll).total_seconds() >= self.poll_interval:
+                self.poll_changes(heap, last_poll, horizon)
+                last_poll = now
+
+            if not heap:
+                horizon = self.load_page(heap, horizon)
+                if not heap:
+                    # Nothing scheduled; anything new arrives via the change feed
+                    horizon = None
+
+            # Sleep until the next deadline, but wake up for the change feed
+            sleep_for = self.poll_interval
+            if heap:
+                until_next = (heap[0][0] - timezone.now()).total_seconds()
+                sleep_for = min(sleep_for, max(until_next, 0))
+            time.sleep(sleep_for)
+
+    def report(self, elapsed):
+        rate = self.transitions / elapsed if elapsed > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Applied {self.transitions} transitions in {elapsed:.2f}s '
+            f'({rate:.1f} transitions/second).'
+        ))
@@ -0,0 +1,135 @@
+import heapq
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from task.models import Task
+from task.reminders import ReminderResult, send_reminders, upcoming_reminders
+
+
+class Command(BaseCommand):
+    """Email task reminders as they fall due, reminder_minutes before each deadline"""
+
+    help = 'Run the reminder worker that emails users before their task deadlines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send every reminder that is already due once and exit (for cron)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.TASK_REMINDER_WORKERS,
+            help='Threads sending emails at once',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Tasks handled per dispatch round; a user\'s due tasks are never split across rounds',
+        )
+        parser.add_argument(
+            '--lookahead',
+            type=int,
+            default=settings.TASK_REMINDER_LOOKAHEAD_MINUTES,
+            help='Minutes of upcoming reminders kept in the queue',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=30.0,
+            help='Seconds between checks of the change feed for new or edited tasks',
+        )
+
+    def handle(self, *args, **options):
+        self.workers = options['workers']
+        self.batch_size = options['batch_size']
+        self.lookahead = timedelta(minutes=options['lookahead'])
+        self.poll_interval = options['poll_interval']
+
+        self.result = ReminderResult()
+        started = time.monotonic()
+
+        try:
+            if options['once']:
+                now = timezone.now()
+                self.send(upcoming_reminders(now, now), now)
+            else:
+                self.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping reminder worker...')
+        finally:
+            self.report(time.monotonic() - started)
+
+    def send(self, entries, now):
+        """Dispatch the reminders of (due time, task id, user id) entries and keep the running totals
+
+        Batches are made of whole users, so each user still gets a single
+        email per round; a batch may go over batch_size to keep a user whole.
+        """
+        by_user = defaultdict(list)
+        for due_at, pk, user_id in entries:
+            by_user[user_id].append(pk)
+
+        batch = []
+        for task_ids in by_user.values():
+            batch.extend(task_ids)
+            if len(batch) >= self.batch_size:
+                self.result.add(send_reminders(batch, now, self.workers))
+                batch = []
+        if batch:
+            self.result.add(send_reminders(batch, now, self.workers))
+
+    def schedule(self, heap, scheduled, entries):
+        for entry in entries:
+            if entry not in scheduled:
+                scheduled.add(entry)
+                heapq.heappush(heap, entry)
+
+    def run_forever(self):
+        # (due time, task id, user id) ordered by due time; the set keeps entries unique
+        heap = []
+        scheduled = set()
+        horizon = None
+        last_poll = timezone.now()
+
+        while True:
+            now = timezone.now()
+
+            if horizon is None or now >= horizon:
+                # Also picks up reminders that are overdue or failed earlier
+                horizon = now + self.lookahead
+                self.schedule(heap, scheduled, upcoming_reminders(now, horizon))
+                self.stdout.write(f'Reminder worker has {len(heap)} reminders queued until {horizon:%H:%M}.')
+
+            if (now - last_poll).total_seconds() >= self.poll_interval:
+                changed = Task.objects.filter(updated_at__gte=last_poll)
+                self.schedule(heap, scheduled, upcoming_reminders(now, horizon, changed))
+                last_poll = now
+
+            due = []
+            while heap and heap[0][0] <= now:
+                entry = heapq.heappop(heap)
+                scheduled.discard(entry)
+                due.append(entry)
+            if due:
+                self.send(due, now)
+
+            # Sleep until the next reminder, but wake up for the change feed and window
+            sleep_for = min(self.poll_interval, (horizon - timezone.now()).total_seconds())
+            if heap:
+                sleep_for = min(sleep_for, (heap[0][0] - timezone.now()).total_seconds())
+            time.sleep(max(sleep_for, 0))
+
+    def report(self, elapsed):
+        rate = self.result.tasks / elapsed if elapsed > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {self.result.emails} reminder emails covering {self.result.tasks} tasks in {elapsed:.2f}s '
+            f'({rate:.1f} reminders/second), {self.result.skipped} skipped, {self.result.failed} failed.'
+        ))
@@ -0,0 +1,57 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from task.cache import invalidate_all
+from task.seeding import remove_seeded, seed_reasons, seed_tasks, seed_users
+
+
+SEED_EMAIL = 'seed-{}@example.invalid'
+
+
+class Command(BaseCommand):
+    """Generate synthetic users and task histories for load testing"""
+
+    help = 'Seed users with realistic task histories using bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Number of users to create')
+        parser.add_argument('--tasks-per-user', type=int, default=1000, help='Tasks generated per user')
+        parser.add_argument('--batch-size', type=int, default=5000, help='bulk_create batch size')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible data')
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete previously seeded users and their tasks first',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['tasks_per_user'] < 0:
+            raise CommandError('--users must be at least 1 and --tasks-per-user not negative')
+
+        if options['clear']:
+            prefix, suffix = SEED_EMAIL.split('{}')
+            existing = list(get_user_model().objects.filter(
+                email__startswith=prefix, email__endswith=suffix
+            ).only('pk'))
+            remove_seeded(existing)
+            self.stdout.write(f'Removed {len(existing)} seeded users.')
+
+        task_count = options['users'] * options['tasks_per_user']
+        started = time.perf_counter()
+        with transaction.atomic():
+            # The reasons stay, like the seeded users, for the load test to use
+            reasons, _ = seed_reasons()
+            users = seed_users(options['users'], SEED_EMAIL)
+            created = seed_tasks(
+                users, task_count, batch_size=options['batch_size'], seed=options['seed'], reasons=reasons
+            )
+        invalidate_all()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created} tasks for {len(users)} users in {elapsed:.1f}s '
+            f'({created / elapsed if elapsed else 0:.0f} tasks/s).'
+        ))
@@ -1,7 +1,17 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
 from django.db import models
+from django.db.models import Case, CharField, Count, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.utils import timezone
 
+from task.cache import invalidate_user
+from task.stats import task_duration
+from task.timezones import user_tzinfo
+
 class MissedTaskReason(models.Model):
     """Model for predefined reasons why tasks were missed"""
     name = models.CharField(max_length=100, unique=True)
@@ -18,6 +28,110 @@ class MissedTaskReason(models.Model):
         ordering = ['name']
 
 
+# Status a task moves to once its end_time has passed
+DEADLINE_TRANSITIONS = {
+    'pending': 'not_done',
+    'in_progress': 'completed',
+}
+
+
+class TaskQuerySet(models.QuerySet):
+    """QuerySet with set-based helpers for deadline driven status changes"""
+    
+    def with_effective_status(self, now=None):
+        """Annotate ``effective_status``: the status after deadline transitions
+        
+        Reads use this instead of persisting the transition, so listing
+        tasks never writes. The stored status catches up when the tasks are
+        swept (see ``sweep_expired``).
+        """
+        if now is None:
+            now = timezone.now()
+        
+        return self.annotate(effective_status=Case(
+            *[
+                When(status=stored, end_time__lt=now, then=Value(effective))
+                for stored, effective in DEADLINE_TRANSITIONS.items()
+            ],
+            default=F('status'),
+            output_field=CharField(),
+        ))
+    
+    def filter_effective_status(self, statuses, now=None):
+        """Tasks whose effective status is one of ``statuses``
+        
+        Expressed on the stored columns rather than the annotation, so the
+        (user, status, end_time) index can still be used.
+        """
+        if now is None:
+            now = timezone.now()
+        if isinstance(statuses, str):
+            statuses = [statuses]
+        
+        condition = Q(pk__in=[])
+        for status in statuses:
+            if status in DEADLINE_TRANSITIONS:
+                condition |= Q(status=status, end_time__gte=now)
+            else:
+                condition |= Q(status=status)
+            
+            expiring = [stored for stored, effective in DEADLINE_TRANSITIONS.items() if effective == status]
+            if expiring:
+                condition |= Q(status__in=expiring, end_time__lt=now)
+        return self.filter(condition)
+    
+    def sweep_expired(self, user=None, now=None):
+        """Apply deadline transitions in bulk and return per-status counts
+        
+        Pending tasks whose end_time has passed become not_done (stamping
+        missed_at), in-progress ones become completed. Each transition is a
+        single UPDATE statement instead of one save() per task.
+        """
+        if now is None:
+            now = timezone.now()
+        
+        expired = self.filter(end_time__lt=now, status__in=['pending', 'in_progress'])
+        if user is not None:
+            expired = expired.filter(user=user)
+        
+        # The rollup days touched by the transitions; usually there are none,
+        # in which case no UPDATE is issued at all
+        affected = list(expired.order_by().values_list('user_id', 'start_time'))
+        if not affected:
+            return {'not_done': 0, 'completed': 0}
+        
+        not_done = expired.filter(status='pending').update(
+            status='not_done',
+            missed_at=now,
+            updated_at=now,
+        )
+        completed = expired.filter(status='in_progress').update(
+            status='completed',
+            updated_at=now,
+        )
+        
+        # update() sends no signals, so refresh rollups and invalidate
+        # cached analytics here, only for the users whose tasks changed
+        DailyTaskStats.objects.refresh_for_tasks(affected)
+        for user_id in {user_id for user_id, start_time in affected}:
+            invalidate_user(user_id)
+        
+        return {'not_done': not_done, 'completed': completed}
+    
+    def skip_occurrences(self):
+        """Record the recurring occurrences among these tasks as skipped
+        
+        Call before deleting them: expansion only hides an occurrence while
+        it has a Task row or a SkippedOccurrence.
+        """
+        SkippedOccurrence.objects.bulk_create([
+            SkippedOccurrence(recurring_task_id=recurring_task_id, occurrence_start=start)
+            for recurring_task_id, start in self.filter(recurring_task__isnull=False).values_list(
+                'recurring_task_id', 'occurrence_start'
+            )
+        ], ignore_conflicts=True)
+
+
 class Task(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -48,9 +162,22 @@ class Task(models.Model):
     )
     missed_at = models.DateTimeField(null=True, blank=True)
     
+    # Set when the task is a changed occurrence of a recurring task; the
+    # occurrence start stays as scheduled even if the task is moved
+    recurring_task = models.ForeignKey(
+        'RecurringTask',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='exceptions'
+    )
+    occurrence_start = models.DateTimeField(null=True, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TaskQuerySet.as_manager()
+    
     def __str__(self):
         return self.title
     
@@ -70,18 +197,21 @@ class Task(models.Model):
     
     @property
     def task_miss(self):
-        """Check if task should be marked as missed"""
-        if self.end_time < timezone.now() and self.status != 'completed':
-            # Auto-update status if needed
-            if self.status == 'pending':
-                self.status = 'not_done'
-                self.missed_at = timezone.now()
-                self.save()
-            elif self.status == 'in_progress':
-                self.status = 'completed'
-                self.save()
-            return True
-        return False
+        """Check if task's deadline has passed without it being completed"""
+        return self.end_time < timezone.now() and self.status != 'completed'
+    
+    def get_effective_status(self, now=None):
+        """Status after deadline transitions, without saving anything"""
+        if now is None and hasattr(self, 'effective_status'):
+            return self.effective_status
+        if now is None:
+            now = timezone.now()
+        if self.end_time < now:
+            return DEADLINE_TRANSITIONS.get(self.status, self.status)
+        return self.status
+    
+    def get_effective_status_display(self):
+        return dict(self.STATUS_CHOICES).get(self.get_effective_status(), self.status)
     
     @property
     def is_overdue(self):
@@ -117,6 +247,16 @@ class Task(models.Model):
             return self.missed_reason.name
         return "No reason provided"
     
+    @property
+    def is_occurrence(self):
+        """True for a not yet saved occurrence of a recurring task"""
+        return self.pk is None and self.recurring_task_id is not None
+    
+    @property
+    def occurrence_timestamp(self):
+        """Occurrence start as a Unix timestamp, for occurrence URLs"""
+        return int(self.occurrence_start.timestamp())
+    
     def mark_as_not_done(self, reason=None, custom_reason=""):
         """Mark task as not done with optional reason"""
         self.status = 'not_done'
@@ -130,4 +270,282 @@ class Task(models.Model):
         self.save()
     
     class Meta:
-        ordering = ['start_time']
\ No newline at end of file
+        ordering = ['start_time']
+        indexes = [
+            # Status filters and the deadline sweep for a single user
+            models.Index(fields=['user', 'status', 'end_time'], name='task_user_status_end_idx'),
+            # Date range filters and the default ordering for a single user
+            models.Index(fields=['user', 'start_time'], name='task_user_start_idx'),
+            # Upcoming deadlines across all users for the deadline scheduler
+            models.Index(
+                fields=['end_time'],
+                condition=models.Q(status__in=['pending', 'in_progress']),
+                name='task_open_end_time_idx',
+            ),
+        ]
+        constraints = [
+            # One concrete task per occurrence of a recurring task
+            models.UniqueConstraint(
+                fields=['recurring_task', 'occurrence_start'],
+                condition=models.Q(recurring_task__isnull=False),
+                name='unique_task_occurrence',
+            ),
+        ]
+
+
+class TaskReminder(models.Model):
+    """A reminder delivered for a task, recorded so it is never sent twice
+    
+    ``due_at`` is part of the key: moving a task's deadline or reminder lead
+    gives it a new reminder.
+    """
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+    ]
+    
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='reminders')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default='email')
+    due_at = models.DateTimeField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.task} - {self.channel} at {self.due_at}"
+    
+    class Meta:
+        ordering = ['-sent_at']
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'channel', 'due_at'], name='unique_task_reminder'),
+        ]
+
+
+class RecurringTask(models.Model):
+    """A task that repeats on a schedule, in the spirit of an iCalendar RRULE
+    
+    Occurrences are not stored. They are expanded for the dates being shown
+    and only become Task rows once one of them is changed.
+    """
+    FREQUENCY_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    ]
+    WEEKDAY_CHOICES = [
+        ('0', 'Mon'), ('1', 'Tue'), ('2', 'Wed'), ('3', 'Thu'),
+        ('4', 'Fri'), ('5', 'Sat'), ('6', 'Sun'),
+    ]
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='recurring_tasks'
+    )
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    
+    # The first occurrence; later ones keep its wall-clock time in the
+    # user's timezone
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='daily')
+    interval = models.PositiveSmallIntegerField(default=1, help_text="Repeat every N days, weeks or months")
+    # Comma separated weekdays (0 = Monday) for weekly rules
+    weekdays = models.CharField(max_length=13, blank=True)
+    until = models.DateTimeField(null=True, blank=True, help_text="No occurrences start after this")
+    count = models.PositiveIntegerField(null=True, blank=True, help_text="Stop after this many occurrences")
+    reminder_minutes = models.IntegerField(default=10)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return self.title
+    
+    @property
+    def duration(self):
+        return self.end_time - self.start_time
+    
+    @property
+    def weekday_list(self):
+        return sorted(int(day) for day in self.weekdays.split(',') if day != '')
+    
+    def get_weekdays_display(self):
+        names = dict(self.WEEKDAY_CHOICES)
+        return ', '.join(names[str(day)] for day in self.weekday_list)
+    
+    def occurrence(self, start):
+        """An unsaved Task standing for the occurrence starting at ``start``"""
+        return Task(
+            user_id=self.user_id,
+            title=self.title,
+            description=self.description,
+            start_time=start,
+            end_time=start + self.duration,
+            reminder_minutes=self.reminder_minutes,
+            recurring_task=self,
+            occurrence_start=start,
+        )
+    
+    def materialize(self, start):
+        """The Task row of the occurrence at ``start``, created on first use"""
+        task = Task.objects.filter(recurring_task=self, occurrence_start=start).first()
+        if task is None:
+            task = self.occurrence(start)
+            task.save()
+        return task
+    
+    class Meta:
+        ordering = ['start_time']
+
+
+class SkippedOccurrence(models.Model):
+    """An occurrence of a recurring task that was deleted and must not be expanded again"""
+    
+    recurring_task = models.ForeignKey(
+        RecurringTask,
+        on_delete=models.CASCADE,
+        related_name='skipped_occurrences'
+    )
+    occurrence_start = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.recurring_task.title} skipped at {self.occurrence_start}"
+    
+    class Meta:
+        ordering = ['occurrence_start']
+        constraints = [
+            models.UniqueConstraint(fields=['recurring_task', 'occurrence_start'], name='unique_skipped_occurrence'),
+        ]
+
+
+class DailyTaskStatsQuerySet(models.QuerySet):
+    """Maintenance helpers for the per-day task rollups"""
+    
+    COUNTER_FIELDS = [
+        'total', 'pending', 'in_progress', 'completed', 'not_done',
+        'missed_with_reasons', 'missed_with_custom_reasons', 'missed_without_reasons',
+        'completed_duration',
+    ]
+    
+    def aggregate_tasks(self, tasks, tzinfo):
+        """Per-day counters for ``tasks``, grouped by start date in ``tzinfo``"""
+        not_done = Q(status='not_done')
+        has_reason = Q(missed_reason__isnull=False)
+        has_custom_reason = ~Q(custom_missed_reason='')
+        
+        return tasks.annotate(
+            day=TruncDate('start_time', tzinfo=tzinfo)
+        ).values('day').annotate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(status='pending')),
+            in_progress=Count('id', filter=Q(status='in_progress')),
+            completed=Count('id', filter=Q(status='completed')),
+            not_done=Count('id', filter=not_done),
+            missed_with_reasons=Count('id', filter=not_done & has_reason),
+            missed_with_custom_reasons=Count('id', filter=not_done & has_custom_reason),
+            missed_without_reasons=Count('id', filter=not_done & ~has_reason & ~has_custom_reason),
+            completed_duration=Sum(task_duration(), filter=Q(status='completed')),
+        ).order_by('day')
+    
+    def build_rows(self, user_id, aggregated):
+        rows = []
+        for values in aggregated:
+            values = dict(values)
+            day = values.pop('day')
+            values['completed_duration'] = values['completed_duration'] or timedelta(0)
+            rows.append(self.model(user_id=user_id, date=day, **values))
+        return rows
+    
+    def refresh(self, user_id, dates, tzinfo):
+        """Recompute the rollups of one user for the given dates"""
+        dates = set(dates)
+        if not dates:
+            return
+        
+        tasks = Task.objects.filter(
+            user_id=user_id,
+            start_time__gte=datetime.combine(min(dates), time.min, tzinfo=tzinfo),
+            start_time__lt=datetime.combine(max(dates) + timedelta(days=1), time.min, tzinfo=tzinfo),
+        )
+        rows = [
+            row for row in self.build_rows(user_id, self.aggregate_tasks(tasks, tzinfo))
+            if row.date in dates
+        ]
+        
+        self.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user', 'date'],
+            update_fields=self.COUNTER_FIELDS,
+        )
+        
+        # Days left without any task do not keep a row
+        empty = dates - {row.date for row in rows}
+        if empty:
+            self.filter(user_id=user_id, date__in=empty).delete()
+    
+    def refresh_for_tasks(self, tasks):
+        """Refresh the rollup days touched by ``(user_id, start_time)`` pairs"""
+        start_times = defaultdict(set)
+        for user_id, start_time in tasks:
+            start_times[user_id].add(start_time)
+        
+        users = get_user_model().objects.filter(pk__in=start_times).only('timezone')
+        for user in users:
+            tzinfo = user_tzinfo(user)
+            dates = {timezone.localtime(value, tzinfo).date() for value in start_times[user.pk]}
+            self.refresh(user.pk, dates, tzinfo)
+    
+    def rebuild(self, user, since=None, batch_size=1000):
+        """Recompute every rollup of ``user`` from ``since`` (a date) onwards"""
+        tzinfo = user_tzinfo(user)
+        tasks = Task.objects.filter(user=user)
+        existing = self.filter(user=user)
+        if since is not None:
+            tasks = tasks.filter(start_time__gte=datetime.combine(since, time.min, tzinfo=tzinfo))
+            existing = existing.filter(date__gte=since)
+        
+        existing.delete()
+        rows = self.build_rows(user.pk, self.aggregate_tasks(tasks, tzinfo))
+        self.bulk_create(rows, batch_size=batch_size)
+        return len(rows)
+
+
+class DailyTaskStats(models.Model):
+    """Per-user, per-day task counters kept in step with Task
+    
+    Dates are the task start dates in the user's timezone.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_task_stats'
+    )
+    date = models.DateField()
+    
+    total = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    in_progress = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    not_done = models.PositiveIntegerField(default=0)
+    
+    missed_with_reasons = models.PositiveIntegerField(default=0)
+    missed_with_custom_reasons = models.PositiveIntegerField(default=0)
+    missed_without_reasons = models.PositiveIntegerField(default=0)
+    
+    # Sum of end_time - start_time over the completed tasks
+    completed_duration = models.DurationField(default=timedelta(0))
+    
+    objects = DailyTaskStatsQuerySet.as_manager()
+    
+    def __str__(self):
+        return f"{self.user} - {self.date}"
+    
+    class Meta:
+        verbose_name = "Daily Task Stats"
+        verbose_name_plural = "Daily Task Stats"
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_daily_task_stats'),
+        ]
@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+CURSOR_SALT = 'task.pagination.cursor'
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(task, backwards=False):
+    """Build an opaque cursor pointing just before or after ``task``"""
+    return signing.dumps(
+        {'start_time': task.start_time.isoformat(), 'id': task.id, 'backwards': backwards},
+        salt=CURSOR_SALT,
+    )
+
+
+def decode_cursor(token):
+    """Return ``(start_time, id, backwards)`` for a cursor token"""
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+        start_time = parse_datetime(data['start_time'])
+        task_id = int(data['id'])
+        backwards = bool(data['backwards'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise InvalidCursor('Invalid pagination cursor')
+    if start_time is None:
+        raise InvalidCursor('Invalid pagination cursor')
+    return start_time, task_id, backwards
+
+
+def get_page_size(value=None):
+    """Page size requested by the client, capped at TASK_MAX_PAGE_SIZE"""
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        page_size = settings.TASK_PAGE_SIZE
+    return max(1, min(page_size, settings.TASK_MAX_PAGE_SIZE))
+
+
+class CursorPage:
+    """One page of tasks in (start_time, id) order"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def links(self, request):
+        """URLs for the neighbouring pages, keeping the other query parameters"""
+        links = {}
+        for name, cursor in (('next', self.next_cursor), ('prev', self.prev_cursor)):
+            if cursor is None:
+                links[name] = None
+                continue
+            query = request.GET.copy()
+            query['cursor'] = cursor
+            links[name] = f'{request.path}?{query.urlencode()}'
+        return links
+
+
+def keyset_query(tasks, cursor, page_size):
+    """The queryset for one page, plus whether it walks backwards
+
+    It fetches one extra row to find out whether there is another page.
+    """
+    backwards = False
+    if cursor:
+        start_time, task_id, backwards = decode_cursor(cursor)
+        if backwards:
+            tasks = tasks.filter(
+                Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=task_id)
+            ).order_by('-start_time', '-id')
+        else:
+            tasks = tasks.filter(
+                Q(start_time__gt=start_time) | Q(start_time=start_time, id__gt=task_id)
+            ).order_by('start_time', 'id')
+    else:
+        tasks = tasks.order_by('start_time', 'id')
+    return tasks[:page_size + 1], backwards
+
+
+def build_page(items, page_size, cursor, backwards):
+    """A CursorPage from the rows fetched by keyset_query()"""
+    has_more = len(items) > page_size
+    items = items[:page_size]
+
+    if backwards:
+        items.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, bool(cursor)
+
+    if not items:
+        return CursorPage(items)
+
+    return CursorPage(
+        items,
+        next_cursor=encode_cursor(items[-1]) if has_next else None,
+        prev_cursor=encode_cursor(items[0], backwards=True) if has_previous else None,
+    )
+
+
+def paginate_tasks(tasks, cursor=None, page_size=None):
+    """Return a CursorPage of ``tasks`` using keyset pagination
+
+    Each page is a single indexed range query on (start_time, id), so the
+    cost does not depend on how far into the history the page is.
+    """
+    page_size = get_page_size(page_size)
+    query, backwards = keyset_query(tasks, cursor, page_size)
+    return build_page(list(query), page_size, cursor, backwards)
+
+
+async def apaginate_tasks(tasks, cursor=None, page_size=None):
+    """Async version of paginate_tasks() for async views"""
+    page_size = get_page_size(page_size)
+    query, backwards = keyset_query(tasks, cursor, page_size)
+    items = [task async for task in query.aiterator()]
+    return build_page(items, page_size, cursor, backwards)
@@ -0,0 +1,27 @@
+from django.db.models import Count
+
+from task.models import MissedTaskReason
+
+
+# Columns rendered by task listings (task_list, missed tasks, JSON API)
+LISTING_FIELDS = ('id', 'title', 'description', 'start_time', 'end_time', 'status')
+REASON_FIELDS = ('custom_missed_reason', 'missed_reason__name')
+
+
+def listing_tasks(tasks, with_reason=False):
+    """Restrict a Task queryset to what listings render
+
+    With ``with_reason`` the missed reason is joined in, so calling
+    ``get_missed_reason_display()`` or ``has_missed_reason`` per row does not
+    trigger a query per task.
+    """
+    fields = LISTING_FIELDS
+    if with_reason:
+        tasks = tasks.select_related('missed_reason')
+        fields += REASON_FIELDS
+    return tasks.only(*fields)
+
+
+def reasons_with_usage():
+    """Active missed reasons annotated with how often each one was used"""
+    return MissedTaskReason.objects.filter(is_active=True).annotate(usage_count=Count('task'))
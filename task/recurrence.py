@@ -0,0 +1,183 @@
+import calendar
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+from django.utils import timezone
+
+from task.models import DailyTaskStats, DailyTaskStatsQuerySet, RecurringTask, SkippedOccurrence, Task
+
+
+def add_months(day, months):
+    """``day`` moved by whole months, or None if that month is too short"""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    if day.day > calendar.monthrange(year, month)[1]:
+        return None
+    return day.replace(year=year, month=month)
+
+
+def candidate_days(rule, first_day, from_day):
+    """Yield the rule's occurrence dates in order, starting near ``from_day``
+
+    Without a count the expansion skips straight to ``from_day``; with one,
+    it has to start from the first occurrence to know when to stop.
+    """
+    skip = rule.count is None
+    interval = rule.interval or 1
+
+    if rule.frequency == 'daily':
+        step = 0
+        if skip and from_day > first_day:
+            step = (from_day - first_day).days // interval
+        while True:
+            yield first_day + timedelta(days=step * interval)
+            step += 1
+
+    elif rule.frequency == 'weekly':
+        weekdays = rule.weekday_list or [first_day.weekday()]
+        first_monday = first_day - timedelta(days=first_day.weekday())
+        week = 0
+        if skip and from_day > first_day:
+            week = (from_day - first_monday).days // (7 * interval)
+        while True:
+            monday = first_monday + timedelta(weeks=week * interval)
+            for weekday in weekdays:
+                day = monday + timedelta(days=weekday)
+                if day >= first_day:
+                    yield day
+            week += 1
+
+    elif rule.frequency == 'monthly':
+        step = 0
+        if skip and from_day > first_day:
+            months = (from_day.year - first_day.year) * 12 + from_day.month - first_day.month
+            step = max(months // interval - 1, 0)
+        while True:
+            # Months without this day (e.g. the 31st) are skipped, as in RFC 5545
+            day = add_months(first_day, step * interval)
+            if day is not None:
+                yield day
+            step += 1
+
+
+def occurrence_starts(rule, window_start, window_end, tzinfo):
+    """Start times of the rule's occurrences in [window_start, window_end)
+
+    Occurrences keep the first one's wall-clock time in ``tzinfo``, so a
+    routine at 9:00 stays at 9:00 across daylight saving changes.
+    """
+    first = timezone.localtime(rule.start_time, tzinfo)
+    wall_time = first.time().replace(tzinfo=None)
+    from_day = timezone.localtime(window_start, tzinfo).date() - timedelta(days=1)
+
+    starts = []
+    produced = 0
+    for day in candidate_days(rule, first.date(), from_day):
+        start = datetime.combine(day, wall_time, tzinfo=tzinfo)
+        produced += 1
+        if rule.count is not None and produced > rule.count:
+            break
+        if rule.until is not None and start > rule.until:
+            break
+        if start >= window_end:
+            break
+        if start >= window_start:
+            starts.append(start)
+    return starts
+
+
+def find_occurrence(rule, timestamp, tzinfo):
+    """Start of the rule's occurrence at Unix ``timestamp``, or None"""
+    start = datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+    # Occurrence URLs drop sub-second precision
+    starts = occurrence_starts(rule, start, start + timedelta(seconds=1), tzinfo)
+    return starts[0] if starts else None
+
+
+def expand_occurrences(user, window_start, window_end, tzinfo, now=None):
+    """Unsaved Tasks for the user's recurring occurrences in the window
+
+    Occurrences that already have a Task row are left out; the row itself
+    is listed like any other task. Deleted occurrences (SkippedOccurrence)
+    are left out too. Each occurrence carries ``effective_status`` as of
+    ``now``. Costs one query for the rules and, when there are any, one for
+    the existing rows and skips.
+    """
+    if now is None:
+        now = timezone.now()
+
+    rules = list(RecurringTask.objects.filter(
+        Q(until__isnull=True) | Q(until__gte=window_start),
+        user=user,
+        start_time__lt=window_end,
+    ))
+    if not rules:
+        return []
+
+    planned = [
+        (rule, start)
+        for rule in rules
+        for start in occurrence_starts(rule, window_start, window_end, tzinfo)
+    ]
+    if not planned:
+        return []
+
+    in_window = Q(
+        recurring_task__in=rules,
+        occurrence_start__gte=window_start,
+        occurrence_start__lt=window_end,
+    )
+    taken = set(
+        Task.objects.filter(in_window).order_by().values_list('recurring_task_id', 'occurrence_start').union(
+            SkippedOccurrence.objects.filter(in_window).order_by().values_list('recurring_task_id', 'occurrence_start')
+        )
+    )
+
+    occurrences = []
+    for rule, start in planned:
+        if (rule.pk, start) in taken:
+            continue
+        task = rule.occurrence(start)
+        task.effective_status = task.get_effective_status(now)
+        occurrences.append(task)
+    occurrences.sort(key=lambda task: task.start_time)
+    return occurrences
+
+
+def day_window(start_date, end_date, tzinfo):
+    """Aware datetimes for the start of ``start_date`` and the end of ``end_date``"""
+    return (
+        datetime.combine(start_date, time.min, tzinfo=tzinfo),
+        datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=tzinfo),
+    )
+
+
+def with_occurrence_rollups(rollups, occurrences, tzinfo):
+    """Daily rollups with the (unsaved) occurrences counted in
+
+    Returns new unsaved DailyTaskStats rows; the stored ones are untouched.
+    Occurrences are never completed (completing one saves it), so they
+    count as pending, or as not done without a reason once their deadline
+    has passed.
+    """
+    counts = defaultdict(lambda: defaultdict(int))
+    for task in occurrences:
+        day = timezone.localtime(task.start_time, tzinfo).date()
+        counts[day]['total'] += 1
+        counts[day][task.effective_status] += 1
+        if task.effective_status == 'not_done':
+            counts[day]['missed_without_reasons'] += 1
+
+    merged = {}
+    for rollup in rollups:
+        merged[rollup.date] = DailyTaskStats(
+            user_id=rollup.user_id,
+            date=rollup.date,
+            **{name: getattr(rollup, name) for name in DailyTaskStatsQuerySet.COUNTER_FIELDS},
+        )
+    for day, day_counts in counts.items():
+        row = merged.setdefault(day, DailyTaskStats(date=day, completed_duration=timedelta(0)))
+        for name, value in day_counts.items():
+            setattr(row, name, getattr(row, name) + value)
+    return sorted(merged.values(), key=lambda row: row.date)
@@ -0,0 +1,155 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from task.models import Task, TaskReminder
+from task.timezones import user_tzinfo
+
+
+logger = logging.getLogger(__name__)
+
+# Only tasks that can still be acted on get a reminder
+REMINDER_STATUSES = ['pending', 'in_progress']
+
+
+@dataclass
+class ReminderResult:
+    """What one dispatch round did"""
+    tasks: int = 0
+    emails: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+    def add(self, other):
+        self.tasks += other.tasks
+        self.emails += other.emails
+        self.skipped += other.skipped
+        self.failed += other.failed
+
+
+def reminder_due_at(end_time, reminder_minutes):
+    """When the reminder for a task ending at ``end_time`` is due"""
+    return end_time - timedelta(minutes=reminder_minutes)
+
+
+def upcoming_reminders(now, until, tasks=None):
+    """(due time, task id, user id) for open tasks whose reminder is due by ``until``
+
+    Reminders that fell due before ``now`` are included while the deadline
+    itself is still ahead. Due times are computed in Python; one aggregate
+    over the largest reminder lead bounds the deadline range scanned.
+    """
+    if tasks is None:
+        tasks = Task.objects.all()
+    tasks = tasks.filter(status__in=REMINDER_STATUSES, reminder_minutes__gt=0, end_time__gt=now)
+
+    max_lead = tasks.aggregate(lead=Max('reminder_minutes'))['lead']
+    if max_lead is None:
+        return []
+
+    entries = []
+    rows = tasks.filter(
+        end_time__lte=until + timedelta(minutes=max_lead)
+    ).order_by().values_list('pk', 'user_id', 'end_time', 'reminder_minutes')
+    for pk, user_id, end_time, reminder_minutes in rows.iterator():
+        due_at = reminder_due_at(end_time, reminder_minutes)
+        if due_at <= until:
+            entries.append((due_at, pk, user_id))
+    return entries
+
+
+def build_message(user, tasks):
+    """One email reminding ``user`` of all their due ``tasks``"""
+    tzinfo = user_tzinfo(user)
+    if len(tasks) == 1:
+        deadline = timezone.localtime(tasks[0].end_time, tzinfo)
+        subject = f'Reminder: "{tasks[0].title}" is due at {deadline:%H:%M}'
+    else:
+        subject = f'Reminder: {len(tasks)} tasks are due soon'
+
+    lines = [f'Hi {user.first_name or user},', '', 'These tasks are due soon:', '']
+    for task in tasks:
+        deadline = timezone.localtime(task.end_time, tzinfo)
+        lines.append(f'- {task.title} (due {deadline:%b %d, %H:%M})')
+    return EmailMessage(subject, '\n'.join(lines), settings.DEFAULT_FROM_EMAIL, [user.email])
+
+
+def deliver(message):
+    """Send one email, reporting failure instead of raising"""
+    try:
+        message.send()
+    except Exception:
+        logger.exception('Could not send reminder to %s', ', '.join(message.to))
+        return False
+    return True
+
+
+def send_reminders(task_ids, now=None, workers=None):
+    """Send the reminders that are due among ``task_ids``, one email per user
+
+    Tasks that are no longer open, not due yet, already reminded, or whose
+    owner turned email notifications off are skipped. Each reminder is
+    recorded before sending and the record is dropped again if the send
+    fails, so a restarted worker does not send it twice. Emails go out from
+    a pool of ``workers`` threads; only the calling thread uses the database.
+    """
+    if now is None:
+        now = timezone.now()
+    workers = workers or settings.TASK_REMINDER_WORKERS
+    result = ReminderResult()
+
+    tasks = []
+    for task in Task.objects.filter(
+        pk__in=task_ids, status__in=REMINDER_STATUSES, end_time__gt=now
+    ).select_related('user'):
+        task.due_at = reminder_due_at(task.end_time, task.reminder_minutes)
+        if task.reminder_minutes > 0 and task.due_at <= now:
+            tasks.append(task)
+    if not tasks:
+        return result
+
+    sent = set(TaskReminder.objects.filter(
+        task__in=tasks, channel='email'
+    ).values_list('task_id', 'due_at'))
+
+    by_user = defaultdict(list)
+    for task in tasks:
+        if (task.pk, task.due_at) in sent or not task.user.email_notifications or not task.user.email:
+            result.skipped += 1
+        else:
+            by_user[task.user_id].append(task)
+    if not by_user:
+        return result
+
+    TaskReminder.objects.bulk_create(
+        [TaskReminder(task=task, channel='email', due_at=task.due_at) for user_tasks in by_user.values() for task in user_tasks],
+        ignore_conflicts=True,
+    )
+
+    messages = [build_message(user_tasks[0].user, user_tasks) for user_tasks in by_user.values()]
+    with ThreadPoolExecutor(max_workers=min(workers, len(messages))) as pool:
+        outcomes = list(pool.map(deliver, messages))
+
+    failed = []
+    for user_tasks, delivered in zip(by_user.values(), outcomes):
+        if delivered:
+            result.emails += 1
+            result.tasks += len(user_tasks)
+        else:
+            result.failed += len(user_tasks)
+            failed.extend(user_tasks)
+    if failed:
+        # Forget the failed reminders so the next round retries them
+        TaskReminder.objects.filter(reduce(or_, (
+            Q(task=task, channel='email', due_at=task.due_at) for task in failed
+        ))).delete()
+    return result
@@ -0,0 +1,141 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from task.models import DailyTaskStats, MissedTaskReason, Task
+from task.signals import deferred_rollups
+
+
+SEED_REASONS = [
+    'Ran out of time',
+    'Unexpected meeting',
+    'Felt unwell',
+    'Lost motivation',
+    'Blocked by someone else',
+]
+CUSTOM_REASONS = ['Overslept', 'Internet was down', 'Family emergency', 'Forgot about it']
+TITLES = [
+    'Write report', 'Review pull requests', 'Gym session', 'Read chapter', 'Plan the week',
+    'Answer emails', 'Team meeting', 'Study session', 'Grocery shopping', 'Call family',
+]
+
+
+def seed_users(count, email_pattern):
+    """Get or create ``count`` users whose emails follow ``email_pattern``
+
+    New users get an unusable password and are inserted with one
+    bulk_create, so no password is hashed.
+    """
+    UserModel = get_user_model()
+    emails = [email_pattern.format(number) for number in range(count)]
+    existing = {user.email: user for user in UserModel.objects.filter(email__in=emails)}
+
+    new_users = []
+    for email in emails:
+        if email not in existing:
+            user = UserModel(email=email, first_name='Seed')
+            user.set_unusable_password()
+            new_users.append(user)
+    if new_users:
+        UserModel.objects.bulk_create(new_users)
+        existing.update((user.email, user) for user in UserModel.objects.filter(email__in=emails))
+
+    return [existing[email] for email in emails]
+
+
+def seed_reasons():
+    """The active missed reasons and the ones created here
+
+    A default set is created when there are no active reasons; it is
+    returned a second time so benchmarks can pass it to remove_seeded().
+    """
+    reasons = list(MissedTaskReason.objects.filter(is_active=True))
+    if reasons:
+        return reasons, []
+
+    MissedTaskReason.objects.bulk_create(
+        [MissedTaskReason(name=name) for name in SEED_REASONS], ignore_conflicts=True
+    )
+    reasons = list(MissedTaskReason.objects.filter(is_active=True))
+    return reasons, reasons
+
+
+def generate_tasks(users, task_count, now=None, seed=0, reasons=None):
+    """Yield unsaved tasks spread round-robin over ``users``
+
+    Tasks cover two years of history plus a month ahead. Past tasks are
+    mostly completed, a quarter are not done (with a predefined reason, a
+    custom one or none) and a few are still pending; future ones are
+    pending or in progress.
+    """
+    if now is None:
+        now = timezone.now()
+    rng = random.Random(seed)
+    reasons = reasons or []
+
+    for number in range(task_count):
+        start = now - timedelta(minutes=rng.randint(-30 * 24 * 60, 730 * 24 * 60))
+        end = start + timedelta(minutes=rng.randint(15, 8 * 60))
+        task = Task(
+            user=users[number % len(users)],
+            title=f'{rng.choice(TITLES)} #{number}',
+            description='' if rng.random() < 0.6 else 'Generated task for load testing',
+            start_time=start,
+            end_time=end,
+            reminder_minutes=rng.choice([5, 10, 15, 30]),
+        )
+        if end > now:
+            task.status = rng.choice(['pending', 'pending', 'in_progress'])
+        else:
+            task.status = rng.choices(['completed', 'not_done', 'pending'], weights=[70, 25, 5])[0]
+
+        if task.status == 'not_done':
+            task.missed_at = end
+            kind = rng.random()
+            if reasons and kind < 0.5:
+                task.missed_reason = rng.choice(reasons)
+            elif kind < 0.7:
+                task.custom_missed_reason = rng.choice(CUSTOM_REASONS)
+
+        yield task
+
+
+def seed_tasks(users, task_count, batch_size=5000, seed=0, reasons=None, rollups=True):
+    """Insert ``task_count`` generated tasks with bulk_create and return the count
+
+    Some missed tasks get one of ``reasons``. bulk_create sends no signals,
+    so the users' rollups are rebuilt at the end unless ``rollups`` is False.
+    """
+    created = 0
+    batch = []
+    for task in generate_tasks(users, task_count, seed=seed, reasons=reasons):
+        batch.append(task)
+        if len(batch) >= batch_size:
+            Task.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        Task.objects.bulk_create(batch)
+        created += len(batch)
+
+    if rollups:
+        for user in users:
+            DailyTaskStats.objects.rebuild(user)
+    return created
+
+
+def remove_seeded(users, reasons=()):
+    """Delete seeded users with everything that belongs to them, and ``reasons``
+
+    The ORM cascades the deletes to every related row. The rollup refreshes
+    the task signals ask for are collected and run once at the end, where
+    the deleted users are skipped.
+    """
+    UserModel = get_user_model()
+    with deferred_rollups():
+        # One user at a time, so only their tasks are collected in memory
+        for user in users:
+            UserModel.objects.filter(pk=user.pk).delete()
+    MissedTaskReason.objects.filter(pk__in=[reason.pk for reason in reasons]).delete()
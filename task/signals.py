@@ -0,0 +1,113 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from task.cache import invalidate_all, invalidate_user
+from task.models import DailyTaskStats, MissedTaskReason, RecurringTask, Task
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_rollups():
+    """Collect the rollup refreshes of Task signals and run them once at the end
+
+    Deleting many tasks sends post_delete for each of them; inside this block
+    the touched days are refreshed together instead of once per task.
+    """
+    pending = []
+    _deferred.pending = pending
+    try:
+        yield
+    finally:
+        _deferred.pending = None
+    DailyTaskStats.objects.refresh_for_tasks(pending)
+
+
+def refresh_rollups(tasks):
+    pending = getattr(_deferred, 'pending', None)
+    if pending is not None:
+        pending.extend(tasks)
+    else:
+        DailyTaskStats.objects.refresh_for_tasks(tasks)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_analytics(sender, instance, **kwargs):
+    """Cached analytics for the task's owner are stale once a task changes"""
+    invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=RecurringTask)
+@receiver(post_delete, sender=RecurringTask)
+def invalidate_recurring_task_analytics(sender, instance, **kwargs):
+    """Analytics count a recurring task's occurrences, so its owner's are stale too"""
+    invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=MissedTaskReason)
+@receiver(post_delete, sender=MissedTaskReason)
+def invalidate_reason_analytics(sender, instance, **kwargs):
+    """Reasons are shared by all users, so every cached result is stale"""
+    invalidate_all()
+
+
+@receiver(pre_save, sender=Task)
+def remember_stored_start_time(sender, instance, raw=False, **kwargs):
+    """Keep the stored start time so a moved task also refreshes its old day"""
+    instance._stored_start_time = None
+    if instance.pk and not raw:
+        instance._stored_start_time = Task.objects.filter(pk=instance.pk).values_list(
+            'start_time', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Task)
+def refresh_rollups_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    start_times = [(instance.user_id, instance.start_time)]
+    stored_start_time = getattr(instance, '_stored_start_time', None)
+    if stored_start_time and stored_start_time != instance.start_time:
+        start_times.append((instance.user_id, stored_start_time))
+    refresh_rollups(start_times)
+
+
+@receiver(post_delete, sender=Task)
+def refresh_rollups_on_delete(sender, instance, **kwargs):
+    refresh_rollups([(instance.user_id, instance.start_time)])
+
+
+@receiver(pre_delete, sender=MissedTaskReason)
+def remember_reason_tasks(sender, instance, **kwargs):
+    """Tasks using a deleted reason are cleared with an UPDATE that sends no signals"""
+    instance._affected_tasks = list(instance.task_set.values_list('user_id', 'start_time'))
+
+
+@receiver(post_delete, sender=MissedTaskReason)
+def refresh_rollups_on_reason_delete(sender, instance, **kwargs):
+    DailyTaskStats.objects.refresh_for_tasks(getattr(instance, '_affected_tasks', []))
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_timezone_change(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Rollup dates are in the user's timezone, so a new timezone needs a rebuild"""
+    instance._timezone_changed = False
+    if raw or not instance.pk:
+        return
+    if update_fields is not None and 'timezone' not in update_fields:
+        return
+    stored_timezone = sender.objects.filter(pk=instance.pk).values_list('timezone', flat=True).first()
+    instance._timezone_changed = stored_timezone is not None and stored_timezone != instance.timezone
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def rebuild_rollups_on_timezone_change(sender, instance, **kwargs):
+    if getattr(instance, '_timezone_changed', False):
+        DailyTaskStats.objects.rebuild(instance)
+        invalidate_user(instance.pk)
@@ -0,0 +1,231 @@
+import math
+from dataclasses import dataclass
+
+from django.db import connections
+from django.db.models import Aggregate, Avg, Count, DurationField, ExpressionWrapper, F, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+@dataclass(frozen=True)
+class TaskStats:
+    """Status and missed-reason counters for a set of tasks"""
+
+    total: int = 0
+    completed: int = 0
+    pending: int = 0
+    in_progress: int = 0
+    not_done: int = 0
+    missed_with_reasons: int = 0
+    missed_with_custom_reasons: int = 0
+    missed_with_any_reason: int = 0
+    missed_without_reasons: int = 0
+    overdue: int = 0
+
+    @classmethod
+    def for_queryset(cls, tasks, now=None):
+        """Compute every counter with a single conditional-aggregation query"""
+        if now is None:
+            now = timezone.now()
+
+        not_done = Q(status='not_done')
+        has_reason = Q(missed_reason__isnull=False)
+        has_custom_reason = ~Q(custom_missed_reason='')
+
+        counts = tasks.aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            pending=Count('id', filter=Q(status='pending')),
+            in_progress=Count('id', filter=Q(status='in_progress')),
+            not_done=Count('id', filter=not_done),
+            missed_with_reasons=Count('id', filter=not_done & has_reason),
+            missed_with_custom_reasons=Count('id', filter=not_done & has_custom_reason),
+            missed_with_any_reason=Count('id', filter=not_done & (has_reason | has_custom_reason)),
+            missed_without_reasons=Count('id', filter=not_done & ~has_reason & ~has_custom_reason),
+            overdue=Count('id', filter=Q(end_time__lt=now, status__in=['pending', 'in_progress'])),
+        )
+        return cls(**counts)
+
+    ROLLUP_FIELDS = [
+        'total', 'completed', 'pending', 'in_progress', 'not_done',
+        'missed_with_reasons', 'missed_with_custom_reasons', 'missed_without_reasons',
+    ]
+
+    @classmethod
+    def from_rollups(cls, rollups, overdue=0):
+        """Sum a DailyTaskStats queryset in the database
+
+        Overdue tasks depend on the current time rather than on a day, so
+        callers count them separately and pass the result in.
+        """
+        counts = rollups.aggregate(**{field: Coalesce(Sum(field), 0) for field in cls.ROLLUP_FIELDS})
+        return cls.from_counts(counts, overdue)
+
+    @classmethod
+    def from_rollup_rows(cls, rows, overdue=0):
+        """Sum DailyTaskStats rows that are already loaded"""
+        counts = {field: sum(getattr(row, field) for row in rows) for field in cls.ROLLUP_FIELDS}
+        return cls.from_counts(counts, overdue)
+
+    @classmethod
+    def from_counts(cls, counts, overdue=0):
+        return cls(
+            missed_with_any_reason=counts['not_done'] - counts['missed_without_reasons'],
+            overdue=overdue,
+            **counts
+        )
+
+    @property
+    def completion_rate(self):
+        """Percentage of tasks that are completed"""
+        return (self.completed / self.total * 100) if self.total > 0 else 0
+
+    def status_counts(self):
+        """Per-status counts keyed by Task status value"""
+        return {
+            'pending': self.pending,
+            'in_progress': self.in_progress,
+            'completed': self.completed,
+            'not_done': self.not_done,
+        }
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL ``percentile_cont`` ordered-set aggregate"""
+
+    function = 'PERCENTILE_CONT'
+    name = 'PercentileCont'
+    template = '%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+
+def task_duration():
+    """Expression for how long a task is scheduled to take"""
+    return ExpressionWrapper(F('end_time') - F('start_time'), output_field=DurationField())
+
+
+def percentile(values, fraction):
+    """Linearly interpolated percentile of already sorted ``values``"""
+    position = (len(values) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def hours(value):
+    """Convert a timedelta (or None) to hours"""
+    return value.total_seconds() / 3600 if value is not None else 0
+
+
+@dataclass(frozen=True)
+class DurationStats:
+    """Duration statistics in hours for a set of tasks"""
+
+    PERCENTILES = {'p50': 0.5, 'p90': 0.9}
+
+    count: int = 0
+    average: float = 0
+    minimum: float = 0
+    maximum: float = 0
+    p50: float = 0
+    p90: float = 0
+
+    @classmethod
+    def aggregates(cls, tasks):
+        """Aggregates for tasks.aggregate(), and whether they include the percentiles"""
+        duration = task_duration()
+        aggregates = {
+            'count': Count('id'),
+            'average': Avg(duration),
+            'minimum': Min(duration),
+            'maximum': Max(duration),
+        }
+
+        native_percentiles = connections[tasks.db].vendor == 'postgresql'
+        if native_percentiles:
+            for name, percentile in cls.PERCENTILES.items():
+                aggregates[name] = PercentileCont(
+                    duration, percentile=percentile, output_field=DurationField()
+                )
+        return aggregates, native_percentiles
+
+    @classmethod
+    def for_queryset(cls, tasks):
+        """Compute duration statistics without loading tasks into memory
+
+        Count, average, min and max are always aggregated by the database.
+        Percentiles use ``percentile_cont`` on PostgreSQL; other backends
+        stream the sorted durations once and keep only the values needed.
+        """
+        aggregates, native_percentiles = cls.aggregates(tasks)
+        result = tasks.aggregate(**aggregates)
+        count = result.pop('count')
+        if not count:
+            return cls()
+
+        if not native_percentiles:
+            result.update(cls.stream_percentiles(tasks, count))
+
+        return cls(count=count, **{name: hours(value) for name, value in result.items()})
+
+    @classmethod
+    async def afor_queryset(cls, tasks):
+        """Async version of for_queryset()"""
+        aggregates, native_percentiles = cls.aggregates(tasks)
+        result = await tasks.aaggregate(**aggregates)
+        count = result.pop('count')
+        if not count:
+            return cls()
+
+        if not native_percentiles:
+            wanted, needed = cls.percentile_ranks(count)
+            last_needed = max(needed)
+            values = {}
+            index = 0
+            async for value in cls.sorted_durations(tasks).aiterator(chunk_size=2000):
+                if index in needed:
+                    values[index] = value
+                if index >= last_needed:
+                    break
+                index += 1
+            result.update(cls.interpolate(wanted, values))
+
+        return cls(count=count, **{name: hours(value) for name, value in result.items()})
+
+    @classmethod
+    def percentile_ranks(cls, count):
+        """Ranks needed for linear interpolation, as in percentile_cont
+
+        Returns the (rank, lower, upper) index triple per percentile and the
+        set of indexes whose values are needed.
+        """
+        wanted = {}
+        for name, percentile in cls.PERCENTILES.items():
+            rank = percentile * (count - 1)
+            wanted[name] = (rank, math.floor(rank), math.ceil(rank))
+        return wanted, {rank for _, low, high in wanted.values() for rank in (low, high)}
+
+    @staticmethod
+    def sorted_durations(tasks):
+        return tasks.annotate(duration=task_duration()).order_by('duration').values_list('duration', flat=True)
+
+    @staticmethod
+    def interpolate(wanted, values):
+        return {
+            name: values[low] + (values[high] - values[low]) * (rank - low)
+            for name, (rank, low, high) in wanted.items()
+        }
+
+    @classmethod
+    def stream_percentiles(cls, tasks, count):
+        """Interpolated percentiles from one ordered pass over the durations"""
+        wanted, needed = cls.percentile_ranks(count)
+        last_needed = max(needed)
+
+        values = {}
+        for index, value in enumerate(cls.sorted_durations(tasks).iterator(chunk_size=2000)):
+            if index in needed:
+                values[index] = value
+            if index >= last_needed:
+                break
+
+        return cls.interpolate(wanted, values)
@@ -1,3 +1,1063 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+import asyncio
+import json
+import tempfile
+import zoneinfo
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from SelfLog.database import TUNED_SQLITE_PRAGMAS, database_settings
+from SelfLog.profiling import QueryProfiler, collect_counters, read_profile_log
+from task.cache import cache_key, get_cache
+from task.importing import import_tasks
+from task.models import DailyTaskStats, RecurringTask, SkippedOccurrence, Task, TaskReminder, MissedTaskReason
+from task.pagination import paginate_tasks
+from task.recurrence import expand_occurrences, occurrence_starts
+from task.reminders import send_reminders, upcoming_reminders
+from task.seeding import remove_seeded, seed_tasks, seed_users
+from task.stats import DurationStats, TaskStats
+from task.timezones import user_tzinfo
+
+
+class TaskTestMixin:
+    """Shared fixtures for task tests"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='owner@example.com', password='pass1234', first_name='Owner'
+        )
+        cls.other_user = get_user_model().objects.create_user(
+            email='other@example.com', password='pass1234', first_name='Other'
+        )
+
+    def setUp(self):
+        super().setUp()
+        get_cache().clear()
+
+    def make_task(self, user=None, status='pending', start=None, hours=1, **extra):
+        """Create a task bypassing Task.save() so status stays as given
+
+        The rollup for the task's day is refreshed as a save would have done.
+        """
+        start = start or timezone.now() + timedelta(hours=1)
+        task = Task(
+            user=user or self.user,
+            title=extra.pop('title', 'Task'),
+            start_time=start,
+            end_time=start + timedelta(hours=hours),
+            status=status,
+            **extra
+        )
+        Task.objects.bulk_create([task])
+        DailyTaskStats.objects.refresh_for_tasks([(task.user_id, task.start_time)])
+        return task
+
+
+class SweepExpiredTests(TaskTestMixin, TestCase):
+
+    def test_transitions_expired_tasks_in_bulk(self):
+        past = timezone.now() - timedelta(days=1)
+        pending = self.make_task(status='pending', start=past)
+        in_progress = self.make_task(status='in_progress', start=past)
+        future = self.make_task(status='pending')
+        other = self.make_task(user=self.other_user, status='pending', start=past)
+
+        # select affected rows, two UPDATEs, then refresh the one rollup day
+        # (user timezone, aggregate, upsert)
+        with self.assertNumQueries(6):
+            counts = Task.objects.sweep_expired(user=self.user)
+
+        self.assertEqual(counts, {'not_done': 1, 'completed': 1})
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'not_done')
+        self.assertIsNotNone(pending.missed_at)
+        in_progress.refresh_from_db()
+        self.assertEqual(in_progress.status, 'completed')
+        future.refresh_from_db()
+        self.assertEqual(future.status, 'pending')
+        other.refresh_from_db()
+        self.assertEqual(other.status, 'pending')
+
+    def test_nothing_to_sweep_is_a_single_query(self):
+        self.make_task(status='pending')
+
+        with self.assertNumQueries(1):
+            counts = Task.objects.sweep_expired(user=self.user)
+
+        self.assertEqual(counts, {'not_done': 0, 'completed': 0})
+
+    def test_sweep_without_user_covers_everyone(self):
+        past = timezone.now() - timedelta(days=1)
+        self.make_task(status='pending', start=past)
+        self.make_task(user=self.other_user, status='pending', start=past)
+
+        counts = Task.objects.sweep_expired()
+
+        self.assertEqual(counts, {'not_done': 2, 'completed': 0})
+        self.assertFalse(Task.objects.filter(status='pending').exists())
+
+    def test_sweep_keeps_cached_analytics_of_untouched_users(self):
+        past = timezone.now() - timedelta(days=1)
+        self.make_task(status='pending', start=past)
+        untouched = get_user_model().objects.create_user(email='untouched@example.com', password='pass1234')
+        keys = {user.pk: cache_key(user.pk, 'analytics') for user in (self.user, untouched)}
+
+        Task.objects.sweep_expired()
+
+        self.assertNotEqual(cache_key(self.user.pk, 'analytics'), keys[self.user.pk])
+        self.assertEqual(cache_key(untouched.pk, 'analytics'), keys[untouched.pk])
+
+
+@override_settings(TASK_SWEEP_ON_REQUEST=False)
+class EffectiveStatusTests(TaskTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        past = timezone.now() - timedelta(days=1)
+        self.expired_pending = self.make_task(status='pending', start=past, title='Expired pending')
+        self.expired_in_progress = self.make_task(status='in_progress', start=past, title='Expired in progress')
+        self.pending = self.make_task(status='pending', title='Pending')
+        self.completed = self.make_task(status='completed', start=past, title='Completed')
+
+    def test_annotation_applies_deadline_transitions(self):
+        statuses = dict(Task.objects.with_effective_status().values_list('title', 'effective_status'))
+
+        self.assertEqual(statuses, {
+            'Expired pending': 'not_done',
+            'Expired in progress': 'completed',
+            'Pending': 'pending',
+            'Completed': 'completed',
+        })
+        # Nothing was written
+        self.assertEqual(Task.objects.filter(status='pending').count(), 2)
+
+    def test_filter_matches_annotation(self):
+        now = timezone.now()
+        annotated = Task.objects.with_effective_status(now)
+        for status, _ in Task.STATUS_CHOICES:
+            with self.subTest(status=status):
+                self.assertEqual(
+                    set(Task.objects.filter_effective_status(status, now)),
+                    set(annotated.filter(effective_status=status)),
+                )
+
+    def test_task_miss_does_not_save(self):
+        task = Task.objects.get(pk=self.expired_pending.pk)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(task.task_miss)
+            self.assertEqual(task.get_effective_status(), 'not_done')
+
+        self.assertEqual(task.status, 'pending')
+
+    def test_listing_reads_never_write(self):
+        self.client.force_login(self.user)
+
+        for name in ('dashboard', 'task_list', 'get_tasks_json'):
+            with self.subTest(view=name):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+                writes = [query['sql'] for query in queries if not query['sql'].startswith('SELECT')]
+                self.assertEqual(writes, [])
+
+        data = self.client.get(reverse('get_tasks_json')).json()
+        statuses = {task['title']: task['status'] for task in data['tasks']}
+        self.assertEqual(statuses['Expired pending'], 'not_done')
+        self.assertEqual(statuses['Expired in progress'], 'completed')
+
+        response = self.client.get(reverse('task_list'), {'status': 'not_done'})
+        self.assertEqual([task.title for task in response.context['tasks']], ['Expired pending'])
+
+
+class DeadlineSchedulerCommandTests(TaskTestMixin, TestCase):
+
+    def test_once_sweeps_all_users_in_batches(self):
+        past = timezone.now() - timedelta(days=1)
+        for _ in range(3):
+            self.make_task(status='pending', start=past)
+        self.make_task(user=self.other_user, status='in_progress', start=past)
+        self.make_task(status='pending')
+
+        out = StringIO()
+        call_command('run_deadline_scheduler', '--once', '--batch-size', '2', stdout=out)
+
+        self.assertEqual(Task.objects.filter(status='not_done').count(), 3)
+        self.assertEqual(Task.objects.filter(status='completed').count(), 1)
+        self.assertEqual(Task.objects.filter(status='pending').count(), 1)
+        self.assertIn('Applied 4 transitions', out.getvalue())
+
+
+class TaskStatsTests(TaskTestMixin, TestCase):
+
+    def test_counts_in_one_query(self):
+        past = timezone.now() - timedelta(days=1)
+        reason = MissedTaskReason.objects.create(name='Sick')
+        self.make_task(status='completed')
+        self.make_task(status='pending')
+        self.make_task(status='in_progress', start=past)
+        self.make_task(status='not_done', missed_reason=reason)
+        self.make_task(status='not_done', custom_missed_reason='Traffic')
+        self.make_task(status='not_done')
+        self.make_task(user=self.other_user, status='completed')
+
+        with self.assertNumQueries(1):
+            stats = TaskStats.for_queryset(Task.objects.filter(user=self.user))
+
+        self.assertEqual(stats.total, 6)
+        self.assertEqual(stats.completed, 1)
+        self.assertEqual(stats.pending, 1)
+        self.assertEqual(stats.in_progress, 1)
+        self.assertEqual(stats.not_done, 3)
+        self.assertEqual(stats.missed_with_reasons, 1)
+        self.assertEqual(stats.missed_with_custom_reasons, 1)
+        self.assertEqual(stats.missed_with_any_reason, 2)
+        self.assertEqual(stats.missed_without_reasons, 1)
+        self.assertEqual(stats.overdue, 1)
+
+
+class DashboardQueryCountTests(TaskTestMixin, TestCase):
+
+    def test_query_count_does_not_grow_with_tasks(self):
+        self.client.force_login(self.user)
+        for status in ['pending', 'in_progress', 'completed', 'not_done'] * 5:
+            self.make_task(status=status, start=timezone.now())
+
+        # session, user, sweep check, overdue count, rollup totals, today's
+        # and upcoming tasks, recurring tasks
+        with self.assertNumQueries(8):
+            response = self.client.get(reverse('dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_tasks'], 20)
+
+
+class AnalyticsQueryCountTests(TaskTestMixin, TestCase):
+
+    def test_analytics_query_count_is_constant_for_90_days(self):
+        self.client.force_login(self.user)
+        for days_ago in range(0, 90, 3):
+            self.make_task(status='completed', start=timezone.now() - timedelta(days=days_ago))
+
+        # session, user, daily rollups, recurring tasks, missed reasons
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('analytics'), {'range': '90days'})
+
+        self.assertEqual(len(response.context['daily_data']), 90)
+
+
+class DurationStatsTests(TaskTestMixin, TestCase):
+
+    def test_duration_statistics_in_hours(self):
+        for hours in [1, 2, 3, 4, 10]:
+            self.make_task(status='completed', hours=hours)
+        self.make_task(status='pending', hours=100)
+
+        stats = DurationStats.for_queryset(Task.objects.filter(user=self.user, status='completed'))
+
+        self.assertEqual(stats.count, 5)
+        self.assertAlmostEqual(stats.average, 4)
+        self.assertAlmostEqual(stats.minimum, 1)
+        self.assertAlmostEqual(stats.maximum, 10)
+        self.assertAlmostEqual(stats.p50, 3)
+        self.assertAlmostEqual(stats.p90, 7.6)
+
+    def test_empty_queryset(self):
+        self.assertEqual(DurationStats.for_queryset(Task.objects.none()), DurationStats())
+
+
+@override_settings(TASK_PAGE_SIZE=2, TASK_MAX_PAGE_SIZE=3)
+class CursorPaginationTests(TaskTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        start = timezone.now() - timedelta(days=3)
+        # Two tasks share a start time to exercise the id tie-breaker
+        self.tasks = [
+            self.make_task(title=f'Task {number}', start=start + timedelta(hours=number // 2))
+            for number in range(5)
+        ]
+
+    def test_pages_forward_and_back(self):
+        tasks = Task.objects.filter(user=self.user)
+
+        first = paginate_tasks(tasks)
+        second = paginate_tasks(tasks, first.next_cursor)
+        third = paginate_tasks(tasks, second.next_cursor)
+
+        self.assertEqual([t.title for t in first], ['Task 0', 'Task 1'])
+        self.assertEqual([t.title for t in second], ['Task 2', 'Task 3'])
+        self.assertEqual([t.title for t in third], ['Task 4'])
+        self.assertFalse(first.has_previous)
+        self.assertFalse(third.has_next)
+
+        back = paginate_tasks(tasks, third.prev_cursor)
+        self.assertEqual([t.title for t in back], ['Task 2', 'Task 3'])
+        self.assertTrue(back.has_next)
+        self.assertEqual([t.title for t in paginate_tasks(tasks, back.prev_cursor)], ['Task 0', 'Task 1'])
+
+    def test_page_size_is_capped(self):
+        page = paginate_tasks(Task.objects.filter(user=self.user), page_size='100')
+        self.assertEqual(len(page), 3)
+
+    def test_json_api_links_and_invalid_cursor(self):
+        self.client.force_login(self.user)
+        url = reverse('get_tasks_json')
+
+        data = self.client.get(url, {'range': '7days'}).json()
+        self.assertEqual(data['meta']['count'], 2)
+        self.assertIsNone(data['meta']['prev'])
+
+        data = self.client.get(data['meta']['next']).json()
+        self.assertEqual([task['title'] for task in data['tasks']], ['Task 2', 'Task 3'])
+        self.assertIsNotNone(data['meta']['prev'])
+
+        response = self.client.get(url, {'cursor': 'tampered'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportTasksTests(TaskTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        reason = MissedTaskReason.objects.create(name='Sick')
+        self.make_task(title='Done', status='completed')
+        self.make_task(title='Missed', status='not_done', missed_reason=reason)
+        self.make_task(user=self.other_user, title='Not mine')
+
+    async def export(self, **params):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(reverse('export_tasks'), params)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        return response, content
+
+    async def test_streams_ndjson(self):
+        response, content = await self.export()
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Done', 'Missed'])
+        self.assertEqual(rows[1]['missed_reason'], 'Sick')
+        self.assertEqual(rows[0]['duration_hours'], 1.0)
+
+    async def test_streams_csv(self):
+        response, content = await self.export(format='csv')
+
+        lines = content.decode().splitlines()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertTrue(lines[0].startswith('id,title,'))
+        self.assertEqual(len(lines), 3)
+
+
+class AnalyticsCacheTests(TaskTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.make_task(status='completed', start=timezone.now() - timedelta(days=2))
+
+    def test_repeat_hits_are_served_from_cache(self):
+        url = reverse('productivity_metrics')
+        first = self.client.get(url).json()
+
+        # Only the session and user lookups remain
+        with collect_counters() as counters, self.assertNumQueries(2):
+            second = self.client.get(url).json()
+
+        self.assertEqual(first, second)
+        self.assertEqual(counters['analytics_cache.hits'], 1)
+        self.assertEqual(counters['analytics_cache.misses'], 0)
+
+    def test_task_changes_invalidate_owner_results(self):
+        url = reverse('analytics')
+        self.assertEqual(self.client.get(url).context['total_tasks'], 1)
+
+        self.make_task(status='completed', start=timezone.now() - timedelta(days=1)).save()
+
+        self.assertEqual(self.client.get(url).context['total_tasks'], 2)
+
+    def test_reason_changes_invalidate_every_user(self):
+        url = reverse('missed_tasks_analysis')
+        with collect_counters() as counters:
+            self.client.get(url)
+
+            MissedTaskReason.objects.create(name='Travel')
+            self.client.get(url)
+
+        self.assertEqual(counters['analytics_cache.misses'], 2)
+
+
+class DailyTaskStatsTests(TaskTestMixin, TestCase):
+
+    def rollup(self, day):
+        return DailyTaskStats.objects.filter(user=self.user, date=day).first()
+
+    def test_rollups_follow_task_changes(self):
+        tz = timezone.get_current_timezone()
+        start = datetime(2025, 5, 1, 9, 0, tzinfo=tz)
+        task = Task.objects.create(
+            user=self.user, title='Write report', start_time=start, end_time=start + timedelta(hours=2)
+        )
+        # The deadline has passed, so save() marks it as not done
+        self.assertEqual(self.rollup(date(2025, 5, 1)).not_done, 1)
+        self.assertEqual(self.rollup(date(2025, 5, 1)).missed_without_reasons, 1)
+
+        task.status = 'completed'
+        task.save()
+        rollup = self.rollup(date(2025, 5, 1))
+        self.assertEqual((rollup.total, rollup.completed, rollup.not_done), (1, 1, 0))
+        self.assertEqual(rollup.completed_duration, timedelta(hours=2))
+
+        task.start_time = start + timedelta(days=1)
+        task.end_time = task.start_time + timedelta(hours=1)
+        task.save()
+        self.assertIsNone(self.rollup(date(2025, 5, 1)))
+        self.assertEqual(self.rollup(date(2025, 5, 2)).completed, 1)
+
+        task.delete()
+        self.assertFalse(DailyTaskStats.objects.filter(user=self.user).exists())
+
+    def test_rebuild_command_matches_incremental_rollups(self):
+        past = timezone.now() - timedelta(days=3)
+        for status in ['completed', 'not_done', 'pending']:
+            self.make_task(status=status, start=past)
+        self.make_task(user=self.other_user, status='completed', start=past)
+        expected = list(DailyTaskStats.objects.order_by('user', 'date').values())
+
+        DailyTaskStats.objects.all().delete()
+        call_command('rebuild_task_rollups', stdout=StringIO())
+
+        rebuilt = list(DailyTaskStats.objects.order_by('user', 'date').values())
+        for row in expected + rebuilt:
+            row.pop('id')
+        self.assertEqual(rebuilt, expected)
+
+
+class QueryBudgetTests(TaskTestMixin, TestCase):
+    """Each view's query count must not depend on how many tasks or reasons exist"""
+
+    # session and user lookups plus the view's own queries
+    BUDGETS = {
+        'dashboard': 8,
+        'task_list': 5,
+        'get_tasks_json': 3,
+        'analytics': 5,
+        'productivity_metrics': 5,
+        'missed_tasks_analysis': 6,
+        'manage_missed_reasons': 3,
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        reasons = [MissedTaskReason.objects.create(name=f'Reason {number}') for number in range(5)]
+        for number in range(30):
+            start = timezone.now() - timedelta(days=number % 20, hours=3)
+            if number % 2:
+                self.make_task(status='completed', start=start)
+            else:
+                self.make_task(
+                    status='not_done',
+                    start=start,
+                    missed_reason=reasons[number % 5] if number % 3 else None,
+                    custom_missed_reason='Overslept' if number % 4 == 0 else '',
+                )
+
+    def test_view_query_budgets(self):
+        for name, budget in self.BUDGETS.items():
+            with self.subTest(view=name):
+                with self.assertNumQueries(budget):
+                    response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+
+    def test_json_api_renders_reasons_without_extra_queries(self):
+        with self.assertNumQueries(self.BUDGETS['get_tasks_json']):
+            data = self.client.get(reverse('get_tasks_json'), {'page_size': 50}).json()
+
+        reasons = {task['missed_reason'] for task in data['tasks']}
+        self.assertIn('Overslept', reasons)
+        self.assertIn('Reason 1', reasons)
+
+
+class ProfilingMiddlewareTests(TaskTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_path = Path(directory.name) / 'profiling.jsonl'
+        self.client.force_login(self.user)
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('task_list'))
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertFalse(self.log_path.exists())
+
+    def test_records_requests_and_reports_percentiles(self):
+        self.make_task(status='pending')
+        with override_settings(PROFILING_ENABLED=True, PROFILING_LOG=self.log_path):
+            for _ in range(3):
+                response = self.client.get(reverse('task_list'))
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="5 queries", app;dur=')
+        records = list(read_profile_log(self.log_path))
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0]['url_name'], 'task_list')
+        self.assertEqual(records[0]['queries'], 5)
+        self.assertEqual(records[0]['duplicates'], 0)
+
+        summary_path = Path(self.log_path).with_suffix('.summary.json')
+        out = StringIO()
+        call_command('profiling_report', log=str(self.log_path), json_output=str(summary_path), reset=True, stdout=out)
+
+        self.assertIn('task_list', out.getvalue())
+        summary = json.loads(summary_path.read_text())
+        self.assertEqual(summary['task_list']['requests'], 3)
+        self.assertEqual(summary['task_list']['queries_p99'], 5)
+        self.assertEqual(self.log_path.read_text(), '')
+
+    def test_counters_are_totalled_across_records(self):
+        self.client.logout()
+        with override_settings(PROFILING_ENABLED=True, PROFILING_LOG=self.log_path):
+            for _ in range(2):
+                self.client.post(reverse('login'), {'username': 'owner@example.com', 'password': 'wrong'})
+
+        records = list(read_profile_log(self.log_path))
+        self.assertEqual(records[0]['counters'], {'login_throttle.attempts': 1})
+
+        # Records written before counters were added have no 'counters' key
+        older = {key: value for key, value in records[0].items() if key != 'counters'}
+        with open(self.log_path, 'a', encoding='utf-8') as log:
+            log.write(json.dumps(older) + '\n')
+        out = StringIO()
+        call_command('profiling_report', log=str(self.log_path), stdout=out)
+
+        self.assertRegex(out.getvalue(), r'login_throttle\.attempts +2\n')
+
+    def test_repeated_sql_is_flagged(self):
+        profiler = QueryProfiler()
+        with connection.execute_wrapper(profiler):
+            for user in (self.user, self.other_user, self.user):
+                Task.objects.filter(user=user).count()
+            get_user_model().objects.count()
+
+        self.assertEqual(profiler.count, 4)
+        self.assertEqual(len(profiler.duplicates), 1)
+        self.assertEqual(profiler.duplicates[0][1], 3)
+
+
+class BenchmarkTaskIndexesTests(TestCase):
+
+    def test_runs_in_a_scratch_database(self):
+        with connection.cursor() as cursor:
+            before = connection.introspection.get_constraints(cursor, Task._meta.db_table)
+        out = StringIO()
+
+        call_command('benchmark_task_indexes', tasks=300, users=3, repeat=1, stdout=out)
+
+        self.assertIn('with indexes:', out.getvalue())
+        with connection.cursor() as cursor:
+            self.assertEqual(connection.introspection.get_constraints(cursor, Task._meta.db_table), before)
+        self.assertFalse(get_user_model().objects.filter(email__startswith='index-benchmark-').exists())
+        self.assertNotIn('index_benchmark', connections.settings)
+
+
+class SeedTasksTests(TestCase):
+
+    def test_seeds_users_tasks_and_rollups(self):
+        call_command('seed_tasks', users=3, tasks_per_user=40, stdout=StringIO())
+
+        users = get_user_model().objects.filter(email__startswith='seed-')
+        self.assertEqual(users.count(), 3)
+        self.assertEqual(Task.objects.filter(user__in=users).count(), 120)
+        self.assertTrue(Task.objects.filter(status='not_done', missed_reason__isnull=False).exists())
+        for user in users:
+            expected = TaskStats.for_queryset(Task.objects.filter(user=user))
+            stats = TaskStats.from_rollups(DailyTaskStats.objects.filter(user=user), overdue=expected.overdue)
+            self.assertEqual(stats, expected)
+
+        call_command('seed_tasks', users=1, tasks_per_user=5, clear=True, stdout=StringIO())
+
+        self.assertEqual(Task.objects.count(), 5)
+        self.assertEqual(get_user_model().objects.filter(email__startswith='seed-').count(), 1)
+
+
+class BenchmarkViewsTests(TestCase):
+
+    def test_detects_query_regressions_against_baseline(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        baseline_path = Path(directory.name) / 'baseline.json'
+        options = {'sizes': '20', 'repeat': 2, 'baseline': str(baseline_path), 'stdout': StringIO()}
+
+        call_command('benchmark_views', save_baseline=True, **options)
+
+        baseline = json.loads(baseline_path.read_text())
+        self.assertEqual(set(baseline['20']), {
+            'dashboard', 'task_list', 'analytics', 'get_tasks_json',
+            'productivity_metrics', 'missed_tasks_analysis',
+        })
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(MissedTaskReason.objects.exists())
+
+        # Generous latency tolerance so only the query count can fail
+        baseline['20']['task_list']['queries'] -= 1
+        baseline_path.write_text(json.dumps(baseline))
+        with self.assertRaisesMessage(CommandError, '1 regression(s)'):
+            call_command('benchmark_views', tolerance=100, stderr=StringIO(), **options)
+
+
+class DatabaseProfileTests(TestCase):
+
+    def test_profiles(self):
+        tuned = database_settings('sqlite-tuned', Path('/tmp'))
+        self.assertEqual(tuned['PRAGMAS'], TUNED_SQLITE_PRAGMAS)
+        self.assertGreater(tuned['CONN_MAX_AGE'], 0)
+        self.assertEqual(database_settings('postgres', Path('/tmp'))['ENGINE'], 'django.db.backends.postgresql')
+        with self.assertRaises(ValueError):
+            database_settings('mysql', Path('/tmp'))
+
+    def test_tuned_connections_get_pragmas(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_dict = connections.configure_settings({
+            'default': database_settings('sqlite-tuned', Path(directory.name)),
+        })['default']
+        # A standalone connection, outside the test database isolation
+        tuned = SQLiteDatabaseWrapper(settings_dict, alias='tuned-test')
+        self.addCleanup(tuned.close)
+
+        with tuned.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+
+class BulkTaskOperationTests(TaskTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def post(self, payload):
+        return self.client.post(reverse('bulk_tasks'), json.dumps(payload), content_type='application/json')
+
+    def test_set_status_checks_ownership_per_item(self):
+        first = self.make_task()
+        second = self.make_task()
+        foreign = self.make_task(user=self.other_user)
+
+        response = self.post({'operation': 'set_status', 'status': 'completed', 'ids': [first.pk, second.pk, foreign.pk, 0]})
+
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['ok'] for result in data['results']], [True, True, False, False])
+        self.assertEqual(data['results'][2]['error'], 'Task not found')
+        self.assertEqual((data['succeeded'], data['failed']), (2, 2))
+        self.assertEqual(Task.objects.filter(user=self.user, status='completed').count(), 2)
+        self.assertEqual(Task.objects.get(pk=foreign.pk).status, 'pending')
+        stats = TaskStats.from_rollups(DailyTaskStats.objects.filter(user=self.user))
+        self.assertEqual((stats.completed, stats.pending), (2, 0))
+
+    def test_set_status_applies_deadline_transition(self):
+        expired = self.make_task(status='completed', start=timezone.now() - timedelta(days=1))
+
+        data = self.post({'operation': 'set_status', 'status': 'pending', 'ids': [expired.pk]}).json()
+
+        self.assertEqual(data['results'][0]['status'], 'not_done')
+        expired.refresh_from_db()
+        self.assertEqual(expired.status, 'not_done')
+        self.assertIsNotNone(expired.missed_at)
+
+    def test_mark_not_done_validates_reason_once(self):
+        reason = MissedTaskReason.objects.create(name='Sick')
+        tasks = [self.make_task() for _ in range(3)]
+        ids = [task.pk for task in tasks]
+
+        response = self.post({'operation': 'mark_not_done', 'ids': ids})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.filter(status='not_done').exists())
+
+        self.post({'operation': 'mark_not_done', 'ids': ids, 'missed_reason': reason.pk})
+        self.assertEqual(Task.objects.filter(status='not_done', missed_reason=reason).count(), 3)
+        self.assertEqual(TaskStats.from_rollups(DailyTaskStats.objects.filter(user=self.user)).missed_with_reasons, 3)
+
+    def test_reschedule_moves_tasks_and_rollups(self):
+        start = timezone.now() + timedelta(days=1)
+        task = self.make_task(start=start)
+
+        data = self.post({'operation': 'reschedule', 'ids': [task.pk], 'offset_minutes': 3 * 24 * 60}).json()
+
+        task.refresh_from_db()
+        self.assertEqual(task.start_time, start + timedelta(days=3))
+        self.assertEqual(data['results'][0]['start_time'], task.start_time.isoformat())
+        dates = list(DailyTaskStats.objects.filter(user=self.user).values_list('date', flat=True))
+        self.assertEqual(dates, [timezone.localtime(task.start_time, user_tzinfo(self.user)).date()])
+
+    def test_delete_refreshes_rollups_once(self):
+        def delete(count):
+            ids = [self.make_task().pk for _ in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                self.post({'operation': 'delete', 'ids': ids})
+            self.assertFalse(Task.objects.filter(pk__in=ids).exists())
+            return len(queries)
+
+        self.assertEqual(delete(2), delete(6))
+        self.assertFalse(DailyTaskStats.objects.filter(user=self.user).exists())
+
+    def test_invalid_requests(self):
+        task = self.make_task()
+        self.assertEqual(self.client.get(reverse('bulk_tasks')).status_code, 405)
+        for payload in (
+            {'operation': 'archive', 'ids': [task.pk]},
+            {'operation': 'set_status', 'status': 'done', 'ids': [task.pk]},
+            {'operation': 'delete', 'ids': []},
+            {'operation': 'delete', 'ids': ['1']},
+            {'operation': 'reschedule', 'ids': [task.pk], 'offset_minutes': 0},
+        ):
+            with self.subTest(payload=payload):
+                self.assertEqual(self.post(payload).status_code, 400)
+        self.assertTrue(Task.objects.filter(pk=task.pk).exists())
+
+
+class TaskImportTests(TaskTestMixin, TestCase):
+
+    CSV = (
+        'title,description,start_time,end_time,status,reminder_minutes\n'
+        'Write report,Q3,2030-01-10 09:00,2030-01-10 11:00,,15\n'
+        'Old task,,2020-01-10T09:00:00+00:00,2020-01-10T10:00:00+00:00,pending,\n'
+        'Backwards,,2030-01-10 11:00,2030-01-10 09:00,,\n'
+        ',,2030-01-10 09:00,2030-01-10 10:00,,\n'
+        'Odd status,,2030-01-10 09:00,2030-01-10 10:00,someday,\n'
+        'Done,,2020-02-01 09:00,2020-02-01 10:00,completed,\n'
+    )
+
+    def csv_file(self, content=None):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'tasks.csv'
+        path.write_text(content or self.CSV)
+        return str(path)
+
+    def test_command_imports_valid_rows_and_reports_errors(self):
+        out, err = StringIO(), StringIO()
+        call_command('import_tasks', self.csv_file(), user=self.user.email, batch_size=2, stdout=out, stderr=err)
+
+        self.assertIn('Imported 3 of 6 rows', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        self.assertEqual(err.getvalue().splitlines(), [
+            'Row 4: End time must be after start time',
+            'Row 5: Title is required',
+            "Row 6: Unknown status 'someday'",
+        ])
+        report = Task.objects.get(title='Write report')
+        self.assertEqual(report.reminder_minutes, 15)
+        self.assertEqual(timezone.localtime(report.start_time, user_tzinfo(self.user)).hour, 9)
+        old = Task.objects.get(title='Old task')
+        self.assertEqual(old.status, 'not_done')
+        self.assertIsNotNone(old.missed_at)
+        self.assertEqual(TaskStats.from_rollups(DailyTaskStats.objects.filter(user=self.user)).total, 3)
+
+    def test_dry_run_and_bad_files(self):
+        call_command('import_tasks', self.csv_file(), user=str(self.user.pk), dry_run=True, stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(Task.objects.exists())
+
+        with self.assertRaisesMessage(CommandError, 'missing the column(s): end_time'):
+            call_command('import_tasks', self.csv_file('title,start_time\nA,2030-01-01 09:00\n'), user=self.user.email)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def import_rows(count):
+            rows = ''.join(f'Task {n},,2030-01-{n % 28 + 1:02d} 09:00,2030-01-{n % 28 + 1:02d} 10:00,,\n' for n in range(count))
+            with CaptureQueriesContext(connection) as queries:
+                result = import_tasks(self.user, StringIO('title,description,start_time,end_time,status,reminder_minutes\n' + rows))
+            self.assertEqual(result.created, count)
+            return len(queries)
+
+        # Both sizes fit in one INSERT within SQLite's variable limit
+        self.assertEqual(import_rows(5), import_rows(60))
+
+    def test_upload_ics(self):
+        ics = (
+            'BEGIN:VCALENDAR\r\n'
+            'BEGIN:VEVENT\r\n'
+            'SUMMARY:Team\r\n'
+            '  sync\\, weekly\r\n'
+            'DTSTART:20300110T090000Z\r\n'
+            'DTEND:20300110T100000Z\r\n'
+            'STATUS:CONFIRMED\r\n'
+            'END:VEVENT\r\n'
+            'BEGIN:VEVENT\r\n'
+            'SUMMARY:Conference\r\n'
+            'DTSTART;VALUE=DATE:20300201\r\n'
+            'END:VEVENT\r\n'
+            'BEGIN:VEVENT\r\n'
+            'SUMMARY:Elsewhere\r\n'
+            'DTSTART;TZID=Mars/Olympus:20300110T090000\r\n'
+            'DTEND:20300110T100000Z\r\n'
+            'END:VEVENT\r\n'
+            'END:VCALENDAR\r\n'
+        )
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse('import_tasks'), {
+            'file': SimpleUploadedFile('calendar.ics', ics.encode(), content_type='text/calendar'),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([error['row'] for error in response.context['errors']], [13])
+        team = Task.objects.get(title='Team sync, weekly')
+        self.assertEqual(team.start_time, datetime(2030, 1, 10, 9, tzinfo=dt_timezone.utc))
+        conference = Task.objects.get(title='Conference')
+        self.assertEqual(conference.end_time - conference.start_time, timedelta(days=1))
+
+
+class RecurringTaskTests(TaskTestMixin, TestCase):
+
+    def make_rule(self, start, **extra):
+        return RecurringTask.objects.create(
+            user=self.user,
+            title=extra.pop('title', 'Routine'),
+            start_time=start,
+            end_time=start + timedelta(minutes=30),
+            **extra
+        )
+
+    def starts(self, rule, window_start, days, tzinfo=dt_timezone.utc):
+        return occurrence_starts(rule, window_start, window_start + timedelta(days=days), tzinfo)
+
+    def test_expansion_rules(self):
+        first = datetime(2030, 1, 31, 9, tzinfo=dt_timezone.utc)
+
+        daily = self.make_rule(first, frequency='daily', interval=2)
+        self.assertEqual([start.day for start in self.starts(daily, first + timedelta(days=100), 6)], [11, 13, 15])
+
+        # 2030-01-31 is a Thursday; Monday and Thursday every other week
+        weekly = self.make_rule(first, frequency='weekly', interval=2, weekdays='0,3')
+        self.assertEqual(
+            [(start.month, start.day) for start in self.starts(weekly, first, 21)],
+            [(1, 31), (2, 11), (2, 14)]
+        )
+
+        # Months without a 31st are skipped
+        monthly = self.make_rule(first, frequency='monthly')
+        self.assertEqual([start.month for start in self.starts(monthly, first, 200)], [1, 3, 5, 7])
+
+        counted = self.make_rule(first, count=3)
+        self.assertEqual(len(self.starts(counted, first, 30)), 3)
+        bounded = self.make_rule(first, until=first + timedelta(days=4, hours=1))
+        self.assertEqual(len(self.starts(bounded, first, 30)), 5)
+
+    def test_keeps_wall_clock_time_across_dst(self):
+        new_york = zoneinfo.ZoneInfo('America/New_York')
+        first = datetime(2030, 3, 8, 9, tzinfo=new_york)
+        rule = self.make_rule(first)
+
+        starts = self.starts(rule, first, 4, new_york)
+
+        self.assertEqual([start.astimezone(new_york).hour for start in starts], [9, 9, 9, 9])
+        # Clocks go forward on March 10, so that day is an hour shorter
+        self.assertEqual(starts[3].astimezone(dt_timezone.utc) - starts[0], timedelta(days=3, hours=-1))
+
+    def test_occurrences_are_virtual_until_changed(self):
+        first = timezone.now().replace(microsecond=0) + timedelta(hours=1)
+        rule = self.make_rule(first)
+        window = (first, first + timedelta(days=3))
+
+        occurrences = expand_occurrences(self.user, *window, dt_timezone.utc)
+        self.assertEqual(len(occurrences), 3)
+        self.assertFalse(Task.objects.exists())
+
+        self.client.force_login(self.user)
+        second = occurrences[1]
+        url = reverse('update_occurrence_status', args=[rule.id, second.occurrence_timestamp])
+        for _ in range(2):
+            response = self.client.post(url, {'status': 'completed'})
+            self.assertRedirects(response, reverse('task_list'))
+
+        task = Task.objects.get()
+        self.assertEqual((task.status, task.start_time, task.recurring_task_id), ('completed', second.start_time, rule.id))
+        remaining = expand_occurrences(self.user, *window, dt_timezone.utc)
+        self.assertEqual([occurrence.start_time for occurrence in remaining], [first, first + timedelta(days=2)])
+
+        # Timestamps that are not an occurrence of the rule are rejected
+        bad_url = reverse('update_occurrence_status', args=[rule.id, second.occurrence_timestamp + 60])
+        self.assertEqual(self.client.post(bad_url, {'status': 'completed'}).status_code, 404)
+
+    def test_deleted_occurrences_stay_deleted(self):
+        first = timezone.now().replace(microsecond=0) + timedelta(hours=1)
+        rule = self.make_rule(first)
+        window = (first, first + timedelta(days=3))
+        occurrences = expand_occurrences(self.user, *window, dt_timezone.utc)
+        second, third = rule.materialize(occurrences[1].start_time), rule.materialize(occurrences[2].start_time)
+        self.client.force_login(self.user)
+
+        self.client.post(reverse('delete_task', args=[second.pk]))
+        self.client.post(
+            reverse('bulk_tasks'), json.dumps({'operation': 'delete', 'ids': [third.pk]}), content_type='application/json'
+        )
+
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(SkippedOccurrence.objects.filter(recurring_task=rule).count(), 2)
+        remaining = expand_occurrences(self.user, *window, dt_timezone.utc)
+        self.assertEqual([occurrence.start_time for occurrence in remaining], [first])
+        url = reverse('update_occurrence_status', args=[rule.id, second.occurrence_timestamp])
+        self.assertEqual(self.client.post(url, {'status': 'completed'}).status_code, 404)
+
+    def test_views_include_occurrences(self):
+        self.client.force_login(self.user)
+        tzinfo = user_tzinfo(self.user)
+        today = timezone.localtime(timezone.now(), tzinfo).date()
+        past = datetime.combine(today - timedelta(days=5), datetime.min.time(), tzinfo=tzinfo) + timedelta(hours=1)
+        self.make_rule(past, count=3)
+
+        response = self.client.get(reverse('analytics'), {'range': '7days'})
+        self.assertEqual(response.context['total_tasks'], 3)
+        self.assertEqual(response.context['not_done_tasks'], 3)
+
+        self.make_rule(timezone.now() + timedelta(hours=1), frequency='weekly', title='Weekly review')
+
+        response = self.client.get(reverse('task_list'))
+        self.assertEqual([task.title for task in response.context['occurrences']], ['Weekly review'])
+        self.assertContains(response, 'Weekly review')
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertIn('Weekly review', [task.title for task in response.context['upcoming_tasks']])
+
+    def test_create_and_end_recurring_task(self):
+        self.client.force_login(self.user)
+        start = timezone.localtime(timezone.now() - timedelta(days=2))
+        response = self.client.post(reverse('create_recurring_task'), {
+            'title': 'Stretch',
+            'start_time': start.strftime('%Y-%m-%dT%H:%M'),
+            'end_time': (start + timedelta(minutes=15)).strftime('%Y-%m-%dT%H:%M'),
+            'frequency': 'weekly',
+            'interval': 1,
+            'weekdays': ['0', '2'],
+            'reminder_minutes': 10,
+        })
+        self.assertRedirects(response, reverse('recurring_task_list'))
+        rule = RecurringTask.objects.get(user=self.user)
+        self.assertEqual(rule.weekday_list, [0, 2])
+
+        self.client.post(reverse('end_recurring_task', args=[rule.id]))
+
+        rule.refresh_from_db()
+        self.assertLessEqual(rule.until, timezone.now())
+        later = timezone.now() + timedelta(hours=1)
+        self.assertEqual(expand_occurrences(self.user, later, later + timedelta(days=7), dt_timezone.utc), [])
+
+
+class ReminderTests(TaskTestMixin, TestCase):
+
+    def make_due_task(self, user=None, minutes_left=5, **extra):
+        """A one hour task ending in ``minutes_left``, so within its 10 minute reminder lead by default"""
+        start = timezone.now() + timedelta(minutes=minutes_left) - timedelta(hours=1)
+        return self.make_task(user=user, start=start, **extra)
+
+    def test_one_email_per_user_and_never_twice(self):
+        first = self.make_due_task(title='Write report')
+        second = self.make_due_task(title='Call bank')
+        self.make_due_task(minutes_left=120, title='Later')
+        self.make_due_task(status='completed', title='Done')
+        self.make_due_task(user=self.other_user, title='Muted')
+        get_user_model().objects.filter(pk=self.other_user.pk).update(email_notifications=False)
+
+        task_ids = [pk for due_at, pk, user_id in upcoming_reminders(timezone.now(), timezone.now())]
+        self.assertCountEqual(task_ids, [first.pk, second.pk, Task.objects.get(title='Muted').pk])
+
+        result = send_reminders(task_ids)
+
+        self.assertEqual((result.emails, result.tasks, result.skipped), (1, 2, 1))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+        self.assertIn('Write report', mail.outbox[0].body)
+        self.assertIn('Call bank', mail.outbox[0].body)
+        self.assertEqual(TaskReminder.objects.count(), 2)
+
+        # A restarted worker finds the records and sends nothing
+        result = send_reminders(task_ids)
+        self.assertEqual((result.emails, result.skipped), (0, 3))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_removing_seeded_data_removes_its_reminders(self):
+        users = seed_users(2, 'seed-reminder-{}@example.invalid')
+        seed_tasks(users, 40)
+        for user in users:
+            self.make_due_task(user=user)
+
+        call_command('run_reminder_worker', once=True, stdout=StringIO())
+        self.assertEqual(TaskReminder.objects.filter(task__user__in=users).count(), 2)
+
+        remove_seeded(users)
+
+        self.assertFalse(TaskReminder.objects.exists())
+        self.assertFalse(Task.objects.filter(user__in=users).exists())
+
+    def test_moved_deadline_gets_a_new_reminder(self):
+        task = self.make_due_task(title='Moving')
+        send_reminders([task.pk])
+        Task.objects.filter(pk=task.pk).update(end_time=task.end_time + timedelta(minutes=2))
+
+        send_reminders([task.pk])
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(TaskReminder.objects.filter(task=task).count(), 2)
+
+    def test_worker_once(self):
+        for _ in range(3):
+            self.make_due_task()
+        self.make_due_task(user=self.other_user)
+
+        out = StringIO()
+        call_command('run_reminder_worker', '--once', '--batch-size', '2', '--workers', '2', stdout=out)
+        call_command('run_reminder_worker', '--once', stdout=StringIO())
+
+        # Batches keep a user's tasks together, so the owner's three go in one email
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [self.other_user.email, self.user.email])
+        self.assertIn('Sent 2 reminder emails covering 4 tasks', out.getvalue())
+
+
+class AsyncApiTests(TaskTestMixin, TestCase):
+
+    async def test_parallel_requests_on_one_event_loop(self):
+        for days_ago in range(3):
+            await Task.objects.acreate(
+                user=self.user,
+                title=f'Task {days_ago}',
+                start_time=timezone.now() - timedelta(days=days_ago, hours=2),
+                end_time=timezone.now() - timedelta(days=days_ago, hours=1),
+                status='completed',
+            )
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+
+        tasks_response, metrics_response = await asyncio.gather(
+            client.get(reverse('get_tasks_json'), {'page_size': 2}),
+            client.get(reverse('productivity_metrics')),
+        )
+
+        data = tasks_response.json()
+        self.assertEqual([task['title'] for task in data['tasks']], ['Task 2', 'Task 1'])
+        self.assertIsNotNone(data['meta']['next'])
+        next_page = (await client.get(data['meta']['next'])).json()
+        self.assertEqual([task['title'] for task in next_page['tasks']], ['Task 0'])
+        self.assertAlmostEqual(metrics_response.json()['completion_times']['p50'], 1)
+
+    async def test_requires_login(self):
+        response = await AsyncClient().get(reverse('productivity_metrics'))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,11 @@
+import zoneinfo
+
+from django.utils import timezone
+
+
+def user_tzinfo(user):
+    """Return the user's configured timezone, falling back to the current one"""
+    try:
+        return zoneinfo.ZoneInfo(user.timezone)
+    except (AttributeError, TypeError, ValueError, zoneinfo.ZoneInfoNotFoundError):
+        return timezone.get_current_timezone()
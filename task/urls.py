@@ -7,10 +7,26 @@ urlpatterns = [
     path('', dashboard, name='dashboard'),
     path('tasks/', task_list, name='task_list'),
     path('tasks/create/', create_task, name='create_task'),
+    path('tasks/import/', import_tasks, name='import_tasks'),
     path('tasks/<int:task_id>/edit/', edit_task, name='edit_task'),
     path('tasks/<int:task_id>/delete/', delete_task, name='delete_task'),
     path('tasks/<int:task_id>/update-status/', update_task_status, name='update_task_status'),
 
+    # Recurring tasks
+    path('tasks/recurring/', recurring_task_list, name='recurring_task_list'),
+    path('tasks/recurring/create/', create_recurring_task, name='create_recurring_task'),
+    path('tasks/recurring/<int:recurring_task_id>/end/', end_recurring_task, name='end_recurring_task'),
+    path(
+        'tasks/recurring/<int:recurring_task_id>/occurrences/<int:timestamp>/update-status/',
+        update_occurrence_status,
+        name='update_occurrence_status'
+    ),
+    path(
+        'tasks/recurring/<int:recurring_task_id>/occurrences/<int:timestamp>/edit/',
+        edit_occurrence,
+        name='edit_occurrence'
+    ),
+
     # Missed task reasons
     path('tasks/<int:task_id>/mark-not-done/', mark_task_not_done, name='mark_task_not_done'),
     path('tasks/<int:task_id>/add-missed-reason/',add_missed_reason, name='add_missed_reason'),
@@ -20,5 +36,7 @@ urlpatterns = [
     # Analytics
     path('analytics/',analytics, name='analytics'),
     path('api/tasks/',get_tasks_json, name='get_tasks_json'),
+    path('api/tasks/export/', export_tasks, name='export_tasks'),
+    path('api/tasks/bulk/', bulk_tasks, name='bulk_tasks'),
     path('api/productivity-metrics/', productivity_metrics, name='productivity_metrics'),
 ]
\ No newline at end of file
@@ -1,92 +1,96 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
-from django.http import JsonResponse
-from django.db.models import Count, Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Count
 from datetime import datetime, timedelta
+import csv
 import json
 
-from task.models import Task, MissedTaskReason
-from task.forms import TaskForm, MarkAsNotDoneForm, MissedTaskReasonForm
+from task.bulk import BulkOperationError, bulk_task_operation
+from task.cache import aget_or_compute, get_or_compute
+from task.models import DailyTaskStats, RecurringTask, Task
+from task.forms import TaskForm, MarkAsNotDoneForm, MissedTaskReasonForm, RecurringTaskForm, TaskImportForm
+from task.importing import CSV_COLUMNS, detect_format, import_tasks as import_task_file
+from task.pagination import InvalidCursor, apaginate_tasks, paginate_tasks
+from task.queries import listing_tasks, reasons_with_usage
+from task.recurrence import day_window, expand_occurrences, find_occurrence, with_occurrence_rollups
+from task.stats import DurationStats, TaskStats, hours
+from task.timezones import user_tzinfo
 
-from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
-from django.contrib import messages
-from django.utils import timezone
-from django.http import JsonResponse
-from django.db.models import Count, Q, Avg
-from datetime import datetime, timedelta
-from .models import Task, MissedTaskReason
 
 @login_required(login_url='login')
 def dashboard(request):
-    # Auto-update task statuses for this user before showing data
-    tasks_to_update = Task.objects.filter(
-        user=request.user,
-        end_time__lt=timezone.now(),
-        status__in=['pending', 'in_progress']
-    )
-    
+    # Auto-update task statuses for this user before showing data,
+    # unless the deadline scheduler is taking care of it
     updated_count = 0
-    for task in tasks_to_update:
-        old_status = task.status
-        new_status = task.auto_update_status()
-        if old_status != new_status:
-            updated_count += 1
+    if settings.TASK_SWEEP_ON_REQUEST:
+        swept = Task.objects.sweep_expired(user=request.user)
+        updated_count = sum(swept.values())
     
     if updated_count > 0:
         messages.info(request, f"Automatically updated {updated_count} task statuses based on deadlines.")
     
+    # One clock for the whole request, so every status shown agrees
+    now = timezone.now()
+    
     # Get current date and calculate date ranges
-    today = timezone.now().date()
+    today = now.date()
     week_ago = today - timedelta(days=7)
     month_ago = today - timedelta(days=30)
     
     # Get user's tasks (after auto-update)
     tasks = Task.objects.filter(user=request.user)
     
-    # Statistics
-    total_tasks = tasks.count()
-    completed_tasks = tasks.filter(status='completed').count()
-    pending_tasks = tasks.filter(status='pending').count()
-    in_progress_tasks = tasks.filter(status='in_progress').count()
-    not_done_tasks = tasks.filter(status='not_done').count()
-    
-    # Missed tasks with reasons analysis
-    missed_with_reasons = tasks.filter(status='not_done', missed_reason__isnull=False).count()
-    missed_with_custom_reasons = tasks.filter(status='not_done', custom_missed_reason__isnull=False).exclude(custom_missed_reason='').count()
-    missed_without_reasons = tasks.filter(status='not_done', missed_reason__isnull=True, custom_missed_reason='').count()
+    # Statistics from the daily rollups; overdue tasks depend on the time of day
+    overdue_tasks = tasks.filter(
+        end_time__lt=now,
+        status__in=['pending', 'in_progress']
+    ).count()
+    stats = TaskStats.from_rollups(DailyTaskStats.objects.filter(user=request.user), overdue=overdue_tasks)
     
     # Today's tasks
     today_tasks = tasks.filter(
         start_time__date=today
-    ).order_by('start_time')
+    ).with_effective_status(now).order_by('start_time')
     
-    # Upcoming tasks (next 7 days)
+    # Upcoming tasks (next 7 days) that are still open
     upcoming_tasks = tasks.filter(
         start_time__date__gte=today,
         start_time__date__lte=today + timedelta(days=7)
-    ).exclude(status__in=['completed', 'not_done']).order_by('start_time')[:5]
-        
-    # Overdue tasks (for notification)
-    overdue_tasks = tasks.filter(
-        end_time__lt=timezone.now(),
-        status__in=['pending', 'in_progress']
-    ).count()
+    ).filter_effective_status(['pending', 'in_progress'], now).order_by('start_time')[:5]
+    
+    # Occurrences of recurring tasks that have no Task row yet
+    tzinfo = user_tzinfo(request.user)
+    local_today = timezone.localtime(now, tzinfo).date()
+    window_start, window_end = day_window(local_today, local_today + timedelta(days=7), tzinfo)
+    occurrences = expand_occurrences(request.user, window_start, window_end, tzinfo, now)
+    if occurrences:
+        today_end = window_start + timedelta(days=1)
+        today_tasks = sorted(
+            list(today_tasks) + [task for task in occurrences if task.start_time < today_end],
+            key=lambda task: task.start_time
+        )
+        upcoming_tasks = sorted(
+            list(upcoming_tasks) + [task for task in occurrences if task.effective_status == 'pending'],
+            key=lambda task: task.start_time
+        )[:5]
     
     context = {
-        'total_tasks': total_tasks,
-        'completed_tasks': completed_tasks,
-        'pending_tasks': pending_tasks,
-        'in_progress_tasks': in_progress_tasks,
-        'not_done_tasks': not_done_tasks,
-        'missed_with_reasons': missed_with_reasons,
-        'missed_with_custom_reasons': missed_with_custom_reasons,
-        'missed_without_reasons': missed_without_reasons,
+        'total_tasks': stats.total,
+        'completed_tasks': stats.completed,
+        'pending_tasks': stats.pending,
+        'in_progress_tasks': stats.in_progress,
+        'not_done_tasks': stats.not_done,
+        'missed_with_reasons': stats.missed_with_reasons,
+        'missed_with_custom_reasons': stats.missed_with_custom_reasons,
+        'missed_without_reasons': stats.missed_without_reasons,
         'today_tasks': today_tasks,
         'upcoming_tasks': upcoming_tasks,
-        'overdue_tasks': overdue_tasks,
+        'overdue_tasks': stats.overdue,
         'auto_updated_count': updated_count,
     }
     
@@ -94,35 +98,48 @@ def dashboard(request):
 
 @login_required
 def task_list(request):
-    # Auto-update task statuses for this user before showing data
-    tasks_to_update = Task.objects.filter(
-        user=request.user,
-        end_time__lt=timezone.now(),
-        status__in=['pending', 'in_progress']
-    )
-    
+    # Auto-update task statuses for this user before showing data,
+    # unless the deadline scheduler is taking care of it
     updated_count = 0
-    for task in tasks_to_update:
-        old_status = task.status
-        new_status = task.auto_update_status()
-        if old_status != new_status:
-            updated_count += 1
+    if settings.TASK_SWEEP_ON_REQUEST:
+        swept = Task.objects.sweep_expired(user=request.user)
+        updated_count = sum(swept.values())
     
     if updated_count > 0:
         messages.info(request, f"Automatically updated {updated_count} task statuses.")
     
     status_filter = request.GET.get('status', 'all')
     
-    tasks = Task.objects.filter(user=request.user)
+    # Statuses are shown as of now without saving the deadline transitions
+    now = timezone.now()
+    tasks = listing_tasks(Task.objects.filter(user=request.user)).with_effective_status(now)
     
     if status_filter != 'all':
-        tasks = tasks.filter(status=status_filter)
-    
-    # Sort by start time (upcoming first)
-    tasks = tasks.order_by('start_time')
+        tasks = tasks.filter_effective_status(status_filter, now)
+    
+    # One page at a time, sorted by start time (upcoming first)
+    page_size = request.GET.get('page_size')
+    try:
+        page = paginate_tasks(tasks, request.GET.get('cursor'), page_size)
+    except InvalidCursor:
+        page = paginate_tasks(tasks, page_size=page_size)
+    
+    # Upcoming occurrences of recurring tasks, above the first page
+    occurrences = []
+    if not request.GET.get('cursor') and status_filter in ('all', 'pending'):
+        tzinfo = user_tzinfo(request.user)
+        occurrences = expand_occurrences(
+            request.user,
+            now,
+            now + timedelta(days=settings.TASK_RECURRENCE_LIST_DAYS),
+            tzinfo,
+            now
+        )
     
     context = {
-        'tasks': tasks,
+        'tasks': page,
+        'page_links': page.links(request),
+        'occurrences': occurrences,
         'status_filter': status_filter,
         'auto_updated_count': updated_count,
     }
@@ -143,6 +160,114 @@ def create_task(request):
     
     return render(request, 'task_form.html', {'form': form, 'title': 'Create Task'})
 
+@login_required
+def import_tasks(request):
+    """Create many tasks at once from an uploaded CSV or iCalendar file"""
+    result = None
+    if request.method == 'POST':
+        form = TaskImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = import_task_file(request.user, upload, detect_format(upload.name))
+            except (ValueError, UnicodeDecodeError) as e:
+                messages.error(request, f'Could not read the file: {e}')
+            else:
+                messages.success(
+                    request,
+                    f'Imported {result.created} of {result.rows} tasks '
+                    f'({result.rows_per_second:.0f} rows/second).'
+                )
+                if not result.errors:
+                    return redirect('task_list')
+    else:
+        form = TaskImportForm()
+    
+    return render(request, 'tasks/import_tasks.html', {
+        'form': form,
+        'result': result,
+        'errors': result.errors[:settings.TASK_IMPORT_MAX_REPORTED_ERRORS] if result else [],
+        'csv_columns': CSV_COLUMNS,
+    })
+
+@login_required
+def recurring_task_list(request):
+    """List the user's recurring tasks"""
+    recurring_tasks = RecurringTask.objects.filter(user=request.user)
+    return render(request, 'tasks/recurring_tasks.html', {
+        'recurring_tasks': recurring_tasks,
+        'now': timezone.now(),
+    })
+
+@login_required
+def create_recurring_task(request):
+    if request.method == 'POST':
+        form = RecurringTaskForm(request.POST)
+        if form.is_valid():
+            recurring_task = form.save(commit=False)
+            recurring_task.user = request.user
+            recurring_task.save()
+            messages.success(request, 'Recurring task created successfully!')
+            return redirect('recurring_task_list')
+    else:
+        form = RecurringTaskForm()
+    
+    return render(request, 'tasks/recurring_task_form.html', {'form': form, 'title': 'Create Recurring Task'})
+
+@login_required
+def end_recurring_task(request, recurring_task_id):
+    """Stop a recurring task from now on, keeping its past occurrences"""
+    recurring_task = get_object_or_404(RecurringTask, id=recurring_task_id, user=request.user)
+    if request.method == 'POST':
+        recurring_task.until = timezone.now()
+        recurring_task.save(update_fields=['until', 'updated_at'])
+        messages.success(request, f'"{recurring_task.title}" will not repeat any more.')
+    return redirect('recurring_task_list')
+
+def get_occurrence_or_404(request, recurring_task_id, timestamp):
+    recurring_task = get_object_or_404(RecurringTask, id=recurring_task_id, user=request.user)
+    start = find_occurrence(recurring_task, timestamp, user_tzinfo(request.user))
+    if start is None or recurring_task.skipped_occurrences.filter(occurrence_start=start).exists():
+        raise Http404('No such occurrence')
+    return recurring_task, start
+
+@login_required
+def update_occurrence_status(request, recurring_task_id, timestamp):
+    """Change the status of one occurrence, saving it as a Task"""
+    if request.method == 'POST':
+        recurring_task, start = get_occurrence_or_404(request, recurring_task_id, timestamp)
+        new_status = request.POST.get('status')
+        
+        if new_status in dict(Task.STATUS_CHOICES):
+            task = recurring_task.materialize(start)
+            task.status = new_status
+            task.save()
+            messages.success(request, f'Task status updated to {task.get_status_display()}')
+        else:
+            messages.error(request, 'Invalid status')
+    
+    return redirect('task_list')
+
+@login_required
+def edit_occurrence(request, recurring_task_id, timestamp):
+    """Edit one occurrence; it becomes a Task only when saved"""
+    recurring_task, start = get_occurrence_or_404(request, recurring_task_id, timestamp)
+    existing = Task.objects.filter(recurring_task=recurring_task, occurrence_start=start).first()
+    if existing is not None:
+        return redirect('edit_task', task_id=existing.id)
+    
+    occurrence = recurring_task.occurrence(start)
+    if request.method == 'POST':
+        form = TaskForm(request.POST, instance=occurrence)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Task updated successfully!')
+            return redirect('task_list')
+    else:
+        form = TaskForm(instance=occurrence)
+    
+    return render(request, 'task_form.html', {'form': form, 'title': 'Edit Task'})
+
 @login_required
 def edit_task(request, task_id):
     task = get_object_or_404(Task, id=task_id, user=request.user)
@@ -162,7 +287,10 @@ def edit_task(request, task_id):
 def delete_task(request, task_id):
     task = get_object_or_404(Task, id=task_id, user=request.user)
     if request.method == 'POST':
-        task.delete()
+        with transaction.atomic():
+            # A deleted occurrence of a recurring task must not come back
+            Task.objects.filter(pk=task.pk).skip_occurrences()
+            task.delete()
         messages.success(request, 'Task deleted successfully!')
         return redirect('task_list')
     
@@ -231,24 +359,11 @@ def add_missed_reason(request, task_id):
         'form': form
     })
 
-@login_required
-def missed_tasks_analysis(request):
-    """View for analyzing missed tasks with reasons"""
-    date_range = request.GET.get('range', '30days')
-    
-    if date_range == '7days':
-        days = 7
-    elif date_range == '90days':
-        days = 90
-    else:
-        days = 30
-    
-    end_date = timezone.now().date()
-    start_date = end_date - timedelta(days=days)
-    
+def missed_tasks_data(user, start_date, end_date):
+    """Missed-task breakdown for a date range, in a cacheable form"""
     # Get missed tasks in date range
     missed_tasks = Task.objects.filter(
-        user=request.user,
+        user=user,
         status='not_done',
         end_time__date__gte=start_date,
         end_time__date__lte=end_date
@@ -261,11 +376,13 @@ def missed_tasks_analysis(request):
         count=Count('id')
     ).order_by('-count')
     
+    stats = TaskStats.for_queryset(missed_tasks)
+    
     # Tasks without reasons
-    tasks_without_reasons = missed_tasks.filter(
+    tasks_without_reasons = listing_tasks(missed_tasks.filter(
         missed_reason__isnull=True, 
         custom_missed_reason=''
-    )
+    ))
     
     # Common custom reasons (top 10)
     common_custom_reasons = missed_tasks.filter(
@@ -278,15 +395,37 @@ def missed_tasks_analysis(request):
         count=Count('id')
     ).order_by('-count')[:10]
     
-    context = {
-        'missed_tasks': missed_tasks,
-        'reason_stats': reason_stats,
-        'tasks_without_reasons': tasks_without_reasons,
-        'common_custom_reasons': common_custom_reasons,
+    return {
+        'reason_stats': list(reason_stats),
+        'tasks_without_reasons': list(tasks_without_reasons),
+        'tasks_without_reasons_count': stats.missed_without_reasons,
+        'common_custom_reasons': list(common_custom_reasons),
+        'total_missed': stats.total,
+    }
+
+@login_required
+def missed_tasks_analysis(request):
+    """View for analyzing missed tasks with reasons"""
+    date_range = request.GET.get('range', '30days')
+    
+    if date_range == '7days':
+        days = 7
+    elif date_range == '90days':
+        days = 90
+    else:
+        days = 30
+    
+    end_date = timezone.now().date()
+    start_date = end_date - timedelta(days=days)
+    
+    context = get_or_compute(
+        request.user, 'missed_tasks_analysis', [start_date, end_date],
+        lambda: missed_tasks_data(request.user, start_date, end_date)
+    )
+    context.update({
         'date_range': date_range,
         'days': days,
-        'total_missed': missed_tasks.count(),
-    }
+    })
     
     return render(request, 'tasks/missed_tasks_analysis.html', context)
 
@@ -302,8 +441,8 @@ def manage_missed_reasons(request):
     else:
         form = MissedTaskReasonForm()
     
-    # Get all active reasons
-    reasons = MissedTaskReason.objects.filter(is_active=True)
+    # Get all active reasons with their usage counts
+    reasons = reasons_with_usage()
     
     context = {
         'form': form,
@@ -312,67 +451,47 @@ def manage_missed_reasons(request):
     
     return render(request, 'tasks/manage_missed_reasons.html', context)
 
-from django.shortcuts import render
-from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from django.db.models import Count, Q, F
-from django.utils import timezone
-from datetime import datetime, timedelta
-import json
-from .models import Task, MissedTaskReason
 
-@login_required
-def analytics(request):
-    """Comprehensive analytics dashboard"""
-    # Date range filter
-    date_range = request.GET.get('range', '30days')
-    
-    if date_range == '7days':
-        days = 7
-    elif date_range == '90days':
-        days = 90
-    else:
-        days = 30
-    
-    end_date = timezone.now().date()
-    start_date = end_date - timedelta(days=days)
-    
-    # Get user's tasks in the date range
-    tasks = Task.objects.filter(
-        user=request.user,
-        start_time__date__gte=start_date,
-        start_time__date__lte=end_date
-    )
+def analytics_data(user, start_date, end_date):
+    """Statistics and chart data for the analytics page, in a cacheable form"""
+    # Daily rollups of the user's tasks in the date range (user's timezone)
+    rollups = list(DailyTaskStats.objects.filter(
+        user=user,
+        date__gte=start_date,
+        date__lte=end_date
+    ))
+    
+    # Recurring occurrences without a Task row count as tasks too
+    tzinfo = user_tzinfo(user)
+    window_start, window_end = day_window(start_date, end_date, tzinfo)
+    occurrences = expand_occurrences(user, window_start, window_end, tzinfo)
+    if occurrences:
+        rollups = with_occurrence_rollups(rollups, occurrences, tzinfo)
+    rollups_by_date = {rollup.date: rollup for rollup in rollups}
     
     # Basic statistics
-    total_tasks = tasks.count()
-    completed_tasks = tasks.filter(status='completed').count()
-    pending_tasks = tasks.filter(status='pending').count()
-    in_progress_tasks = tasks.filter(status='in_progress').count()
-    not_done_tasks = tasks.filter(status='not_done').count()
-    
-    # Completion rate
-    completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+    stats = TaskStats.from_rollup_rows(rollups)
     
     # Status distribution for chart
-    status_distribution = tasks.values('status').annotate(count=Count('id'))
     status_data = {
         'labels': [],
         'data': [],
         'colors': ['#4361ee', '#4cc9f0', '#f72585', '#e63946']
     }
     
-    for status in status_distribution:
-        status_data['labels'].append(dict(Task.STATUS_CHOICES)[status['status']])
-        status_data['data'].append(status['count'])
+    status_counts = stats.status_counts()
+    for status, label in Task.STATUS_CHOICES:
+        if status_counts[status]:
+            status_data['labels'].append(label)
+            status_data['data'].append(status_counts[status])
     
     # Daily completion trend
     daily_data = []
-    for i in range(days):
+    for i in range((end_date - start_date).days):
         date = start_date + timedelta(days=i)
-        day_tasks = tasks.filter(start_time__date=date)
-        completed = day_tasks.filter(status='completed').count()
-        total = day_tasks.count()
+        rollup = rollups_by_date.get(date)
+        total = rollup.total if rollup else 0
+        completed = rollup.completed if rollup else 0
         
         if total > 0:
             day_completion_rate = (completed / total) * 100
@@ -386,67 +505,50 @@ def analytics(request):
             'completed_tasks': completed
         })
     
-    # Task duration analysis - FIXED: Calculate duration in Python instead of database
-    completed_tasks_with_duration = tasks.filter(
-        status='completed',
-        start_time__isnull=False,
-        end_time__isnull=False
-    )
-    
-    # Calculate average duration manually
-    total_duration_hours = 0
-    valid_tasks_count = 0
-    
-    for task in completed_tasks_with_duration:
-        if task.start_time and task.end_time:
-            duration = task.end_time - task.start_time
-            total_duration_hours += duration.total_seconds() / 3600
-            valid_tasks_count += 1
-    
-    avg_duration = total_duration_hours / valid_tasks_count if valid_tasks_count > 0 else 0
-    
-    # Most productive days
-    productive_days = tasks.filter(status='completed').values(
-        'start_time__week_day'
-    ).annotate(
-        count=Count('id')
-    ).order_by('-count')[:3]
+    # Average duration of completed tasks
+    completed_duration = sum((rollup.completed_duration for rollup in rollups), timedelta(0))
+    avg_duration = hours(completed_duration) / stats.completed if stats.completed else 0
     
+    # Most productive days of the week
     day_names = {
         1: 'Monday', 2: 'Tuesday', 3: 'Wednesday', 4: 'Thursday',
         5: 'Friday', 6: 'Saturday', 7: 'Sunday'
     }
     
+    completed_by_weekday = {}
+    for rollup in rollups:
+        if rollup.completed:
+            weekday = rollup.date.isoweekday()
+            completed_by_weekday[weekday] = completed_by_weekday.get(weekday, 0) + rollup.completed
+    
+    productive_days = sorted(completed_by_weekday.items(), key=lambda item: item[1], reverse=True)[:3]
     productive_days_list = []
-    for day in productive_days:
+    for weekday, count in productive_days:
         productive_days_list.append({
-            'day': day_names[day['start_time__week_day']],
-            'count': day['count']
+            'day': day_names[weekday],
+            'count': count
         })
     
     # Missed tasks analysis
-    missed_tasks = tasks.filter(status='not_done')
-    missed_with_reasons = missed_tasks.filter(
-        Q(missed_reason__isnull=False) | ~Q(custom_missed_reason='')
-    ).count()
+    missed_tasks = Task.objects.filter(
+        user=user,
+        status='not_done',
+        start_time__gte=datetime.combine(start_date, datetime.min.time(), tzinfo=tzinfo),
+        start_time__lt=datetime.combine(end_date + timedelta(days=1), datetime.min.time(), tzinfo=tzinfo)
+    )
     
     missed_reason_stats = missed_tasks.filter(
         missed_reason__isnull=False
     ).values('missed_reason__name').annotate(count=Count('id')).order_by('-count')[:5]
     
-    context = {
-        'date_range': date_range,
-        'days': days,
-        'start_date': start_date,
-        'end_date': end_date,
-        
+    return {
         # Statistics
-        'total_tasks': total_tasks,
-        'completed_tasks': completed_tasks,
-        'pending_tasks': pending_tasks,
-        'in_progress_tasks': in_progress_tasks,
-        'not_done_tasks': not_done_tasks,
-        'completion_rate': round(completion_rate, 1),
+        'total_tasks': stats.total,
+        'completed_tasks': stats.completed,
+        'pending_tasks': stats.pending,
+        'in_progress_tasks': stats.in_progress,
+        'not_done_tasks': stats.not_done,
+        'completion_rate': round(stats.completion_rate, 1),
         
         # Chart data
         'status_data': status_data,
@@ -455,8 +557,35 @@ def analytics(request):
         # Advanced analytics
         'avg_duration': round(avg_duration, 1),
         'productive_days': productive_days_list,
-        'missed_with_reasons': missed_with_reasons,
+        'missed_with_reasons': stats.missed_with_any_reason,
         'missed_reason_stats': list(missed_reason_stats),
+    }
+
+@login_required
+def analytics(request):
+    """Comprehensive analytics dashboard"""
+    # Date range filter
+    date_range = request.GET.get('range', '30days')
+    
+    if date_range == '7days':
+        days = 7
+    elif date_range == '90days':
+        days = 90
+    else:
+        days = 30
+    
+    end_date = timezone.now().date()
+    start_date = end_date - timedelta(days=days)
+    
+    context = get_or_compute(
+        request.user, 'analytics', [start_date, end_date],
+        lambda: analytics_data(request.user, start_date, end_date)
+    )
+    context.update({
+        'date_range': date_range,
+        'days': days,
+        'start_date': start_date,
+        'end_date': end_date,
         
         # Time ranges for filter
         'time_ranges': [
@@ -464,13 +593,35 @@ def analytics(request):
             {'value': '30days', 'label': 'Last 30 Days'},
             {'value': '90days', 'label': 'Last 90 Days'},
         ]
-    }
+    })
     
     return render(request, 'analytics/analytics.html', context)
 
+def task_json(task, now):
+    """API representation of a task loaded through listing_tasks()"""
+    duration = task.end_time - task.start_time
+    return {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'start_time': task.start_time.isoformat(),
+        'end_time': task.end_time.isoformat(),
+        'status': task.effective_status,
+        'status_display': task.get_effective_status_display(),
+        'duration_hours': round(duration.total_seconds() / 3600, 2),
+        'is_overdue': task.end_time < now and task.status not in ['completed', 'not_done'],
+        'has_missed_reason': task.has_missed_reason,
+        'missed_reason': task.get_missed_reason_display() if task.has_missed_reason else None,
+    }
+
 @login_required
-def get_tasks_json(request):
-    """API endpoint for task data in JSON format"""
+async def get_tasks_json(request):
+    """API endpoint for task data in JSON format
+    
+    Async, like productivity_metrics, so the analytics page's parallel
+    requests are served concurrently by one ASGI worker.
+    """
+    user = await request.auser()
     date_range = request.GET.get('range', '30days')
     
     if date_range == '7days':
@@ -480,70 +631,167 @@ def get_tasks_json(request):
     else:
         days = 30
     
-    end_date = timezone.now().date()
+    now = timezone.now()
+    end_date = now.date()
     start_date = end_date - timedelta(days=days)
     
-    tasks = Task.objects.filter(
-        user=request.user,
+    tasks = listing_tasks(Task.objects.filter(
+        user=user,
         start_time__date__gte=start_date,
         start_time__date__lte=end_date
-    ).order_by('start_time')
-    
-    tasks_data = []
-    for task in tasks:
-        # Calculate duration manually
-        duration_hours = 0
-        if task.start_time and task.end_time:
-            duration = task.end_time - task.start_time
-            duration_hours = round(duration.total_seconds() / 3600, 2)
-        
-        tasks_data.append({
-            'id': task.id,
-            'title': task.title,
-            'description': task.description,
-            'start_time': task.start_time.isoformat(),
-            'end_time': task.end_time.isoformat(),
-            'status': task.status,
-            'status_display': task.get_status_display(),
-            'duration_hours': duration_hours,
-            'is_overdue': task.is_overdue,
-            'has_missed_reason': task.has_missed_reason,
-            'missed_reason': task.get_missed_reason_display() if task.has_missed_reason else None,
-        })
+    ), with_reason=True).with_effective_status(now)
+    
+    try:
+        page = await apaginate_tasks(tasks, request.GET.get('cursor'), request.GET.get('page_size'))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    links = page.links(request)
+    tasks_data = [task_json(task, now) for task in page]
     
     return JsonResponse({
         'tasks': tasks_data,
         'meta': {
-            'total_count': len(tasks_data),
+            'count': len(tasks_data),
+            'next': links['next'],
+            'prev': links['prev'],
             'date_range': f"{start_date} to {end_date}",
-            'generated_at': timezone.now().isoformat()
+            'generated_at': now.isoformat()
         }
     })
 
 @login_required
-def productivity_metrics(request):
-    """Detailed productivity metrics API"""
-    end_date = timezone.now().date()
-    start_date = end_date - timedelta(days=30)  # Last 30 days
+def bulk_tasks(request):
+    """Apply one operation to many tasks and report the result per task"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({'error': 'Expected a JSON object'}, status=400)
+    
+    operation = payload.get('operation')
+    try:
+        results = bulk_task_operation(request.user, payload.get('ids'), operation, payload)
+    except BulkOperationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    succeeded = sum(1 for result in results if result['ok'])
+    return JsonResponse({
+        'operation': operation,
+        'results': results,
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+    })
+
+EXPORT_FIELDS = [
+    'id', 'title', 'description', 'start_time', 'end_time', 'status', 'status_display',
+    'duration_hours', 'is_overdue', 'missed_reason', 'missed_at',
+]
+
+
+class Echo:
+    """File-like object that hands back what is written, for streaming CSV"""
     
+    def write(self, value):
+        return value
+
+
+async def export_rows(tasks, now):
+    """Yield one plain dict per task without instantiating Task objects"""
+    status_display = dict(Task.STATUS_CHOICES)
+    rows = tasks.with_effective_status(now).values(
+        'id', 'title', 'description', 'start_time', 'end_time', 'status', 'effective_status',
+        'custom_missed_reason', 'missed_reason__name', 'missed_at',
+    ).order_by('start_time', 'id')
+    
+    async for row in rows.aiterator(chunk_size=settings.TASK_EXPORT_CHUNK_SIZE):
+        duration = row['end_time'] - row['start_time']
+        yield {
+            'id': row['id'],
+            'title': row['title'],
+            'description': row['description'],
+            'start_time': row['start_time'].isoformat(),
+            'end_time': row['end_time'].isoformat(),
+            'status': row['effective_status'],
+            'status_display': status_display.get(row['effective_status'], row['effective_status']),
+            'duration_hours': round(duration.total_seconds() / 3600, 2),
+            'is_overdue': row['end_time'] < now and row['status'] not in ['completed', 'not_done'],
+            'missed_reason': row['custom_missed_reason'] or row['missed_reason__name'],
+            'missed_at': row['missed_at'].isoformat() if row['missed_at'] else None,
+        }
+
+
+async def csv_lines(rows):
+    """Yield CSV-encoded lines for export rows, header first"""
+    writer = csv.DictWriter(Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    async for row in rows:
+        yield writer.writerow(row)
+
+
+@login_required
+async def export_tasks(request):
+    """Stream the user's task history as NDJSON (default) or CSV
+    
+    Async, so rows are read with aiterator() and the ASGI handler streams
+    each chunk as it is produced instead of buffering the whole file.
+    """
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return JsonResponse({'error': 'Unsupported export format'}, status=400)
+    
+    user = await request.auser()
+    tasks = Task.objects.filter(user=user)
+    
+    date_range = request.GET.get('range', 'all')
+    days = {'7days': 7, '30days': 30, '90days': 90}.get(date_range)
+    if days:
+        end_date = timezone.now().date()
+        tasks = tasks.filter(
+            start_time__date__gte=end_date - timedelta(days=days),
+            start_time__date__lte=end_date
+        )
+    
+    rows = export_rows(tasks, timezone.now())
+    
+    if export_format == 'csv':
+        response = StreamingHttpResponse(csv_lines(rows), content_type='text/csv')
+    else:
+        response = StreamingHttpResponse(
+            (json.dumps(row) + '\n' async for row in rows),
+            content_type='application/x-ndjson'
+        )
+    
+    response['Content-Disposition'] = f'attachment; filename="selflog-tasks-{date_range}.{export_format}"'
+    return response
+
+async def productivity_data(user, start_date, end_date):
+    """Weekly completion rates and completion times, in a cacheable form"""
     tasks = Task.objects.filter(
-        user=request.user,
+        user=user,
         start_time__date__gte=start_date,
         start_time__date__lte=end_date
     )
     
-    # Weekly completion rates
+    # Weekly completion rates over the last four 7-day windows, summed from
+    # the daily rollups
+    rollups = [rollup async for rollup in DailyTaskStats.objects.filter(
+        user=user,
+        date__gte=end_date - timedelta(days=28),
+        date__lt=end_date
+    )]
+    
     weekly_data = []
     for week in range(4):
         week_start = end_date - timedelta(days=(week + 1) * 7)
         week_end = end_date - timedelta(days=week * 7)
-        
-        week_tasks = tasks.filter(
-            start_time__date__gte=week_start,
-            start_time__date__lt=week_end
-        )
-        week_completed = week_tasks.filter(status='completed').count()
-        week_total = week_tasks.count()
+        week_rollups = [rollup for rollup in rollups if week_start <= rollup.date < week_end]
+        week_completed = sum(rollup.completed for rollup in week_rollups)
+        week_total = sum(rollup.total for rollup in week_rollups)
         
         weekly_data.append({
             'week': f"Week {4 - week}",
@@ -552,28 +800,31 @@ def productivity_metrics(request):
             'rate': round((week_completed / week_total * 100) if week_total > 0 else 0, 1)
         })
     
-    # Task completion time analysis - FIXED
-    completed_tasks = tasks.filter(status='completed')
-    completion_times = []
-    
-    for task in completed_tasks:
-        if task.start_time and task.end_time:
-            completion_time = (task.end_time - task.start_time).total_seconds() / 3600
-            completion_times.append(completion_time)
+    # Task completion time analysis
+    completion_times = await DurationStats.afor_queryset(tasks.filter(status='completed'))
     
-    if completion_times:
-        avg_completion_time = sum(completion_times) / len(completion_times)
-        min_completion_time = min(completion_times)
-        max_completion_time = max(completion_times)
-    else:
-        avg_completion_time = min_completion_time = max_completion_time = 0
-    
-    return JsonResponse({
+    return {
         'weekly_data': weekly_data,
         'completion_times': {
-            'average': round(avg_completion_time, 2),
-            'min': round(min_completion_time, 2),
-            'max': round(max_completion_time, 2),
+            'average': round(completion_times.average, 2),
+            'min': round(completion_times.minimum, 2),
+            'max': round(completion_times.maximum, 2),
+            'p50': round(completion_times.p50, 2),
+            'p90': round(completion_times.p90, 2),
         },
         'time_period': f"{start_date} to {end_date}"
-    })
+    }
+
+@login_required
+async def productivity_metrics(request):
+    """Detailed productivity metrics API"""
+    user = await request.auser()
+    end_date = timezone.now().date()
+    start_date = end_date - timedelta(days=30)  # Last 30 days
+    
+    data = await aget_or_compute(
+        user, 'productivity_metrics', [start_date, end_date],
+        lambda: productivity_data(user, start_date, end_date)
+    )
+    
+    return JsonResponse(data)